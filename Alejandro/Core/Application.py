@@ -1,89 +1,455 @@
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Dict, Set, Tuple, TYPE_CHECKING
 from Alejandro.Core.WordStream import WordStream
+from Alejandro.Core.WordNode import WordNode
 from Alejandro.Core.Control import Control, ControlResult
+from Alejandro.Core.ModalControl import ModalControl
+from Alejandro.Core.PhraseMatcher import PhraseMatcher, PhraseMatch, PhraseKind
 from Alejandro.Core.Screen import Screen
 from Alejandro.Core.ScreenStack import ScreenStack
-from threading import Thread
+from Alejandro.Core.ControlExecutor import ControlExecutor
+from Alejandro.Core.EventLoop import EventLoopThread, shared_event_loop
+from Alejandro.Core.Latency import LatencyTracker, WordLatency
+from threading import Thread, Lock
+from concurrent import futures
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import groupby
+from dataclasses import dataclass
 from Alejandro.web.events import ControlTriggerEvent, ControlReturnEvent, push_event
 import inspect
-import time
+import asyncio
 import queue
 import json
+import time
+if TYPE_CHECKING:
+	from Alejandro.Core.Retranscriber import Correction
+
+@dataclass
+class Speculation:
+	'''
+	A control triggered on words that weren't final yet, until
+	the final words show whether they were said.
+	'''
+	control: Control
+	matcher: PhraseMatcher
+	state: int
+	'''matcher's state, following the final words from base on.'''
+	base: Optional[WordNode]
+	'''The last final word when it was triggered, the words it was triggered on came after it.'''
+	length: int
+	'''How many words after base it's phrase ended.'''
+	done: Optional[Future]
+	'''It's action (see Application.call_control).'''
+	triggered: float
+	started: bool
+	'''Whether we've processed base, so final words are now the ones it was triggered on.'''
+	seen: int = 0
+	'''How many final words after base we've processed.'''
 
 class Application:
 	"""
 	Core application class that processes words from a WordStream
 	and manages screens/controls.
 	"""
-	def __init__(self, word_stream: WordStream, welcome_screen: Screen):
+	def __init__(self, word_stream: WordStream, welcome_screen: Screen, control_timeout: float = 10.0):
 		self.word_stream = word_stream
 		self.screen_stack = ScreenStack(welcome_screen)
 		self.global_word_handlers: List[Callable[[str], None]] = []
 		self._modal_control: Optional[Control] = None
-		self.waiting_controls: set[str] = set()
+		self._modal_matcher: Optional[PhraseMatcher] = None
+		self._matcher: Optional[PhraseMatcher] = None
+		self._match_state = 0
+
+		self._pending_controls: Dict[str, Future] = {}
+		'''Controls we asked the client to run (js_getter_function) and are waiting on, by id.'''
+		self._pending_lock = Lock()
+		self.control_timeout = control_timeout
+		'''Seconds to wait on the client to complete a control before giving up on it.'''
+		self.timed_out_round_trips = 0
+		'''How many client round trips we gave up on after control_timeout.'''
+		self.control_executor = ControlExecutor()
+		'''Runs this session's control actions in order, slow ones off the word processing thread.'''
+		self.latency = LatencyTracker()
+		'''How long words take from being spoken to being matched, and their controls' actions done.'''
+		
+		self._word_lock = Lock()
+		'''Held while processing a word or applying a correction, which come from different threads.'''
+		self._dictation: Optional[ModalControl] = None
+		'''The modal control collecting words, or that last did until it's corrections are in.'''
+		self.correction_timeout = 5.0
+		'''Seconds a modal control's action waits on the re-transcription of it's last words.'''
+		retranscriber = word_stream.retranscriber
+		if retranscriber:
+			retranscriber.on_correction.append(self.apply_correction)
+			# (Only worth re-transcribing what's said while a modal control is collecting it)
+			retranscriber.wanted = lambda: isinstance(self._modal_control, ModalControl)
+		wake_spotter = word_stream.wake_spotter
+		if wake_spotter:
+			# (Only worth transcribing everything once there's more than a wake phrase to hear)
+			wake_spotter.wanted = lambda: self._modal_control is None and self.screen_stack.current.idle
+		
+		self._speculation: Optional[Speculation] = None
+		'''The control triggered on words that aren't final yet, if any (see process_hypothesis).'''
+		self._last_word: Optional[WordNode] = None
+		self.speculation_slack = 2
+		'''How many final words past where it was hypothesized a speculative control's phrase can end and still count as said.'''
+		self.speculation_timeout = 3.0
+		'''Seconds a speculative control waits on final words before being undone, if none come.'''
+		self.speculation_min_words = 2
+		'''
+		Fewest words a phrase needs to trigger it's control
+		speculatively, one word is too easily misheard (or said
+		in passing) to act on before it's final.
+		'''
+		self._hypothesis: Optional[List[WordNode]] = None
+		'''The latest hypothesis waiting to be processed, if any (see process_hypothesis).'''
+		self._hypothesis_lock = Lock()
+		self._hypothesis_executor: Optional[ThreadPoolExecutor] = None
+		word_stream.hypothesis_handlers.append(self.process_hypothesis)
+		self.start()
+	
+	def start(self) -> None:
+		'''Starts processing the word stream (on it's own thread).'''
 		Thread(target=self.run).start()
 	
+	@property
+	def waiting_controls(self) -> Set[str]:
+		'''Ids of the controls we are waiting on the client to complete.'''
+		with self._pending_lock:
+			return set(self._pending_controls)
+	
 	def run(self) -> None:
 		try:
 			print(f"[APP] Application.run() started, waiting for words...", flush=True)
 			for word in self.word_stream.words():
-				# Notify global handlers
-				for handler in self.global_word_handlers:
-					handler(word.word)
-
-				# Process through current screen's controls
-				screen_name = type(self.screen_stack.current).__name__
-				used_control = None
-
-				if self._modal_control:
-					result = self._modal_control.validate_word(word)
-					if result in (ControlResult.USED, ControlResult.HOLD):
-						used_control = self._modal_control.text
-						self.call_control(self._modal_control)
-					if result == ControlResult.USED:
-						self._modal_control = None
-				else:
-					for control in self.screen_stack.current.controls:
-						result = control.validate_word(word)
-						if result == ControlResult.HOLD:
-							self._modal_control = control
-						if result in (ControlResult.USED, ControlResult.HOLD):
-							used_control = control.text
-							self.call_control(control)
-							break
-
-				# Consolidated logging: only log control if it was used
-				if used_control:
-					print(f"[APP] Processed '{word.word}' on {screen_name} - {used_control}: USED", flush=True)
-				else:
-					print(f"[APP] Processed '{word.word}' on {screen_name}", flush=True)
+				self.process_word(word)
 
-				# Block if waiting for controls
-				while self.waiting_controls:
-					time.sleep(0.01)
+				# Block if waiting for controls, words spoken meanwhile
+				# stay queued in the word stream until we're done:
+				self.wait_for_controls()
 		except Exception as e:
 			print(f"Processing word stream failed with exception: {e}")
 	
-	def call_control(self, control: Control) -> None:
+	def wait_for_controls(self) -> None:
+		'''
+		Blocks until the client completes every control we are
+		waiting on, they are cancelled, or control_timeout passes
+		(in which case they are given up on and counted in
+		timed_out_round_trips).
+		'''
+		pending = self._get_pending_controls()
+		if not pending:
+			return
+
+		futures.wait([future for _, future in pending], timeout=self.control_timeout)
+		self._expire_controls(pending)
+	
+	def _get_pending_controls(self) -> List[Tuple[str, Future]]:
+		with self._pending_lock:
+			return list(self._pending_controls.items())
+	
+	def _expire_controls(self, pending: List[Tuple[str, Future]]) -> None:
+		'''Stops waiting on pending, giving up on (and counting) any that aren't done yet.'''
+		with self._pending_lock:
+			for control_id, future in pending:
+				if not future.done():
+					future.cancel()
+					self.timed_out_round_trips += 1
+					print(f"[APP] Timed out waiting on the client to complete '{control_id}' ({self.timed_out_round_trips} total)", flush=True)
+				if self._pending_controls.get(control_id) is future:
+					del self._pending_controls[control_id]
+	
+	def _advance_matcher(self, word: WordNode) -> List[PhraseMatch]:
+		'''
+		Feeds word to the phrase matcher of the screen that should
+		currently receive words, returning the phrases it completed.
+		
+		While a modal control holds the word stream we keep using
+		the matcher it was activated from so it's deactivate phrases
+		are still found if the screen changes underneath it.
+		'''
+		matcher = self._modal_matcher if self._modal_control else self.screen_stack.current.matcher
+		if matcher is not self._matcher:
+			self._matcher = matcher
+			# Keep enough words linked for this matcher's longest phrase:
+			self.word_stream.history.fit(matcher.max_phrase_length)
+			self._match_state = matcher.prime(word.prev)
+		self._match_state, matches = matcher.advance(self._match_state, word)
+		return matches
+	
+	def process_word(self, word: WordNode) -> None:
+		'''
+		Runs a single word through the current screen's controls.
+		'''
+		with self._word_lock:
+			self._process_word(word)
+	
+	def _process_word(self, word: WordNode) -> None:
+		# Notify global handlers
+		for handler in self.global_word_handlers:
+			handler(word.word)
+
+		# Process through current screen's controls
+		screen_name = type(self.screen_stack.current).__name__
+		used_control = None
+		triggered: Optional[Control] = None
+		corrected: Optional[Future] = None
+		speculated = self._follow_speculation(word) if self._speculation else None
+		self._last_word = word
+		matches = self._advance_matcher(word)
+
+		if speculated:
+			# Already triggered on the words before they were final:
+			used_control = f"{speculated.text} (speculatively)"
+		elif self._modal_control:
+			modal_control = self._modal_control
+			result = modal_control.validate_word(word, [m for m in matches if m.control is modal_control])
+			if result in (ControlResult.USED, ControlResult.HOLD):
+				used_control = modal_control.text
+				triggered = modal_control
+			if result == ControlResult.USED:
+				self._modal_control = None
+				self._modal_matcher = None
+				if self.word_stream.retranscriber and modal_control is self._dictation:
+					# Let the action have the large model's words for the end of what was said:
+					corrected = self.word_stream.retranscriber.flush()
+		elif matches:
+			# Only the controls with a phrase ending at this word need checking,
+			# matches are already ordered the same as the screen's controls:
+			candidates = [list(control_matches) for _, control_matches in groupby(matches, key=lambda m: id(m.control))]
+			if len(candidates) > 1:
+				# Prefer the closest match when several controls fire (stable, so ties keep screen order):
+				candidates.sort(key=lambda control_matches: min(m.cost for m in control_matches))
+			for control_matches in candidates:
+				control = control_matches[0].control
+				result = control.validate_word(word, control_matches)
+				if result == ControlResult.HOLD:
+					self._modal_control = control
+					self._modal_matcher = self._matcher
+					if isinstance(control, ModalControl):
+						self._dictation = control
+				if result in (ControlResult.USED, ControlResult.HOLD):
+					used_control = control.text
+					triggered = control
+					if control.wake:
+						self._learn_wake_phrase(word, min(control_matches, key=lambda m: m.cost))
+					break
+		
+		latency = self.latency.word_matched(word, time.time(), (triggered or speculated).id if triggered or speculated else None)
+		if triggered:
+			self._track_action(self.call_control(triggered, after=corrected), latency)
+
+		# Consolidated logging: only log control if it was used
+		if used_control:
+			print(f"[APP] Processed '{word.word}' on {screen_name} - {used_control}: USED", flush=True)
+		else:
+			print(f"[APP] Processed '{word.word}' on {screen_name}", flush=True)
+	
+	def _learn_wake_phrase(self, word: WordNode, match: PhraseMatch) -> None:
+		'''Has the word stream's wake spotter (if any) learn the wake phrase match ending at word, in the background.'''
+		wake_spotter = self.word_stream.wake_spotter
+		if not wake_spotter:
+			return
+		first = word
+		for _ in range(match.length - 1):
+			first = first.prev
+			if first is None:
+				return
+		if first.audio_start is not None and word.audio_end is not None:
+			# (Saving it is too slow to hold up the words)
+			wake_spotter.learn(first.audio_start, word.audio_end)
+	
+	def process_hypothesis(self, words: List[WordNode]) -> None:
+		'''
+		Hands words the transcription isn't sure of yet (that
+		follow the last final word) to be run through the current
+		screen's speculative controls (see _process_hypothesis).
+
+		They're called from the transcription's thread, which
+		every session shares, so this never waits on the session:
+		they're processed on our own thread (see call_soon) and
+		if hypotheses come faster than that only the latest is.
+		'''
+		with self._hypothesis_lock:
+			scheduled = self._hypothesis is not None
+			self._hypothesis = words
+		if not scheduled:
+			self.call_soon(self._process_latest_hypothesis)
+
+	def call_soon(self, callback: Callable[[], None]) -> None:
+		'''Calls callback on a thread of this application's, in the order they're given.'''
+		with self._hypothesis_lock:
+			if self._hypothesis_executor is None:
+				self._hypothesis_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hypotheses")
+		self._hypothesis_executor.submit(callback)
+
+	def _process_latest_hypothesis(self) -> None:
+		with self._hypothesis_lock:
+			words, self._hypothesis = self._hypothesis, None
+		if words is not None:
+			self._process_hypothesis(words)
+
+	def _process_hypothesis(self, words: List[WordNode]) -> None:
+		'''
+		Runs a hypothesis through the current screen's speculative
+		controls, triggering the first with a phrase of at least
+		speculation_min_words words they complete now rather than
+		once they're final.
+
+		Only one control is speculatively triggered at a time, so
+		the same hypothesis coming again doesn't trigger it again.
+		Once it's words are final it's either found in them (and
+		not triggered again) or undone, see _follow_speculation.
+		'''
+		with self._word_lock:
+			if self._speculation:
+				if time.time() - self._speculation.triggered < self.speculation_timeout:
+					return
+				self._undo_speculation("no final words came")
+			if self._modal_control or not words:
+				return
+
+			matcher = self.screen_stack.current.matcher
+			base = self.word_stream.history.last
+			base_state = matcher.prime(base)
+			state = base_state
+			previous = base
+			for i, word in enumerate(words):
+				# (Only linked back, the hypothesis isn't part of the stream)
+				word.prev = previous
+				previous = word
+				state, matches = matcher.advance(state, word)
+				control = next((
+					m.control for m in matches
+					if m.control.speculative and m.kind == PhraseKind.ACTIVATE and m.length >= self.speculation_min_words and not isinstance(m.control, ModalControl)
+				), None)
+				if control:
+					print(f"[APP] Speculatively triggered '{control.text}' on '{' '.join(w.word for w in words[:i + 1])}'", flush=True)
+					self._speculation = Speculation(control, matcher, base_state, base, i + 1, None, time.time(), started=base is None or base is self._last_word)
+					self._speculation.done = self.call_control(control)
+					return
+
+	def _follow_speculation(self, word: WordNode) -> Optional[Control]:
+		'''
+		Follows a final word with the speculatively triggered
+		control's matcher, returning the control if word completes
+		it's phrase (it's already been triggered), or undoing it
+		once there have been too many words for it to.
+		'''
+		speculation = self._speculation
+		if not speculation.started:
+			speculation.started = word is speculation.base
+			return None
+		if self._modal_control:
+			self._undo_speculation("it's words went to a modal control")
+			return None
+		speculation.seen += 1
+		speculation.state, matches = speculation.matcher.advance(speculation.state, word)
+		if any(m.control is speculation.control and m.kind == PhraseKind.ACTIVATE for m in matches):
+			self._speculation = None
+			lead = (time.time() - speculation.triggered) * 1000
+			self.latency.add("speculation_lead", lead)
+			print(f"[APP] '{speculation.control.text}' was said, triggered {lead:.0f}ms before it was final", flush=True)
+			return speculation.control
+		if speculation.seen >= speculation.length + self.speculation_slack:
+			self._undo_speculation("it wasn't said")
+		return None
+
+	def _undo_speculation(self, reason: str) -> None:
+		'''
+		Cancels the speculatively triggered control's action if it
+		hasn't run yet, or else undoes it (once it's done, and only
+		if it succeeded, see Control.undo).
+		'''
+		speculation, self._speculation = self._speculation, None
+		control = speculation.control
+		done = speculation.done
+		if done is not None and not control.js_getter_function and done.cancel():
+			print(f"[APP] Cancelled speculative '{control.text}', {reason}", flush=True)
+		elif control.undo:
+			def undo():
+				# (Actions run in order, so unless it's the client's it's finished by now)
+				if done is None or not done.done() or done.cancelled() or done.exception() is not None:
+					print(f"[APP] Not undoing speculative '{control.text}', it didn't finish", flush=True)
+					return
+				print(f"[APP] Undoing speculative '{control.text}', {reason}", flush=True)
+				control.call_undo(done.result())
+			self.control_executor.submit(undo, background=control.background)
+		else:
+			print(f"[APP] Speculative '{control.text}' ran but {reason} (it has no undo)", flush=True)
+
+	def _track_action(self, done: Optional[Future], latency: WordLatency) -> None:
+		'''Records when a triggered control's action is done (successfully).'''
+		def action_done(future: Optional[Future] = None):
+			if future is None or (not future.cancelled() and future.exception() is None):
+				self.latency.action_done(latency, time.time())
+		if done is None:
+			action_done()
+		else:
+			done.add_done_callback(action_done)
+	
+	def call_control(self, control: Control, after: Optional[Future] = None) -> Optional[Future]:
+		'''
+		Runs control, returning a future that's done once it's action is
+		(or once the client completes it), or None if it was done immediately.
+		
+		If after is given the action waits (off the word processing thread,
+		up to correction_timeout) for it first.
+		'''
 		screen = self.screen_stack.current
 		session = screen.session
 		if control.js_getter_function:
-			self.waiting_controls.add(control.id)
+			done = Future()
+			with self._pending_lock:
+				self._pending_controls[control.id] = done
 			push_event(ControlTriggerEvent(session_id=session.id, control_id=control.id))
+			return done
 		elif control.action:
-			return_type = inspect.signature(control.underlying_action).return_annotation
-			control_arg_name = control.get_action_control_arg()
-			if control_arg_name:
-				result = control.action(control)
-			else:
-				result = control.action()
-			if control.js_return_handler and (result is not None or return_type is not inspect._empty):
-				push_event(ControlReturnEvent(session_id=session.id, control_id=control.id, return_value=json.dumps(result)))
+			def run_action():
+				if after is not None:
+					futures.wait([after], timeout=self.correction_timeout)
+				return_type = inspect.signature(control.underlying_action).return_annotation
+				control_arg_name = control.get_action_control_arg()
+				if control_arg_name:
+					result = control.action(control)
+				else:
+					result = control.action()
+				if control.js_return_handler and (result is not None or return_type is not inspect._empty):
+					push_event(ControlReturnEvent(session_id=session.id, control_id=control.id, return_value=json.dumps(result)))
+				return result
+			return self.control_executor.submit(run_action, background=control.background or after is not None)
 		elif control.js_return_handler:
 			push_event(ControlReturnEvent(session_id=session.id, control_id=control.id, return_value=json.dumps({})))
+		return None
+	
+	def apply_correction(self, correction: 'Correction') -> None:
+		'''
+		Replaces the words the current (or last) modal control
+		collected with the better ones of correction, where they
+		overlap (see Retranscriber).
+		'''
+		with self._word_lock:
+			control = self._dictation
+			if control and control.apply_correction(correction):
+				print(f"[APP] Corrected '{control.text}': '{control.collected_words}'", flush=True)
 	
 	def notify_control_complete(self, control_id: str):
-		self.waiting_controls.discard(control_id)
+		with self._pending_lock:
+			future = self._pending_controls.pop(control_id, None)
+		if future and not future.done():
+			future.set_result(None)
+	
+	def cancel_waiting_controls(self) -> None:
+		'''
+		Stops waiting on the client for any controls, eg because
+		it disconnected and will never call them back.
+		'''
+		with self._pending_lock:
+			pending = list(self._pending_controls.values())
+			self._pending_controls.clear()
+		for future in pending:
+			# (Future.cancel doesn't wake futures.wait, so finish it with an error instead)
+			if not future.done():
+				future.set_exception(futures.CancelledError())
 	
 	def close(self):
 		self.word_stream.close()
@@ -91,3 +457,52 @@ class Application:
 	def add_global_word_handler(self, handler: Callable[[str], None]) -> None:
 		"""Add a handler that receives all words regardless of controls"""
 		self.global_word_handlers.append(handler)
+
+class AsyncApplication(Application):
+	"""
+	An Application that processes it's word stream as a task
+	on an event loop (shared by every session by default)
+	rather than on a thread of it's own, using
+	WordStream.aiter_words.
+	
+	Words are still processed one at a time, in order, but
+	many sessions can wait on their word streams (and on
+	their clients completing controls) without a thread each.
+	
+	Inline control actions run on the loop, so anything slow
+	should be a background control (see Control.background).
+	Hypotheses (see process_hypothesis) are processed on it too.
+	"""
+	def __init__(self, word_stream: WordStream, welcome_screen: Screen, control_timeout: float = 10.0, event_loop: Optional[EventLoopThread] = None):
+		self.event_loop = event_loop or shared_event_loop()
+		self.task: Optional[Future] = None
+		'''(Concurrent) future of the word processing task, done once the word stream ends.'''
+		super().__init__(word_stream, welcome_screen, control_timeout)
+	
+	def start(self) -> None:
+		'''Starts processing the word stream on event_loop.'''
+		self.task = self.event_loop.submit(self.arun())
+	
+	def call_soon(self, callback: Callable[[], None]) -> None:
+		'''Calls callback on event_loop.'''
+		self.event_loop.call_soon(callback)
+	
+	async def arun(self) -> None:
+		try:
+			print(f"[APP] AsyncApplication.arun() started, waiting for words...", flush=True)
+			async for word in self.word_stream.aiter_words():
+				self.process_word(word)
+
+				# Words spoken while we wait stay queued in the word stream:
+				await self.await_controls()
+		except Exception as e:
+			print(f"Processing word stream failed with exception: {e}")
+	
+	async def await_controls(self) -> None:
+		'''Like wait_for_controls, but without blocking the event loop.'''
+		pending = self._get_pending_controls()
+		if not pending:
+			return
+
+		await asyncio.wait([asyncio.wrap_future(future) for _, future in pending], timeout=self.control_timeout)
+		self._expire_controls(pending)
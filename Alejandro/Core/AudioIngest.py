@@ -0,0 +1,204 @@
+'''
+Streaming a recording's audio to a session over one binary
+WebSocket, rather than an HTTP request (or SocketIO event)
+per chunk.
+
+The session is looked up once when the socket connects
+(listening starting with it) and every chunk after goes
+straight to it's stream:
+
+	connect   /audio_stream?session_id=<id>&mime_type=audio/webm
+	server -> {"type": "ready", "next": 0}
+	client -> <4 byte big endian sequence number><audio> (binary), one per chunk from 0
+	server -> {"type": "ack", "seq": <last received>, "flow": "ok" | "slow" | "pause", "backlog": <bytes>}
+	client -> {"type": "stop"} (or just closing the socket) to stop listening
+	server -> {"type": "stopped", <the ingest's stats>}
+
+Acks come every ack_every chunks and whenever the flow
+changes. The flow is how far transcription has fallen behind
+the audio it's been given: "ok" to send chunks as they're
+recorded, "slow" to send them less often (batched together),
+and "pause" to hold them until it's "ok" again. Audio is
+never refused, so a client that ignores it loses nothing,
+it only makes the backlog worse.
+
+Sequence numbers let both ends tell what got through: a
+repeated chunk is ignored, and chunks skipped are counted
+(and their audio, being lost already, is not waited for).
+'''
+from typing import Any, Dict, List, Optional
+from collections import deque
+from flask import Response
+from simple_websocket import Server, ConnectionClosed
+import json
+import struct
+import time
+
+HEADER = struct.Struct("!I")
+'''A chunk's sequence number, before it's audio.'''
+
+class FlowControl:
+	'''
+	Which flow to ask for given the backlog (in bytes of audio
+	waiting to be transcribed): slow once it reaches slow_bytes
+	and pause once it reaches pause_bytes. Each only eases off
+	a step once it's fallen back under the threshold below it
+	(slow_bytes for pause, resume_bytes for slow) so it doesn't
+	flap.
+	'''
+	def __init__(self, slow_bytes: int = 256 * 1024, pause_bytes: int = 1024 * 1024, resume_bytes: int = 64 * 1024):
+		self.slow_bytes = slow_bytes
+		self.pause_bytes = pause_bytes
+		self.resume_bytes = resume_bytes
+		self.state = "ok"
+
+	def update(self, backlog: int) -> bool:
+		'''Updates state for backlog, returning whether it changed.'''
+		if backlog >= self.pause_bytes:
+			state = "pause"
+		elif backlog >= self.slow_bytes:
+			state = "pause" if self.state == "pause" else "slow"
+		elif backlog >= self.resume_bytes:
+			state = "ok" if self.state == "ok" else "slow"
+		else:
+			state = "ok"
+		if state == self.state:
+			return False
+		self.state = state
+		return True
+
+class AudioIngest:
+	'''
+	Hands one connection's chunks to stream (a
+	WhisperLiveKitWordStream, or anything with
+	_handle_audio_chunk and audio_backlog) in order, keeping
+	track of what's been received and how long each took.
+	'''
+	def __init__(self, stream: Any, flow: Optional[FlowControl] = None, ack_every: int = 10, poll_seconds: float = 0.25, window: int = 1000):
+		self.stream = stream
+		self.flow = flow or FlowControl()
+		self.ack_every = max(1, ack_every)
+		self.poll_seconds = poll_seconds
+		'''How often to check the flow while nothing's arriving (so a paused client hears when to resume).'''
+		self.next = 0
+		'''The sequence number expected next.'''
+		self.chunks = 0
+		self.bytes = 0
+		self.duplicates = 0
+		'''Chunks received again (ignored).'''
+		self.missing = 0
+		'''Chunks skipped over by the client.'''
+		self.flow_changes = 0
+		self.started = time.time()
+		self._overhead_ns: deque = deque(maxlen=window)
+
+	def ready(self) -> Dict[str, Any]:
+		return {"type": "ready", "next": self.next}
+
+	def receive(self, message: bytes) -> Optional[Dict[str, Any]]:
+		'''
+		Handles one binary message, returning what to reply
+		with (an ack) if anything.
+		'''
+		start = time.perf_counter_ns()
+		if len(message) < HEADER.size:
+			print(f"[INGEST] Ignoring a {len(message)} byte message without a sequence number", flush=True)
+			return None
+		seq, = HEADER.unpack_from(message)
+		if seq < self.next:
+			self.duplicates += 1
+			return None
+		if seq > self.next:
+			print(f"[INGEST] Chunks {self.next}-{seq - 1} never arrived", flush=True)
+			self.missing += seq - self.next
+		self.next = seq + 1
+
+		audio = message[HEADER.size:]
+		self.stream._handle_audio_chunk(audio)
+		self.chunks += 1
+		self.bytes += len(audio)
+
+		reply = self.poll()
+		if reply is None and self.chunks % self.ack_every == 0:
+			reply = self.ack()
+		self._overhead_ns.append(time.perf_counter_ns() - start)
+		return reply
+
+	def poll(self) -> Optional[Dict[str, Any]]:
+		'''An ack if the flow should change, None if it shouldn't.'''
+		if not self.flow.update(self.stream.audio_backlog):
+			return None
+		self.flow_changes += 1
+		print(f"[INGEST] Asking the client to {self.flow.state} (backlog {self.stream.audio_backlog} bytes)", flush=True)
+		return self.ack()
+
+	def ack(self) -> Dict[str, Any]:
+		return {"type": "ack", "seq": self.next - 1, "flow": self.flow.state, "backlog": self.stream.audio_backlog}
+
+	def stats(self) -> Dict[str, Any]:
+		'''What's been received, and the server's time handling each chunk (over the last window of them).'''
+		seconds = time.time() - self.started
+		overhead = sorted(self._overhead_ns)
+		def percentile(fraction: float) -> Optional[float]:
+			return round(overhead[min(len(overhead) - 1, int(len(overhead) * fraction))] / 1000, 1) if overhead else None
+		return {
+			"chunks": self.chunks,
+			"bytes": self.bytes,
+			"duplicates": self.duplicates,
+			"missing": self.missing,
+			"flow_changes": self.flow_changes,
+			"seconds": round(seconds, 3),
+			"chunks_per_second": round(self.chunks / seconds, 1) if seconds else None,
+			"overhead_p50_us": percentile(0.5),
+			"overhead_p99_us": percentile(0.99),
+		}
+
+def serve_audio_stream(environ: Dict[str, Any], stream: Any, mime_type: str, **ingest_args) -> Response:
+	'''
+	Accepts the WebSocket request environ is for and streams
+	it's audio to stream (listening from when it connects until
+	it's stopped or closes), returning the response the view
+	should return once it has.
+	'''
+	ws = Server.accept(environ)
+	ingest = AudioIngest(stream, **ingest_args)
+	stream._start_listening(mime_type)
+	try:
+		ws.send(json.dumps(ingest.ready()))
+		while True:
+			message = ws.receive(timeout=ingest.poll_seconds)
+			if message is None:
+				reply = ingest.poll()
+			elif isinstance(message, str):
+				if json.loads(message).get("type") == "stop":
+					break
+				continue
+			else:
+				reply = ingest.receive(message)
+			if reply:
+				ws.send(json.dumps(reply))
+	except ConnectionClosed:
+		pass
+	finally:
+		stream._stop_listening()
+		stats = ingest.stats()
+		print(f"[INGEST] Audio stream closed: {stats}", flush=True)
+
+	try:
+		ws.send(json.dumps({"type": "stopped", **stats}))
+		ws.close()
+	except ConnectionClosed:
+		pass
+	return _ClosedWebSocketResponse()
+
+class _ClosedWebSocketResponse(Response):
+	'''
+	What a WebSocket view returns once it's done, the socket
+	having already taken the connection over from the server
+	(so there's nothing left to send).
+	'''
+	def __call__(self, environ: Dict[str, Any], start_response: Any) -> List[bytes]:
+		if "werkzeug.socket" in environ:
+			# (Werkzeug's development server treats this as the client having gone, rather than sending a response)
+			raise ConnectionError()
+		return []
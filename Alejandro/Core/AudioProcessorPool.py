@@ -0,0 +1,85 @@
+'''
+A pool of ready to use audio processors, so starting to
+listen doesn't have to wait for one to be built.
+'''
+from typing import Awaitable, Callable, Deque, Generic, List, Optional, TypeVar
+from collections import deque
+from Alejandro.Core.EventLoop import EventLoopThread
+import asyncio
+
+T = TypeVar("T")
+
+class AudioProcessorPool(Generic[T]):
+	'''
+	Keeps size processors (made by calling create) ready on
+	loop, handing one out on acquire and making another in the
+	background to replace it.
+
+	Processors aren't returned to the pool, once one has
+	processed a recording it's done (WhisperLiveKit's
+	AudioProcessor can't be restarted after it's stopped), so
+	the pool is kept full with new ones instead.
+
+	With a size of 0 processors are only made when acquired.
+	'''
+	def __init__(self, create: Callable[[], Awaitable[T]], loop: EventLoopThread, size: int = 2):
+		self.create = create
+		self.loop = loop
+		self.size = size
+		self._ready: Deque[T] = deque()
+		self._creating = 0
+		self._waiters: Deque[asyncio.Future] = deque()
+
+	@property
+	def ready(self) -> int:
+		'''How many processors are ready to be acquired right now.'''
+		return len(self._ready)
+
+	def fill(self) -> None:
+		'''Starts making processors until there are size of them (from any thread).'''
+		self.loop.call_soon(self._fill)
+
+	def _fill(self) -> None:
+		while len(self._ready) + self._creating - len(self._waiters) < self.size:
+			self._creating += 1
+			self.loop.loop.create_task(self._create())
+
+	async def _create(self) -> None:
+		try:
+			processor = await self.create()
+		except Exception as e:
+			print(f"[POOL] Failed to create an audio processor: {e}", flush=True)
+			self._creating -= 1
+			self._fail_waiters(e)
+			return
+		self._creating -= 1
+		while self._waiters:
+			waiter = self._waiters.popleft()
+			if not waiter.done():
+				waiter.set_result(processor)
+				return
+		self._ready.append(processor)
+
+	def _fail_waiters(self, error: Exception) -> None:
+		# (Only as many as aren't still going to get one being made)
+		while len(self._waiters) > self._creating:
+			waiter = self._waiters.pop()
+			if not waiter.done():
+				waiter.set_exception(error)
+
+	async def acquire(self) -> T:
+		'''
+		A ready processor (or the next one made, if none are
+		ready), on loop. The pool is topped back up after.
+		'''
+		try:
+			if self._ready:
+				return self._ready.popleft()
+			waiter = self.loop.loop.create_future()
+			self._waiters.append(waiter)
+			if self._creating < len(self._waiters):
+				self._creating += 1
+				self.loop.loop.create_task(self._create())
+			return await waiter
+		finally:
+			self._fill()
@@ -1,9 +1,10 @@
-from typing import List, Callable, Optional, Dict, List, Any
+from typing import List, Callable, Optional, Dict, List, Any, Iterator, Tuple
 from enum import Enum
 from RequiredAI.json_dataclass import *
 from Alejandro.Core.WordNode import WordNode
-from Alejandro.Core.WordMapping import WORD_MAP
-from Alejandro.Core.WordStream import WordStream
+from Alejandro.Core.WordMapping import phrase_variants
+from Alejandro.Core.Tokenizer import tokenize
+from Alejandro.Core.PhraseMatcher import PhraseMatch, PhraseKind
 import functools
 import inspect
 
@@ -70,7 +71,89 @@ class Control:
 	js_return_handler: Optional[str] = field(default=None, kw_only=True)
 	'''Name of a js function that handles the return value of this control's action.'''
 	
+	max_fuzzy_cost: Optional[float] = field(default=None, kw_only=True)
+	'''
+	If set, this control's phrases also match when spoken
+	approximately ('alehandro' for 'alejandro'), as long as the
+	summed cost of the differing words (0 to 1 each, see FuzzyMatching)
+	is at most this. None only matches phrases exactly.
+	
+	Only applies when matching through a Screen's PhraseMatcher.
+	'''
+	
+	background: bool = field(default=False, kw_only=True)
+	'''
+	Whether action is slow (eg, LLM calls) and should run in the
+	background instead of holding up the word stream while it runs.
+	
+	Either way actions of a session run in the order they were
+	triggered (see ControlExecutor).
+	'''
+	
+	speculative: bool = field(default=False, kw_only=True)
+	'''
+	Whether action is safe to run before the words that trigger
+	it are final (eg navigation), so it can run as soon as the
+	transcription thinks they were said. If they turn out not
+	to have been, undo is called (if it hasn't run yet, it's
+	cancelled instead).
+	
+	Only for quick actions that don't mind being run again or
+	undone, and not modal controls. Only it's phrases of more
+	than one word (eg "go back" but not "back") are acted on
+	early, see Application.speculation_min_words.
+	'''
+	
+	undo: Optional[callable] = field(default=None, kw_only=True)
+	'''
+	Python function that undoes action, if it was run
+	speculatively on words that weren't said. It's only called
+	if action succeeded, and is given what action returned if
+	it takes an argument (eg the screen it navigated to, so it
+	can check that's still where we are, see call_undo).
+	'''
+	
+	wake: bool = field(default=False, kw_only=True)
+	'''
+	Whether this control wakes an idle session (eg "hey
+	alejandro"). While a screen has only wake controls, a
+	WakeSpotter listens for their phrases in place of the
+	transcription, handing over to it when it hears one, and
+	learns what they sound like whenever they're triggered.
+	'''
+	
 	_phrase_words: Dict[str, List[str]] = field(default_factory=dict, init=False, metadata=config(exclude=True))
+	_phrase_variants: Dict[str, List[Tuple[int, ...]]] = field(default_factory=dict, init=False, metadata=config(exclude=True))
+	
+	def phrases(self) -> Iterator[Tuple[str, PhraseKind]]:
+		'''
+		Every phrase this control responds to along with
+		what it means to the control when it is spoken.
+		'''
+		yield self.text, PhraseKind.ACTIVATE
+		for phrase in self.keyphrases:
+			yield phrase, PhraseKind.ACTIVATE
+	
+	def get_phrase_words(self, phrase: str) -> List[str]:
+		'''
+		Get the list of words that make up this phrase,
+		caching it if we didn't have it already.
+		'''
+		words = self._phrase_words.get(phrase)
+		if words is None:
+			words = self._phrase_words[phrase] = list(tokenize(phrase))
+		return words
+	
+	def get_phrase_variants(self, phrase: str) -> List[Tuple[int, ...]]:
+		'''
+		Get the word id sequences that count as saying this
+		phrase (see WordMapping.phrase_variants), caching them.
+		'''
+		variants = self._phrase_variants.get(phrase)
+		if variants is None:
+			words = self.get_phrase_words(phrase)
+			variants = self._phrase_variants[phrase] = phrase_variants(words) if words else []
+		return variants
 	
 	def _check_phrase(self, phrase: str, streams_current_word: WordNode) -> bool:
 		'''
@@ -80,37 +163,31 @@ class Control:
 		In other words, is streams_current_word the last word
 		in phrase?
 		'''
+		for variant in self.get_phrase_variants(phrase):
+			# Walk backwards through phrase's words in lock step with
+			# the word stream, starting at streams_current_word, looking to see
+			# if this phrase matches.
+			current = streams_current_word
+			for target_id in reversed(variant):
+				if not current or current.word_id != target_id:
+					break
+				current = current.prev
+			else:
+				return True
+		return False
+	
+	def _activated(self, streams_current_word: WordNode, matches: Optional[List[PhraseMatch]]) -> bool:
+		'''
+		Whether the button text or any keyphrase was just completed.
 		
-		# Get the list of words that make up this phrase, 
-		# and caching it if we didn't have it already:
-		if phrase not in self._phrase_words:
-			nodes = WordStream.process_text(phrase)
-			self._phrase_words[phrase] = [n.word for n in nodes]
-		words = self._phrase_words[phrase]
-		
-		# Walk backwards through phrase's words in lock step with
-		# the word stream, starting at streams_current_word, looking to see
-		# if this phrase matches.
-		current = streams_current_word
-		for target in reversed(words):
-			if not current:
-				return False
-				
-			target_word = target.lower()
-			current_word = current.word.lower()
-			
-			# Get equivalent forms for current word if it's in the map
-			if current_word in WORD_MAP:
-				# Look to see that at least 1 matches the target word:
-				if not any(target_word == form for form in WORD_MAP[current_word]):
-					return False
-			elif current_word != target_word:
-				return False
-				
-			current = current.prev
-		return True
-	
-	def validate_word(self, streams_current_word: WordNode) -> ControlResult:
+		Uses the matches reported by a PhraseMatcher if there
+		are any, otherwise walks the word stream for each phrase.
+		'''
+		if matches is not None:
+			return any(m.kind == PhraseKind.ACTIVATE for m in matches)
+		return self._check_phrase(self.text, streams_current_word) or any(self._check_phrase(phrase, streams_current_word) for phrase in self.keyphrases)
+	
+	def validate_word(self, streams_current_word: WordNode, matches: Optional[List[PhraseMatch]] = None) -> ControlResult:
 		"""
 		Check if this word completes any of our key phrases.
 		Returns ControlResult indicating if/how the word was used.
@@ -120,10 +197,14 @@ class Control:
 		whereas if hold is returned then this control will hold priority
 		access to the word stream until it returns Used or Unused for a
 		subsequent word.
+		
+		matches are the phrases of this control that a compiled
+		PhraseMatcher found ending at this word, if the caller
+		has one (see Screen.matcher).
 		"""
 		
 		# Check if word completes the button text or any keyphrase
-		if self._check_phrase(self.text, streams_current_word) or any(self._check_phrase(phrase, streams_current_word) for phrase in self.keyphrases):
+		if self._activated(streams_current_word, matches):
 			return ControlResult.USED
 			
 		return ControlResult.UNUSED
@@ -164,4 +245,12 @@ class Control:
 		if fallback and fallback.annotation is inspect._empty:
 			return "control"
 		
-		return None
\ No newline at end of file
+		return None
+	
+	def call_undo(self, result: Any) -> Any:
+		'''Calls undo, with result (what action returned) if it takes an argument.'''
+		takes_result = any(
+			p.default is inspect._empty and p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+			for p in inspect.signature(self.undo).parameters.values()
+		)
+		return self.undo(result) if takes_result else self.undo()
@@ -0,0 +1,88 @@
+from typing import Callable, Any, Deque, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+from threading import Lock
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = Lock()
+
+def _get_pool() -> ThreadPoolExecutor:
+	'''The thread pool shared by every session's ControlExecutor, created on first use.'''
+	global _pool
+	with _pool_lock:
+		if _pool is None:
+			_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="control_action")
+		return _pool
+
+class ControlExecutor:
+	'''
+	Runs the control actions of one session in the order
+	they were triggered, without the caller (usually the
+	word processing thread) having to wait on the slow ones.
+
+	Background actions are queued and run one at a time on a
+	thread pool shared by all sessions. Inline actions run
+	immediately on the calling thread, unless the session has
+	an action queued or running (inline on another thread too),
+	in which case they queue up behind it so an action always
+	runs after the previous one has finished.
+	'''
+	def __init__(self):
+		self._queue: Deque[Tuple[Future, Callable[[], Any]]] = deque()
+		self._lock = Lock()
+		self._running = False
+
+	@property
+	def busy(self) -> bool:
+		'''Whether an action is queued or running.'''
+		with self._lock:
+			return self._running
+
+	def submit(self, action: Callable[[], Any], background: bool = True) -> Future:
+		'''
+		Runs action after any action submitted before it,
+		returning a future of it's result.
+
+		If background is False and nothing is queued or running,
+		action is run (and the future completed) before this
+		returns.
+		'''
+		future = Future()
+		with self._lock:
+			if self._running or background:
+				self._queue.append((future, action))
+				if not self._running:
+					self._running = True
+					_get_pool().submit(self._drain)
+				return future
+			# (Anything submitted while it runs queues up behind it)
+			self._running = True
+
+		try:
+			self._run(future, action)
+		finally:
+			with self._lock:
+				queued = bool(self._queue)
+				self._running = queued
+			if queued:
+				_get_pool().submit(self._drain)
+		return future
+
+	def _run(self, future: Future, action: Callable[[], Any]) -> None:
+		if not future.set_running_or_notify_cancel():
+			return
+		try:
+			future.set_result(action())
+		except BaseException as e:
+			print(f"[CONTROL] Action failed with exception: {e}", flush=True)
+			future.set_exception(e)
+
+	def _drain(self) -> None:
+		'''Runs queued actions in order until there are none left.'''
+		while True:
+			with self._lock:
+				if not self._queue:
+					self._running = False
+					return
+				future, action = self._queue.popleft()
+			self._run(future, action)
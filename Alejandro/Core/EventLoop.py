@@ -0,0 +1,62 @@
+from typing import Optional, Coroutine, Any, Callable, Dict
+from concurrent.futures import Future
+from threading import Thread, Lock, Event
+import asyncio
+
+class EventLoopThread:
+	'''
+	An asyncio event loop running forever on it's own
+	(daemon) thread, for running coroutines from regular
+	threaded code.
+	'''
+	def __init__(self, name: str = "event_loop"):
+		self.name = name
+		self.loop = asyncio.new_event_loop()
+		self._started = Event()
+		self._thread = Thread(target=self._run, name=name, daemon=True)
+		self._thread.start()
+		self._started.wait()
+
+	def _run(self) -> None:
+		asyncio.set_event_loop(self.loop)
+		self.loop.call_soon(self._started.set)
+		try:
+			self.loop.run_forever()
+		finally:
+			self.loop.close()
+
+	@property
+	def running(self) -> bool:
+		return self._thread.is_alive() and not self.loop.is_closed()
+
+	def submit(self, coroutine: Coroutine) -> Future:
+		'''Schedules coroutine on the loop, returning a future of it's result.'''
+		return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+	def call_soon(self, callback: Callable[..., Any], *args: Any) -> None:
+		'''Calls callback on the loop's thread as soon as it can.'''
+		self.loop.call_soon_threadsafe(callback, *args)
+
+	def stop(self, timeout: Optional[float] = 1.0) -> None:
+		'''Stops the loop (abandoning anything still running on it) and waits for it's thread.'''
+		if self.running:
+			self.loop.call_soon_threadsafe(self.loop.stop)
+			self._thread.join(timeout)
+
+_shared: Dict[str, EventLoopThread] = {}
+_shared_lock = Lock()
+
+def shared_event_loop(name: str = "alejandro_event_loop") -> EventLoopThread:
+	'''
+	The event loop called name shared by every session of the
+	application, started on first use.
+
+	By default this is the one sessions process their words
+	on, other work that shouldn't hold that up (like
+	transcription) gets a loop of it's own.
+	'''
+	with _shared_lock:
+		loop = _shared.get(name)
+		if loop is None or not loop.running:
+			loop = _shared[name] = EventLoopThread(name)
+		return loop
@@ -1,8 +1,8 @@
 from typing import Optional, Iterator, Dict, List
-from .WordStream import WordStream, WordNode
+from .WordStream import QueuedWordStream, WordNode
+from .RecordingWriter import RecordingWriter
 from flask import Blueprint, jsonify, Response, request, Flask, render_template
 from flask_socketio import SocketIO
-from io import BufferedWriter
 from queue import Queue, Empty
 import subprocess
 from datetime import datetime, timedelta
@@ -22,7 +22,7 @@ mime_to_config = {
 	"audio/aac": ("aac", "adts", "aac"),
 }
 
-class FFmpegWordStream(WordStream):
+class FFmpegWordStream(QueuedWordStream):
 	bp = Blueprint('FFmpegWordStream', __name__)
 	socketio: SocketIO = SocketIO()#cors_allowed_origins="*")
 	streams:Dict[str, 'FFmpegWordStream'] = {}
@@ -33,6 +33,8 @@ class FFmpegWordStream(WordStream):
 		recordings and their transcriptions will be
 		stored in.
 		'''
+		super().__init__()
+		
 		# Setup a word stream for each session:
 		self.session_id = session_id
 		FFmpegWordStream.streams[session_id] = self
@@ -47,12 +49,10 @@ class FFmpegWordStream(WordStream):
 		'''Used only once to close the client session.'''
 		self.is_recording = False
 		'''Toggled on start_listening and stop_listening.'''
-		self.word_queue = Queue()
-		'''All words that we have transcribed but that have not yet been consumed by the 'words' iterator.'''
 		
 		# For saving & processing the current audio:
 		self.current_audio_path:str = None
-		self.current_audio_file:BufferedWriter = None
+		self.current_audio_file:Optional[RecordingWriter] = None
 		self.recording_process:subprocess.Popen[bytes] = None
 		self.start_time:datetime = None
 		self.end_time:datetime = None
@@ -61,7 +61,6 @@ class FFmpegWordStream(WordStream):
 		# using the local model inside ffmpeg so that they
 		# can be re-translated on another thread by a larger
 		# model:
-		self.last_node:WordNode = None
 		self.utterance_lock = threading.Lock()
 		self.current_utterance_start_ms: Optional[int] = None
 		self.current_utterance_end_ms: Optional[int] = None
@@ -85,27 +84,13 @@ class FFmpegWordStream(WordStream):
 		FFmpegWordStream.socketio.init_app(app)
 		app.register_blueprint(FFmpegWordStream.bp)
 	
-	def words(self) -> Iterator[WordNode]:
-		'''
-		Iterates all words produced by this live
-		transcription of the client's microphone.
-		
-		Words are in the form of a linked list with
-		time stamps to do rule based verbal UI control.
-		'''
-		while self._running:
-			try:
-				yield self.word_queue.get(block=True, timeout=0.5)
-			except Empty as e:
-				pass
-		return
-	
 	def close(self):
 		'''
 		Stops any 'self.words' iterator (or thread iterating it).
 		'''
 		self._stop_listening()
 		self._running = False
+		super().close()
 		del FFmpegWordStream.streams[self.session_id]
 	
 	def _start_listening(self, mime_type:str) -> None:
@@ -118,7 +103,7 @@ class FFmpegWordStream(WordStream):
 	
 		self.file_ext = mime_to_config.get(mime_type, ("webm", "matroska", "opus"))[0]
 		self.current_audio_path = os.path.join(self.save_directory, f"raw_recording_{timestamp}.{self.file_ext}")
-		self.current_audio_file = open(self.current_audio_path, "wb")
+		self.current_audio_file = RecordingWriter(self.current_audio_path)
 		input_format, input_codec = mime_to_config.get(mime_type, ("matroska", "opus"))[1:]
 
 		cmd = [
@@ -144,41 +129,33 @@ class FFmpegWordStream(WordStream):
 		'''
 		self.end_time = datetime.now()
 		
-		if self.current_audio_file:
-			self.current_audio_file.close()
-			
 		if self.recording_process:
 			if self.recording_process.stdin:
 				self.recording_process.stdin.close()
 			self.recording_process.send_signal(signal.SIGINT)
 			self.recording_process.wait()
 		
-		start_str = self.start_time.strftime("%Y%m%d_%H%M%S")
-		end_str = self.end_time.strftime("%Y%m%d_%H%M%S")
-		new_raw = os.path.join(self.save_directory, f"recording_{start_str}__{end_str}.{self.file_ext}")
-		os.rename(self.current_audio_path, new_raw)
+		# (Finished writing and renamed in the background)
+		if self.current_audio_file:
+			start_str = self.start_time.strftime("%Y%m%d_%H%M%S")
+			end_str = self.end_time.strftime("%Y%m%d_%H%M%S")
+			new_raw = os.path.join(self.save_directory, f"recording_{start_str}__{end_str}.{self.file_ext}")
+			self.current_audio_file.close(new_raw)
 		
 		self.is_recording = False
 	
 	def _handle_audio_chunk(self, data: bytes):
 		"""Append chunk to raw file and pipe to FFmpeg."""
-		if self.current_audio_file and not self.current_audio_file.closed:
-			self.current_audio_file.write(data)
-			self.current_audio_file.flush()
+		if self.current_audio_file:
+			try:
+				self.current_audio_file.write(data)
+			except (ValueError, OSError):
+				pass # (Stopped since we looked, or failed and already said so)
 
 		if self.recording_process and self.recording_process.poll() is None and self.recording_process.stdin:
 			self.recording_process.stdin.write(data)
 			self.recording_process.stdin.flush()
 	
-	def add_words_to_queue(self, word_nodes:List[WordNode]):
-		if word_nodes:
-			if word_nodes:
-				if self.last_node:
-					self.last_node.set_next(word_nodes[0])
-				self.last_node = word_nodes[-1]
-				for node in word_nodes:
-					self.word_queue.put(node)
-	
 	def _process_local_transcription(self, text:str, start:int, end:int):
 		word_nodes = self.process_text(text)
 		
@@ -275,15 +252,11 @@ class FFmpegWordStream(WordStream):
 					cleaned_text = cleaned_text.lstrip(string.punctuation)
 					print(word_text, word_start, word_end, cleaned_text)
 					
-					self.last_node = WordNode.join_returning_next(
-						prev=self.last_node,
-						next=WordNode(
-							cleaned_text,
-							recording_start_time + timedelta(seconds=word_start),
-							recording_start_time + timedelta(seconds=word_end),
-						)
-					)
-					self.word_queue.put(self.last_node)
+					self.add_words_to_queue([WordNode(
+						cleaned_text,
+						recording_start_time + timedelta(seconds=word_start),
+						recording_start_time + timedelta(seconds=word_end),
+					)])
 					
 				return transcription.text
 		except:
@@ -0,0 +1,260 @@
+'''
+Archiving WhisperLiveKit's results (FrontData) for later
+analysis.
+
+Results come several times a second, so rather than a file
+each, a FrontDataArchive appends them to gzipped JSON lines
+files (starting a new one when the last gets too big or too
+old). They're written on a background thread: write only
+queues a result, dropping (and counting) it if the writer
+has fallen too far behind, so archiving never holds up
+transcription.
+
+Each file starts with a header:
+
+	{"format": "alejandro_frontdata", "version": 1, "session": "<id>", "start": <epoch seconds>}
+
+followed by one compact array per result:
+
+	[<seconds since start>, {<FrontData.to_dict()>}]
+
+read_archive iterates the results of a file (or every file in
+a directory) in order, also from the command line:
+
+	python -m Alejandro.Core.FrontDataArchive WhisperLiveKitOutput > results.jsonl
+'''
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from dataclasses import dataclass
+from concurrent.futures import Future
+from queue import Queue, Full, Empty
+from threading import Thread, Lock
+from datetime import datetime
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import zlib
+
+FORMAT = "alejandro_frontdata"
+VERSION = 1
+SUFFIX = ".jsonl.gz"
+
+SAMPLING = ("all", "changed", "off")
+'''Which results an archive keeps: every one, only those that differ from the last, or none.'''
+
+class FrontDataArchive:
+	'''
+	Appends a session's results to rotating, gzipped JSON lines
+	files in directory, on the shared archive writer thread.
+
+	Only every every'th result is kept, and of those only the
+	ones sampling allows. A file is finished (and the next
+	started) once it holds max_bytes (uncompressed) or is
+	max_seconds old.
+	'''
+	def __init__(self, directory: str, session_id: Optional[str] = None, sampling: str = "changed", every: int = 1, max_bytes: int = 16 * 1024 * 1024, max_seconds: float = 3600.0, compresslevel: int = 6):
+		if sampling not in SAMPLING:
+			raise ValueError(f"sampling must be one of {SAMPLING}, not '{sampling}'")
+		self.directory = directory
+		self.session_id = session_id
+		self.sampling = sampling
+		self.every = max(1, every)
+		self.max_bytes = max_bytes
+		self.max_seconds = max_seconds
+		self.compresslevel = compresslevel
+
+		self.written = 0
+		'''Results written.'''
+		self.skipped = 0
+		'''Results left out by sampling.'''
+		self.dropped = 0
+		'''Results lost because the writer was too far behind.'''
+		self.paths: List[str] = []
+		'''Every file written to, in order.'''
+
+		self._offered = 0
+		self._closed = False
+		# (Only touched by the writer thread)
+		self._file: Optional[Any] = None
+		self._file_start = 0.0
+		self._file_bytes = 0
+		self._last: Optional[str] = None
+
+	def write(self, result: Any, when: Optional[float] = None) -> bool:
+		'''
+		Queues result (a FrontData, or anything with to_dict, or
+		a dict) to be archived as of when (default now), returning
+		whether it was. From any thread, without waiting.
+
+		result is only serialized on the writer thread, so it
+		shouldn't be changed after.
+		'''
+		if self._closed or self.sampling == "off":
+			return False
+		self._offered += 1
+		if (self._offered - 1) % self.every:
+			self.skipped += 1
+			return False
+		if not _get_writer().put((self, time.time() if when is None else when, result)):
+			self.dropped += 1
+			return False
+		return True
+
+	def close(self) -> Future:
+		'''
+		Finishes the archive once what's been queued is written,
+		returning a future that's done when it has been.
+		'''
+		self._closed = True
+		closed = Future()
+		_get_writer().put((self, closed, _CLOSE), block=True)
+		return closed
+
+	# On the writer thread:
+	def _write(self, when: float, result: Any) -> None:
+		data = result.to_dict() if hasattr(result, "to_dict") else result
+		encoded = json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+		if self.sampling == "changed" and encoded == self._last:
+			self.skipped += 1
+			return
+		self._last = encoded
+
+		if self._file is None or self._file_bytes >= self.max_bytes or when - self._file_start >= self.max_seconds:
+			self._rotate(when)
+		line = f"[{round(when - self._file_start, 3)},{encoded}]\n"
+		self._file.write(line)
+		self._file_bytes += len(line)
+		self.written += 1
+
+	def _rotate(self, when: float) -> None:
+		'''Finishes the current file (if any) and starts a new one at when.'''
+		self._close_file()
+		os.makedirs(self.directory, exist_ok=True)
+		stamp = datetime.fromtimestamp(when).strftime("%Y%m%d_%H%M%S_%f")[:-3]
+		session = f"_{self.session_id}" if self.session_id else ""
+		path = os.path.join(self.directory, f"frontdata_{stamp}{session}{SUFFIX}")
+		self._file = gzip.open(path, "at", encoding="utf-8", compresslevel=self.compresslevel)
+		self._file_start = when
+		self._file_bytes = 0
+		self._file.write(json.dumps({"format": FORMAT, "version": VERSION, "session": self.session_id, "start": when}) + "\n")
+		self.paths.append(path)
+
+	def _flush(self) -> None:
+		if self._file is not None:
+			self._file.flush()
+
+	def _close_file(self) -> None:
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+_CLOSE = object()
+
+class _ArchiveWriter:
+	'''
+	The thread writing every archive, fed through a bounded
+	queue, flushing what it's written every flush_seconds so
+	it can be read while it's still being written.
+	'''
+	def __init__(self, max_queued: int = 1000, flush_seconds: float = 1.0):
+		self.queue: Queue = Queue(maxsize=max_queued)
+		self.flush_seconds = flush_seconds
+		self._unflushed: Set[FrontDataArchive] = set()
+		Thread(target=self._run, name="frontdata_archive", daemon=True).start()
+
+	def put(self, item: Tuple[FrontDataArchive, Any, Any], block: bool = False) -> bool:
+		try:
+			self.queue.put(item, block=block)
+			return True
+		except Full:
+			return False
+
+	def _run(self) -> None:
+		last_flush = time.time()
+		while True:
+			try:
+				archive, when, result = self.queue.get(timeout=self.flush_seconds)
+				try:
+					if result is _CLOSE:
+						self._unflushed.discard(archive)
+						archive._close_file()
+						when.set_result(None)
+					else:
+						archive._write(when, result)
+						self._unflushed.add(archive)
+				except Exception as e:
+					print(f"[ARCHIVE] Failed to write to {archive.directory}: {e}", flush=True)
+					if result is _CLOSE and not when.done():
+						when.set_exception(e)
+			except Empty:
+				pass
+			if time.time() - last_flush >= self.flush_seconds:
+				for archive in self._unflushed:
+					try:
+						archive._flush()
+					except Exception as e:
+						print(f"[ARCHIVE] Failed to flush {archive.directory}: {e}", flush=True)
+				self._unflushed.clear()
+				last_flush = time.time()
+
+_writer: Optional[_ArchiveWriter] = None
+_writer_lock = Lock()
+
+def _get_writer() -> _ArchiveWriter:
+	'''The archive writer shared by every session, started on first use.'''
+	global _writer
+	with _writer_lock:
+		if _writer is None:
+			_writer = _ArchiveWriter()
+		return _writer
+
+@dataclass
+class ArchivedResult:
+	'''A result as it was archived.'''
+	time: float
+	'''Seconds since the epoch it was archived.'''
+	data: Dict[str, Any]
+	'''The result (FrontData.to_dict()).'''
+	session: Optional[str] = None
+
+def archive_files(path: str) -> List[str]:
+	'''The archive files at path (a file, or a directory of them) in the order they were started.'''
+	if not os.path.isdir(path):
+		return [path]
+	return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(SUFFIX)]
+
+def read_archive(path: str, session_id: Optional[str] = None) -> Iterator[ArchivedResult]:
+	'''
+	Iterates the archived results at path (a file or a directory
+	of them), optionally only session_id's. Files still being
+	written are read up to what's been flushed.
+	'''
+	for file_path in archive_files(path):
+		try:
+			with gzip.open(file_path, "rt", encoding="utf-8") as f:
+				header = json.loads(f.readline())
+				if header.get("format") != FORMAT:
+					raise ValueError(f"{file_path} is not a FrontData archive")
+				if session_id is not None and header.get("session") != session_id:
+					continue
+				for line in f:
+					try:
+						offset, data = json.loads(line)
+					except (json.JSONDecodeError, ValueError):
+						break # Partially written last line
+					yield ArchivedResult(header["start"] + offset, data, header.get("session"))
+		except (EOFError, zlib.error, gzip.BadGzipFile):
+			continue # Cut off (still being written, or the server stopped)
+
+def main(argv: Optional[List[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description="Prints archived WhisperLiveKit results as JSON lines of {time, session, result}.")
+	parser.add_argument("path", help="An archive file, or a directory of them (eg WhisperLiveKitOutput)")
+	parser.add_argument("--session", help="Only this session's results")
+	args = parser.parse_args(argv)
+	for result in read_archive(args.path, args.session):
+		sys.stdout.write(json.dumps({"time": result.time, "session": result.session, "result": result.data}, ensure_ascii=False) + "\n")
+
+if __name__ == "__main__":
+	main()
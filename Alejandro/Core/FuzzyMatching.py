@@ -0,0 +1,213 @@
+from typing import List, Dict, Tuple, Optional, Iterator, TYPE_CHECKING
+from dataclasses import replace
+from Alejandro.Core.WordNode import WordNode
+
+if TYPE_CHECKING:
+	from Alejandro.Core.PhraseMatcher import PhraseMatch
+
+PHONETIC_COST = 0.25
+'''Cost of a word that sounds the same (same phonetic key) as a phrase word but is spelled differently.'''
+
+MIN_FUZZY_LENGTH = 3
+'''Words shorter than this are only ever matched exactly.'''
+
+def levenshtein(a: str, b: str) -> int:
+	'''Edit distance between a and b.'''
+	if len(a) < len(b):
+		a, b = b, a
+	previous = list(range(len(b) + 1))
+	for i, ca in enumerate(a, 1):
+		current = [i]
+		for j, cb in enumerate(b, 1):
+			current.append(min(
+				previous[j] + 1,
+				current[j-1] + 1,
+				previous[j-1] + (ca != cb)
+			))
+		previous = current
+	return previous[-1]
+
+_PHONETIC_PREFIXES = [("kn", "n"), ("gn", "n"), ("wr", "r"), ("ps", "s"), ("pn", "n")]
+_PHONETIC_REPLACEMENTS = [("ph", "f"), ("ck", "k"), ("gh", "h"), ("sch", "sk"), ("th", "0")]
+_PHONETIC_CLASSES = {}
+for letters, code in [("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6"), ("0", "7")]:
+	for letter in letters:
+		_PHONETIC_CLASSES[letter] = code
+
+def phonetic_key(word: str) -> str:
+	'''
+	A rough (soundex like) key of how a word sounds.
+
+	Words that sound alike such as 'night' and 'knight'
+	or 'phone' and 'fone' get the same key.
+	'''
+	word = word.lower()
+	for prefix, replacement in _PHONETIC_PREFIXES:
+		if word.startswith(prefix):
+			word = replacement + word[len(prefix):]
+			break
+	for pattern, replacement in _PHONETIC_REPLACEMENTS:
+		word = word.replace(pattern, replacement)
+
+	key = []
+	last = None
+	for letter in word:
+		code = _PHONETIC_CLASSES.get(letter)
+		if code != last and code is not None:
+			key.append(code)
+		# h & w don't separate repeated consonants, vowels do:
+		if letter not in "hw":
+			last = code
+	return "".join(key)
+
+class BKTree:
+	'''
+	Burkhard-Keller tree of words under edit distance, letting
+	us find every word within some distance of another without
+	comparing it to the whole vocabulary.
+	'''
+	def __init__(self, words: Iterator[str] = ()):
+		self._root: Optional[Tuple[str, Dict[int, tuple]]] = None
+		for word in words:
+			self.add(word)
+
+	def add(self, word: str) -> None:
+		if self._root is None:
+			self._root = (word, {})
+			return
+		node = self._root
+		while True:
+			distance = levenshtein(word, node[0])
+			if distance == 0:
+				return
+			child = node[1].get(distance)
+			if child is None:
+				node[1][distance] = (word, {})
+				return
+			node = child
+
+	def search(self, word: str, radius: int) -> List[Tuple[str, int]]:
+		'''Every word in the tree within radius edits of word, with it's distance.'''
+		found = []
+		if self._root is None:
+			return found
+		stack = [self._root]
+		while stack:
+			node_word, children = stack.pop()
+			distance = levenshtein(word, node_word)
+			if distance <= radius:
+				found.append((node_word, distance))
+			for child_distance, child in children.items():
+				if distance - radius <= child_distance <= distance + radius:
+					stack.append(child)
+		return found
+
+class FuzzyVocabulary:
+	'''
+	Index of the words of a set of phrases that finds which of
+	them a (mis)transcribed word could have been meant as, and
+	at what cost.
+
+	Costs are the edit distance normalized by word length, or
+	PHONETIC_COST if the words sound alike, so 0 is exact and
+	1 is nothing alike.
+	'''
+	def __init__(self, words: Dict[int, str], max_cost: float):
+		self.max_cost = max_cost
+		self._ids: Dict[str, int] = {text: word_id for word_id, text in words.items()}
+		self._tree = BKTree(self._ids.keys())
+		self._phonetic: Dict[str, List[str]] = {}
+		for text in self._ids:
+			self._phonetic.setdefault(phonetic_key(text), []).append(text)
+		self._cache: Dict[int, List[Tuple[int, float]]] = {}
+
+	def candidates(self, word: WordNode) -> List[Tuple[int, float]]:
+		'''
+		The vocabulary word ids word could stand for and the
+		cost of taking it as each, cached by word id.
+		'''
+		candidates = self._cache.get(word.word_id)
+		if candidates is None:
+			candidates = self._find(word)
+			if len(self._cache) > 10000:
+				self._cache.clear()
+			self._cache[word.word_id] = candidates
+		return candidates
+
+	def _find(self, word: WordNode) -> List[Tuple[int, float]]:
+		costs: Dict[int, float] = {word.word_id: 0.0}
+
+		text = word.word.lower()
+		if len(text) >= MIN_FUZZY_LENGTH and not text.isdigit():
+			radius = int(self.max_cost * len(text))
+			if radius:
+				for match, distance in self._tree.search(text, radius):
+					cost = distance / max(len(text), len(match))
+					if cost <= self.max_cost:
+						match_id = self._ids[match]
+						costs[match_id] = min(costs.get(match_id, 1.0), cost)
+			for match in self._phonetic.get(phonetic_key(text), []):
+				match_id = self._ids[match]
+				costs[match_id] = min(costs.get(match_id, 1.0), PHONETIC_COST)
+		return [(match_id, cost) for match_id, cost in costs.items() if cost <= self.max_cost]
+
+class _TrieNode:
+	__slots__ = ("children", "patterns", "max_cost")
+	def __init__(self):
+		self.children: Dict[int, '_TrieNode'] = {}
+		self.patterns: List[Tuple['PhraseMatch', float]] = []
+		self.max_cost = 0.0
+
+class FuzzyPhraseIndex:
+	'''
+	Finds phrases that were approximately just spoken.
+
+	Phrases are stored in a trie by their words in reverse,
+	which is walked backwards from the current word through the
+	word stream following every vocabulary word each spoken word
+	could have been, pruning any branch whose summed cost exceeds
+	the most any phrase below it allows. The cost of a word is
+	bounded by the phrase length and the (few) candidates each
+	word has, not the number of phrases.
+	'''
+	def __init__(self, patterns: List[Tuple['PhraseMatch', Tuple[int, ...], float]], words: Dict[int, str]):
+		'''
+		patterns are (match to report, word ids of phrase, max cost of phrase),
+		words the text of each word id that should be fuzzy matched.
+		'''
+		self._root = _TrieNode()
+		max_cost = 0.0
+		for match, ids, pattern_max_cost in patterns:
+			node = self._root
+			for word_id in reversed(ids):
+				node = node.children.setdefault(word_id, _TrieNode())
+				node.max_cost = max(node.max_cost, pattern_max_cost)
+			node.patterns.append((match, pattern_max_cost))
+			max_cost = max(max_cost, pattern_max_cost)
+		self.vocabulary = FuzzyVocabulary(words, max_cost)
+
+	def find(self, word: WordNode) -> List['PhraseMatch']:
+		'''
+		Every phrase that ends at word with a cost within it's
+		limit (exact matches excluded), with the lowest cost found.
+		'''
+		best: Dict[int, 'PhraseMatch'] = {}
+		stack = [(self._root, word, 0.0)]
+		while stack:
+			node, current, cost = stack.pop()
+			if current is None:
+				continue
+			for candidate, word_cost in self.vocabulary.candidates(current):
+				child = node.children.get(candidate)
+				if child is None:
+					continue
+				total = cost + word_cost
+				if total > child.max_cost:
+					continue
+				for match, max_cost in child.patterns:
+					if 0 < total <= max_cost:
+						previous = best.get(id(match))
+						if previous is None or total < previous.cost:
+							best[id(match)] = replace(match, cost=total)
+				stack.append((child, current.prev, total))
+		return list(best.values())
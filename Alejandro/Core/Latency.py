@@ -0,0 +1,142 @@
+'''
+Tracking where the time goes between someone finishing
+speaking a command and it's action being done.
+
+Every word carries when it was spoken & when it's audio
+arrived (if it was transcribed from audio) and when it was
+finalized (see WordNode), the Application adds when it was
+matched against the controls and, for words that triggered
+a control, when the control's action was done:
+
+	speech end -> arrived -> finalized -> matched -> action done
+
+LatencyTracker keeps a window of recent words and the
+percentiles of each of those stages, along with any other
+durations worth watching (like how long it takes to hear
+the first word after starting to listen).
+'''
+from typing import Optional, Dict, List, Deque, Any
+from dataclasses import dataclass
+from collections import deque
+from bisect import bisect_left
+from threading import Lock
+from Alejandro.Core.WordNode import WordNode
+
+@dataclass
+class WordLatency:
+	'''When (seconds since the epoch) a word got through each stage.'''
+	word: str
+	speech_end: float
+	arrived: Optional[float] = None
+	finalized: Optional[float] = None
+	matched: Optional[float] = None
+	control_id: Optional[str] = None
+	'''Id of the control the word triggered, if any.'''
+	action_done: Optional[float] = None
+
+	@staticmethod
+	def from_word(word: WordNode, matched: float, control_id: Optional[str] = None) -> 'WordLatency':
+		return WordLatency(word.word, word.end, word.arrived, word.finalized, matched, control_id)
+
+	def stages(self) -> Dict[str, float]:
+		'''Milliseconds spent in each stage we have both ends of.'''
+		stages = {}
+		def stage(name: str, start: Optional[float], end: Optional[float]):
+			if start is not None and end is not None:
+				stages[name] = (end - start) * 1000
+		stage("upload", self.speech_end, self.arrived)
+		stage("transcribe", self.arrived, self.finalized)
+		stage("match", self.finalized, self.matched)
+		stage("action", self.matched, self.action_done)
+		stage("total", self.speech_end, self.action_done)
+		return stages
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+	return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+class LatencyTracker:
+	'''Keeps the latencies of the last window words (and the last window triggered controls).'''
+	def __init__(self, window: int = 1000):
+		self.window = window
+		self.words: Deque[WordLatency] = deque(maxlen=window)
+		self.controls: Deque[WordLatency] = deque(maxlen=window)
+		self.samples: Dict[str, Deque[float]] = {}
+		'''The last window of each other duration (in milliseconds) by name, see add.'''
+		self._lock = Lock()
+
+	def add(self, name: str, ms: float) -> None:
+		'''Records a duration (in milliseconds) other than a word's stages.'''
+		with self._lock:
+			self.samples.setdefault(name, deque(maxlen=self.window)).append(ms)
+
+	def word_matched(self, word: WordNode, matched: float, control_id: Optional[str] = None) -> WordLatency:
+		'''Records that word was matched (triggering control_id, if given).'''
+		latency = WordLatency.from_word(word, matched, control_id)
+		with self._lock:
+			self.words.append(latency)
+		return latency
+
+	def action_done(self, latency: WordLatency, done: float) -> None:
+		'''Records that the control triggered by a word finished it's action.'''
+		latency.action_done = done
+		with self._lock:
+			self.controls.append(latency)
+		stages = latency.stages()
+		print(f"[LATENCY] '{latency.word}' -> {latency.control_id}: " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in stages.items()), flush=True)
+
+	def summary(self) -> Dict[str, Any]:
+		'''The count, p50 & p99 (in milliseconds) of each stage (and other duration) over the window.'''
+		with self._lock:
+			# (Controls outlive their words in the window, so may be in both)
+			records = {id(latency): latency for latency in (*self.words, *self.controls)}.values()
+			durations: Dict[str, List[float]] = {name: list(samples) for name, samples in self.samples.items()}
+		for latency in records:
+			for name, ms in latency.stages().items():
+				durations.setdefault(name, []).append(ms)
+
+		summary = {}
+		for name, values in durations.items():
+			values.sort()
+			summary[name] = {
+				"count": len(values),
+				"p50_ms": round(_percentile(values, 0.5), 1),
+				"p99_ms": round(_percentile(values, 0.99), 1),
+			}
+		return summary
+
+class ChunkArrivals:
+	'''
+	When each chunk of a recording's audio arrived, so we can
+	tell when the audio for a point in the recording got here.
+
+	Chunks are either given the number of seconds of audio
+	received so far, or (for compressed audio we can't measure
+	without decoding) it is estimated assuming the recording
+	was streamed in real time from origin.
+	'''
+	def __init__(self, origin: float):
+		self.origin = origin
+		'''Time (since the epoch) the recording started.'''
+		self._audio_ends: List[float] = []
+		self._arrivals: List[float] = []
+
+	def add(self, arrived: float, audio_end: Optional[float] = None) -> None:
+		'''Records a chunk that arrived at arrived, ending audio_end seconds into the recording.'''
+		if audio_end is None:
+			audio_end = arrived - self.origin
+		self._audio_ends.append(audio_end)
+		self._arrivals.append(arrived)
+
+	def arrival_of(self, audio_time: float) -> Optional[float]:
+		'''When the chunk holding the audio at audio_time (seconds into the recording) arrived.'''
+		if not self._arrivals:
+			return None
+		i = bisect_left(self._audio_ends, audio_time)
+		return self._arrivals[min(i, len(self._arrivals) - 1)]
+
+	def forget_before(self, audio_time: float) -> None:
+		'''Drops chunks that end before audio_time, once nothing earlier will be looked up.'''
+		i = bisect_left(self._audio_ends, audio_time)
+		if i > 0:
+			del self._audio_ends[:i]
+			del self._arrivals[:i]
@@ -0,0 +1,189 @@
+'''
+Following WhisperLiveKit's transcript of a recording as it
+grows, doing work for what changed rather than all of it.
+
+Every result (FrontData) has every line of the recording so
+far, so joining and comparing them all costs more the longer
+a recording goes on. But lines are committed text: only the
+last one is still being added to (what WhisperLiveKit hasn't
+decided on yet is in it's buffer, after them), and each new
+one is started after it. So a LiveTranscript keeps the lines
+it's already seen and only reads a result's lines from the
+last one it knows of onward, finding what (if anything)
+changed from those and the buffer.
+
+Characters are counted the way transcript_spans joins lines
+(blank ones skipped, the rest joined with a space, the buffer
+after them), so offsets into a LiveTranscript can be given
+to timed_words.
+
+The buffer is only a hypothesis, AdaptiveStability learns how
+long one has to go unchanged before it's (probably) final.
+'''
+from typing import Any, Deque, List, NamedTuple, Optional, Sequence
+from collections import deque
+from bisect import bisect_left, bisect_right
+from os.path import commonprefix
+from Alejandro.Core.TranscriptTiming import TimedSpan, audio_seconds, line_spans
+
+class TranscriptLine(NamedTuple):
+	'''A (non blank) line of a transcript, the source'th of the results' lines, starting offset characters in.'''
+	source: int
+	offset: int
+	text: str
+	start: Optional[float]
+	spans: List[TimedSpan]
+
+	@property
+	def last(self) -> int:
+		'''The offset just after the line.'''
+		return self.offset + len(self.text)
+
+class LiveTranscript:
+	'''
+	The transcript of a recording, made of the lines (and
+	buffer) of WhisperLiveKit's results as they're given to
+	update.
+	'''
+	def __init__(self):
+		self.lines: List[TranscriptLine] = []
+		self.buffer = ""
+		'''The (stripped) text WhisperLiveKit hasn't committed to yet.'''
+		self._offsets: List[int] = []
+		'''Where each line starts, to find lines by offset.'''
+
+	@property
+	def committed(self) -> int:
+		'''How many characters are committed (the lines), the buffer starting after them.'''
+		return self.lines[-1].last if self.lines else 0
+
+	def __len__(self) -> int:
+		if not self.buffer:
+			return self.committed
+		return self.committed + len(self.buffer) + (1 if self.lines else 0)
+
+	def update(self, lines: Sequence[Any], buffer: str = "") -> Optional[int]:
+		'''
+		Follows the transcript to a result's lines and buffer,
+		returning the offset of the first character that changed
+		(or None if nothing did, even if some of the buffer has
+		been committed).
+
+		Lines before the last one we knew of are kept if the
+		one just before it is still the same, only when that
+		isn't (eg a speaker was re-assigned) do we look further
+		back for where they differ.
+		'''
+		keep = len(self.lines) - 1
+		while keep > 0 and not self._unchanged(self.lines[keep - 1], lines):
+			keep -= 1
+		keep = max(keep, 0)
+
+		# Read the rest of the lines (the last we knew of and any after it):
+		read: List[TranscriptLine] = []
+		source = self.lines[keep - 1].source + 1 if keep else 0
+		offset = self.lines[keep - 1].last + 1 if keep else 0
+		for source in range(source, len(lines)):
+			text, spans = line_spans(lines[source], offset)
+			if not text:
+				continue
+			read.append(TranscriptLine(source, offset, text, audio_seconds(getattr(lines[source], "start", None)), spans))
+			offset += len(text) + 1
+
+		changed = self._first_change(self.lines[keep:], read, self.committed)
+		first = self.committed if changed is None else changed
+		before = self.text(first)
+		del self.lines[keep:]
+		del self._offsets[keep:]
+		self.lines.extend(read)
+		self._offsets.extend(line.offset for line in read)
+		self.buffer = buffer.strip()
+
+		# (Committed or not, what changed is where the text differs)
+		after = self.text(first)
+		if before == after:
+			return None
+		return first + len(commonprefix([before, after]))
+
+	@staticmethod
+	def _unchanged(line: TranscriptLine, lines: Sequence[Any]) -> bool:
+		'''Whether line is still the same in a result's lines.'''
+		if line.source >= len(lines):
+			return False
+		now = lines[line.source]
+		return (getattr(now, "text", None) or "").strip() == line.text and audio_seconds(getattr(now, "start", None)) == line.start
+
+	@staticmethod
+	def _first_change(before: List[TranscriptLine], after: List[TranscriptLine], length: int) -> Optional[int]:
+		'''The offset of the first character that differs between lines before and after (length being the committed text's before).'''
+		for old, new in zip(before, after):
+			if old.offset != new.offset:
+				return min(old.offset, new.offset)
+			if old.text != new.text:
+				return new.offset + len(commonprefix([old.text, new.text]))
+		if len(before) > len(after):
+			return after[-1].last if after else (before[0].offset - 1 if before[0].offset else 0)
+		if len(after) > len(before):
+			return length
+		return None
+
+	def text(self, first: int = 0, last: Optional[int] = None) -> str:
+		'''Characters first to last (or the end) of the transcript.'''
+		last = len(self) if last is None else min(last, len(self))
+		if first >= last:
+			return ""
+		i = max(bisect_right(self._offsets, first) - 1, 0)
+		j = bisect_left(self._offsets, last)
+		texts = [line.text for line in self.lines[i:j]]
+		if self.buffer and last > self.committed:
+			texts.append(self.buffer)
+		base = self.lines[i].offset if self.lines else 0
+		return " ".join(texts)[first - base:last - base]
+
+	def spans(self, first: int = 0, last: Optional[int] = None) -> List[TimedSpan]:
+		'''The timed spans of the lines covering characters first to last (or the end), the buffer has none.'''
+		last = len(self) if last is None else last
+		i = max(bisect_right(self._offsets, first) - 1, 0)
+		j = bisect_left(self._offsets, last)
+		return [span for line in self.lines[i:j] for span in line.spans]
+
+class AdaptiveStability:
+	'''
+	How long a hypothesis (WhisperLiveKit's buffer) has to go
+	unchanged before we take it as final, learnt from how long
+	this speaker's hypotheses went unchanged before they were
+	revised.
+
+	Each hypothesis is either kept (extended, or committed as
+	it was) or revised after being shown for some age. The
+	threshold is the quantile of those ages (kept ones counting
+	as 0) times margin, between minimum and maximum. So someone
+	whose hypotheses are rarely revised gets their last words
+	sooner, and someone whose hypotheses often change late has
+	them held longer.
+	'''
+	def __init__(self, initial: float = 0.5, minimum: float = 0.15, maximum: float = 1.5, quantile: float = 0.9, margin: float = 1.2, window: int = 100, warm_up: int = 10):
+		self.initial = initial
+		'''Seconds to wait until there have been warm_up hypotheses to learn from.'''
+		self.minimum = minimum
+		self.maximum = maximum
+		self.quantile = quantile
+		self.margin = margin
+		self.warm_up = warm_up
+		self.ages: Deque[float] = deque(maxlen=window)
+		'''How long each of the last window hypotheses went unchanged before being revised (0 if kept).'''
+
+	def kept(self) -> None:
+		self.ages.append(0.0)
+
+	def revised(self, age: float) -> None:
+		self.ages.append(age)
+
+	@property
+	def seconds(self) -> float:
+		'''How long to wait for the current hypothesis to change before finalizing it.'''
+		if len(self.ages) < self.warm_up:
+			return self.initial
+		ages = sorted(self.ages)
+		age = ages[min(len(ages) - 1, int(self.quantile * len(ages)))]
+		return min(self.maximum, max(self.minimum, age * self.margin))
@@ -1,8 +1,11 @@
-from typing import List, Callable, Optional
+from typing import List, Callable, Optional, Iterator, Tuple, TYPE_CHECKING
 from enum import Enum, auto
 from Alejandro.Core.Control import Control, ControlResult
+from Alejandro.Core.PhraseMatcher import PhraseMatch, PhraseKind
 from Alejandro.Core.WordNode import WordNode
 from RequiredAI.json_dataclass import *
+if TYPE_CHECKING:
+	from Alejandro.Core.Retranscriber import Correction
 
 class ModalState(Enum):
 	"""State of a modal control"""
@@ -36,27 +39,67 @@ class ModalControl(Control):
 		"""
 		return " ".join([w.word for w in self._collected_words])
 		
-	def validate_word(self, word_node: WordNode) -> ControlResult:
+	def apply_correction(self, correction: 'Correction', tolerance: float = 0.1) -> bool:
+		'''
+		Replaces the collected words spoken during correction with
+		it's words (those spoken between the first and last word
+		replaced, give or take tolerance seconds), returning if any
+		were replaced.
+		
+		Words are matched up by when they were spoken (the middle
+		of each), so words without audio times are left alone.
+		'''
+		def middle(word: WordNode) -> float:
+			return (word.start + word.end) / 2
+		replaced = [i for i, word in enumerate(self._collected_words) if word.audio_start is not None and correction.start <= middle(word) <= correction.end]
+		if not replaced:
+			return False
+		first, last = replaced[0], replaced[-1]
+		start = self._collected_words[first].start - tolerance
+		end = self._collected_words[last].end + tolerance
+		self._collected_words[first:last + 1] = [word for word in correction.words if start <= middle(word) <= end]
+		return True
+	
+	def phrases(self) -> Iterator[Tuple[str, PhraseKind]]:
+		yield from super().phrases()
+		for phrase in self.deactivate_phrases:
+			yield phrase, PhraseKind.DEACTIVATE
+	
+	def _deactivation_length(self, word_node: WordNode, matches: Optional[List[PhraseMatch]]) -> Optional[int]:
+		'''
+		Number of words in the deactivate phrase that was just
+		completed, or None if no deactivate phrase was.
+		'''
+		if matches is not None:
+			deactivations = [m for m in matches if m.kind == PhraseKind.DEACTIVATE]
+			if deactivations:
+				return min(deactivations, key=lambda m: m.cost).length
+			return None
+		for phrase in self.deactivate_phrases:
+			if self._check_phrase(phrase, word_node):
+				return len(self.get_phrase_words(phrase))
+		return None
+		
+	def validate_word(self, word_node: WordNode, matches: Optional[List[PhraseMatch]] = None) -> ControlResult:
 		"""Handle state transitions and word collection based on phrases"""
 		if self._state == ModalState.HOLDING:
 			# append any words since we started holding control of the word stream:
 			self._collected_words.append(word_node)
 			
-			for phrase in self.deactivate_phrases:
-				if self._check_phrase(phrase, word_node):
-					# Stop holding the word stream
-					self._state = ModalState.INACTIVE
-					
-					# Collect just the words that are not part of the end phrase (or start phrase):
-					phrase_len = len(self._phrase_words[phrase])
-					self._collected_words = self._collected_words[:-phrase_len]
-					return ControlResult.USED
+			phrase_len = self._deactivation_length(word_node, matches)
+			if phrase_len is not None:
+				# Stop holding the word stream
+				self._state = ModalState.INACTIVE
+				
+				# Collect just the words that are not part of the end phrase (or start phrase):
+				self._collected_words = self._collected_words[:-phrase_len]
+				return ControlResult.USED
 			return ControlResult.HOLD
 		
 		# Check activation phrases when inactive
-		if self._check_phrase(self.text, word_node) or any(self._check_phrase(phrase, word_node) for phrase in self.keyphrases):
+		if self._activated(word_node, matches):
 			self._state = ModalState.HOLDING
 			self._collected_words = []
 			return ControlResult.HOLD
 		
-		return ControlResult.UNUSED
\ No newline at end of file
+		return ControlResult.UNUSED
@@ -0,0 +1,149 @@
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
+from dataclasses import dataclass
+from collections import deque
+from enum import Enum, auto
+from Alejandro.Core.WordNode import WordNode
+from Alejandro.Core.WordMapping import word_id as get_word_id
+from Alejandro.Core.FuzzyMatching import FuzzyPhraseIndex
+
+if TYPE_CHECKING:
+	from Alejandro.Core.Control import Control
+
+class PhraseKind(Enum):
+	"""What a matched phrase means to the control that owns it."""
+	ACTIVATE = auto()    # The control's text or one of it's keyphrases
+	DEACTIVATE = auto()  # One of a ModalControl's deactivate_phrases
+
+@dataclass
+class PhraseMatch:
+	"""A phrase belonging to a control that was just completed by the word stream."""
+	control: 'Control'
+	phrase: str
+	kind: PhraseKind
+	length: int
+	'''How many words of the stream the phrase spans (ending at the current word).'''
+	cost: float = 0.0
+	'''
+	How far what was spoken was from the phrase, 0 for
+	an exact match (see FuzzyMatching), lower is better.
+	'''
+
+class PhraseMatcher:
+	'''
+	Aho-Corasick automaton over the word ids of every phrase
+	of a set of controls (and every spelling of those phrases,
+	see WordMapping.phrase_variants).
+
+	It is compiled once (per screen) and then advanced one word
+	at a time, costing O(1) amortized per word regardless of
+	how many controls or phrases it holds, reporting every phrase
+	that ends at the current word.
+
+	The automaton itself is immutable, the state (a plain int)
+	is kept by whoever is feeding it words.
+
+	Phrases of controls with a max_fuzzy_cost are additionally
+	indexed for approximate matching (see FuzzyPhraseIndex).
+	'''
+	def __init__(self, controls: List['Control']):
+		self._goto: List[Dict[int, int]] = [{}]
+		self._fail: List[int] = [0]
+		self._out: List[List[PhraseMatch]] = [[]]
+		self._order: Dict[int, int] = {}
+		self.max_phrase_length = 0
+		'''Number of words in the longest phrase compiled.'''
+
+		fuzzy_patterns = []
+		fuzzy_words: Dict[int, str] = {}
+		for order, control in enumerate(controls):
+			self._order[id(control)] = order
+			for phrase, kind in control.phrases():
+				for variant in control.get_phrase_variants(phrase):
+					self.max_phrase_length = max(self.max_phrase_length, len(variant))
+					match = PhraseMatch(control, phrase, kind, len(variant))
+					self._add(variant, (order, match))
+					if control.max_fuzzy_cost:
+						fuzzy_patterns.append((match, variant, control.max_fuzzy_cost))
+				if control.max_fuzzy_cost:
+					for word in control.get_phrase_words(phrase):
+						fuzzy_words[get_word_id(word)] = word.lower()
+		self._link()
+
+		self._fuzzy: Optional[FuzzyPhraseIndex] = None
+		if fuzzy_patterns:
+			self._fuzzy = FuzzyPhraseIndex(fuzzy_patterns, fuzzy_words)
+
+	def _add(self, keys: Tuple[int, ...], pattern: Tuple[int, PhraseMatch]) -> None:
+		state = 0
+		for key in keys:
+			next_state = self._goto[state].get(key)
+			if next_state is None:
+				next_state = len(self._goto)
+				self._goto.append({})
+				self._fail.append(0)
+				self._out.append([])
+				self._goto[state][key] = next_state
+			state = next_state
+		self._out[state].append(pattern)
+
+	def _link(self) -> None:
+		'''
+		Computes the failure links breadth first, merging each
+		state's outputs with those of it's failure state so that
+		advance never has to follow failure links to report matches.
+		'''
+		queue = deque(self._goto[0].values())
+		while queue:
+			state = queue.popleft()
+			for key, next_state in self._goto[state].items():
+				queue.append(next_state)
+				fail = self._fail[state]
+				while fail and key not in self._goto[fail]:
+					fail = self._fail[fail]
+				fail = self._goto[fail].get(key, 0)
+				self._fail[next_state] = fail if fail != next_state else 0
+				self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+		# Report matches in control order (the order controls are checked in) then drop the ordering:
+		self._out = [[match for _, match in sorted(out, key=lambda p: p[0])] for out in self._out]
+
+	def advance(self, state: int, word: WordNode) -> Tuple[int, List[PhraseMatch]]:
+		'''
+		Feeds the next word of the stream to the automaton.
+
+		Returns the new state and every phrase that ends
+		at word, ordered by the control that owns them.
+		'''
+		key = word.word_id
+		goto = self._goto
+		while state and key not in goto[state]:
+			state = self._fail[state]
+		state = goto[state].get(key, 0)
+		if self._fuzzy is None:
+			return state, self._out[state]
+
+		approximate = self._fuzzy.find(word)
+		if not approximate:
+			return state, self._out[state]
+		return state, sorted(self._out[state] + approximate, key=lambda m: self._order[id(m.control)])
+
+	def prime(self, last_word: Optional[WordNode]) -> int:
+		'''
+		Gets the state the automaton would be in had it seen
+		the stream up to and including last_word.
+
+		Only the trailing words that could still be part of a
+		phrase are replayed, so this is cheap. Used when switching
+		matchers (eg, on navigation) so phrases spoken across
+		the switch still match.
+		'''
+		history: List[WordNode] = []
+		current = last_word
+		while current and len(history) < self.max_phrase_length - 1:
+			history.append(current)
+			current = current.prev
+
+		state = 0
+		for word in reversed(history):
+			state, _ = self.advance(state, word)
+		return state
@@ -0,0 +1,210 @@
+'''
+Recording word streams to disk and replaying them.
+
+Recordings are append only JSON lines files, a header:
+
+	{"format": "alejandro_words", "version": 1, "session": "<id>", "start": <epoch seconds>}
+
+followed by one compact array per word:
+
+	["word", <start>, <end>]
+	["word", <start>, <end>, "ScreenName"]
+
+where start & end are seconds since the header's start
+(to the millisecond) and the screen is only written when it
+differs from the previous word's.
+
+A replay of a recording is a WordStream like any other, so
+it can be fed to an Application to reproduce what a session
+heard (or to load test controls) without audio or a model.
+
+Sessions only record their words when asked to (there's no
+limit on how many recordings are kept):
+
+	ALEJANDRO_RECORD_WORDS=false   # true to record every session's words
+'''
+from typing import Iterator, AsyncIterator, Optional, Callable, Dict, Any, List, Tuple
+from concurrent.futures import Future
+from dataclasses import dataclass
+from threading import Lock, Event
+from Alejandro.Core.WordStream import WordStream
+from Alejandro.Core.WordNode import WordNode
+from Alejandro.Core.RecordingWriter import RecordingWriter
+import asyncio
+import json
+import time
+import os
+
+FORMAT = "alejandro_words"
+VERSION = 1
+
+@dataclass
+class RecordedWord:
+	'''A word as it was recorded.'''
+	word: str
+	start: float
+	'''Seconds since the epoch the word started being spoken.'''
+	end: float
+	'''Seconds since the epoch the word finished being spoken.'''
+	screen: Optional[str] = None
+	'''Name of the screen the session was on when the word was processed, if recorded.'''
+
+class WordRecorder:
+	'''
+	Writes words to a recording file, on the shared recording
+	writer thread (see RecordingWriter) so recording never
+	waits on the disk.
+	'''
+	def __init__(self, path: str, session_id: Optional[str] = None, start: Optional[float] = None):
+		self.path = path
+		self.start = time.time() if start is None else start
+		self._last_screen: Optional[str] = None
+		self._lock = Lock()
+
+		directory = os.path.dirname(path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		self._writer = RecordingWriter(path)
+		self._closing: Optional[Future] = None
+		self._write({"format": FORMAT, "version": VERSION, "session": session_id, "start": self.start})
+
+	def _write(self, record: Any) -> None:
+		self._writer.write((json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8"))
+
+	def record(self, word: WordNode, screen: Optional[str] = None) -> None:
+		with self._lock:
+			if self._closing is not None:
+				return
+			record = [word.word, round(word.start - self.start, 3), round(word.end - self.start, 3)]
+			if screen is not None and screen != self._last_screen:
+				record.append(screen)
+				self._last_screen = screen
+			self._write(record)
+
+	def close(self) -> Future:
+		'''Finishes the recording, the future's done once it's all on disk.'''
+		with self._lock:
+			if self._closing is None:
+				self._closing = self._writer.close()
+			return self._closing
+
+def read_recording(path: str) -> Tuple[Dict[str, Any], List[RecordedWord]]:
+	'''Reads a recording, returning it's header and it's words.'''
+	words: List[RecordedWord] = []
+	with open(path, encoding="utf-8") as f:
+		header = json.loads(f.readline())
+		if header.get("format") != FORMAT:
+			raise ValueError(f"{path} is not a word stream recording")
+		start = header["start"]
+		screen = None
+		for line in f:
+			line = line.strip()
+			if not line:
+				continue
+			try:
+				record = json.loads(line)
+			except json.JSONDecodeError:
+				break # Partially written last line
+			if len(record) > 3:
+				screen = record[3]
+			words.append(RecordedWord(record[0], start + record[1], start + record[2], screen))
+	return header, words
+
+class RecordingWordStream(WordStream):
+	'''
+	Wraps another word stream, recording every word it
+	produces as it is consumed (see WordRecorder).
+
+	Sessions only wrap their streams in one if enabled (see
+	ALEJANDRO_RECORD_WORDS).
+
+	screen_provider, if given, is called as each word is
+	consumed to get the name of the screen it is being
+	processed on.
+	'''
+	enabled: bool = os.environ.get("ALEJANDRO_RECORD_WORDS", "false").lower() in ("1", "true", "on", "yes")
+
+	def __init__(self, stream: WordStream, path: str, session_id: Optional[str] = None, screen_provider: Optional[Callable[[], Optional[str]]] = None):
+		super().__init__(history=stream.history, retranscriber=stream.retranscriber, wake_spotter=stream.wake_spotter, hypothesis_handlers=stream.hypothesis_handlers)
+		self.stream = stream
+		self.recorder = WordRecorder(path, session_id)
+		self.screen_provider = screen_provider
+
+	def _record(self, word: WordNode) -> None:
+		try:
+			screen = self.screen_provider() if self.screen_provider else None
+			self.recorder.record(word, screen)
+		except Exception as e:
+			print(f"[RECORD] Failed to record '{word.word}': {e}", flush=True)
+
+	def words(self) -> Iterator[WordNode]:
+		for word in self.stream.words():
+			self._record(word)
+			yield word
+
+	async def aiter_words(self) -> AsyncIterator[WordNode]:
+		async for word in self.stream.aiter_words():
+			self._record(word)
+			yield word
+
+	def close(self) -> Future:
+		self.stream.close()
+		return self.recorder.close()
+
+class ReplayWordStream(WordStream):
+	'''
+	Plays back a recording as a word stream.
+
+	Words are emitted when they finished being spoken,
+	scaled by speed (1 is real time, 2 twice as fast) or as
+	fast as they can be consumed if speed is None.
+
+	If rebase_times the words' times are moved to be
+	relative to when the replay started instead of when they
+	were recorded.
+	'''
+	def __init__(self, path: str, speed: Optional[float] = 1.0, rebase_times: bool = True):
+		super().__init__()
+		self.path = path
+		self.header, self.recorded_words = read_recording(path)
+		self.speed = speed
+		self.rebase_times = rebase_times
+		self.screen: Optional[str] = None
+		'''The screen the last replayed word was recorded on.'''
+		self._closed = Event()
+
+	def _delay(self, word: RecordedWord, first_end: float, replay_start: float) -> float:
+		'''Seconds to wait before emitting word.'''
+		if not self.speed:
+			return 0
+		due = replay_start + (word.end - first_end) / self.speed
+		return max(0.0, due - time.time())
+
+	def _node(self, word: RecordedWord, offset: float) -> WordNode:
+		self.screen = word.screen
+		return self.history.append(WordNode(word.word, word.start + offset, word.end + offset))
+
+	def _timing(self) -> Tuple[float, float, float]:
+		replay_start = time.time()
+		first_end = self.recorded_words[0].end if self.recorded_words else 0.0
+		offset = replay_start - first_end if self.rebase_times else 0.0
+		return replay_start, first_end, offset
+
+	def words(self) -> Iterator[WordNode]:
+		replay_start, first_end, offset = self._timing()
+		for word in self.recorded_words:
+			if self._closed.wait(self._delay(word, first_end, replay_start)):
+				return
+			yield self._node(word, offset)
+
+	async def aiter_words(self) -> AsyncIterator[WordNode]:
+		replay_start, first_end, offset = self._timing()
+		for word in self.recorded_words:
+			# (Always sleeping, so even at full speed others on the loop get a turn)
+			await asyncio.sleep(self._delay(word, first_end, replay_start))
+			if self._closed.is_set():
+				return
+			yield self._node(word, offset)
+
+	def close(self):
+		self._closed.set()
@@ -0,0 +1,324 @@
+'''
+Writing recordings' audio to disk without holding up the
+threads receiving it.
+
+All client audio is saved (it's what future re-training is
+done with), but writing and flushing each chunk as it arrives
+means a slow disk stalls ingestion. A RecordingWriter instead
+buffers chunks in memory and one shared thread writes them
+out. The buffer is bounded, but a full buffer makes write
+wait for room rather than dropping anything, so the
+guarantee holds even when the disk can't keep up.
+
+How durable what's written is (see RecordingWriter):
+
+	ALEJANDRO_RECORDING_FLUSH_MS=250   # flush to the OS at least this often (0 for every chunk)
+	ALEJANDRO_RECORDING_FSYNC=close    # fsync on 'close', every 'flush', or 'never'
+
+recording_metrics keeps how long writes and flushes take
+('recording_write', 'recording_flush', and how long write had
+to wait for room, 'recording_wait'), and buffer_depth() how
+much audio is still waiting to be written.
+
+Raw PCM recordings (see PCM_MIME in WhisperLiveKitWordStream)
+are too big to keep as they are, so once one's finished
+encode_pcm compresses it to Opus, on a thread of it's own
+('recording_encode' in recording_metrics).
+'''
+from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition, Thread, Lock
+from weakref import WeakSet
+from .Latency import LatencyTracker
+import os
+import subprocess
+import time
+import wave
+
+FSYNC = ("never", "close", "flush")
+
+PCM_SAMPLE_RATE = 16000
+'''Sample rate of raw PCM recordings (mono, 16 bit little endian).'''
+
+recording_metrics = LatencyTracker()
+'''How long recordings take to write ('recording_write'), flush ('recording_flush') and wait for buffer room ('recording_wait').'''
+
+_recordings: "WeakSet[RecordingWriter]" = WeakSet()
+_recordings_lock = Lock()
+
+def buffer_depth() -> Dict[str, int]:
+	'''How much audio (in bytes) is waiting to be written across every recording, and the most any one has had waiting.'''
+	with _recordings_lock:
+		recordings = list(_recordings)
+	return {
+		"recordings": sum(1 for r in recordings if not r.closed),
+		"buffered_bytes": sum(r.buffered for r in recordings),
+		"peak_buffered_bytes": max((r.peak_buffered for r in recordings), default=0),
+	}
+
+class RecordingWriter:
+	'''
+	Writes a recording to path on the shared recording writer
+	thread, flushing it at least every flush_ms milliseconds
+	(so what's been recorded can be read while it's recording,
+	eg by RecordingFileAudio) and fsyncing it as fsync says.
+
+	Up to max_buffered bytes are held waiting to be written,
+	after which write waits for the writer to catch up.
+
+	If writing fails the recording is given up on (see error),
+	write raises and close's future has the exception.
+	'''
+	flush_ms: float = float(os.environ.get("ALEJANDRO_RECORDING_FLUSH_MS", 250))
+	fsync: str = os.environ.get("ALEJANDRO_RECORDING_FSYNC", "close")
+
+	def __init__(self, path: str, flush_ms: Optional[float] = None, fsync: Optional[str] = None, max_buffered: int = 8 * 1024 * 1024):
+		self.path = path
+		'''Where the recording is (updated once it's renamed).'''
+		if flush_ms is not None:
+			self.flush_ms = flush_ms
+		if fsync is not None:
+			self.fsync = fsync
+		if self.fsync not in FSYNC:
+			raise ValueError(f"fsync must be one of {FSYNC}, not '{self.fsync}'")
+		self.max_buffered = max_buffered
+		self.closed = False
+		self.error: Optional[Exception] = None
+		'''Why writing the recording failed, if it has.'''
+		self.bytes_written = 0
+		self.peak_buffered = 0
+		'''The most that's been waiting to be written at once.'''
+
+		self._file = open(path, "wb")
+		self._chunks: List[bytes] = []
+		self._buffered = 0
+		self._room = Condition(Lock())
+		self._last_flush = time.monotonic()
+		self._dirty = False
+		self._closing: Optional[Future] = None
+		self._rename_to: Optional[str] = None
+		with _recordings_lock:
+			_recordings.add(self)
+
+	@property
+	def buffered(self) -> int:
+		'''Bytes written but not yet handed to the file.'''
+		return self._buffered
+
+	def write(self, data: bytes) -> None:
+		'''
+		Queues data to be appended to the recording. Only waits
+		if max_buffered bytes are already waiting.
+
+		Raises ValueError if it's been closed (even while waiting)
+		and OSError if writing it has failed.
+		'''
+		if not data:
+			return
+		with self._room:
+			self._check_open()
+			if self._buffered >= self.max_buffered:
+				start = time.perf_counter()
+				while self._buffered >= self.max_buffered and not self.closed:
+					self._room.wait()
+				recording_metrics.add("recording_wait", (time.perf_counter() - start) * 1000)
+				self._check_open()
+			self._chunks.append(data)
+			self._buffered += len(data)
+			self.peak_buffered = max(self.peak_buffered, self._buffered)
+		_get_writer().wake(self)
+
+	def _check_open(self) -> None:
+		if self.error is not None:
+			raise OSError(f"Recording {self.path} failed: {self.error}")
+		if self.closed:
+			raise ValueError(f"Recording {self.path} is closed")
+
+	def close(self, rename_to: Optional[str] = None) -> Future:
+		'''
+		Finishes the recording once everything written has been,
+		renaming it to rename_to if given, without waiting. The
+		future's result is it's final path.
+
+		Closing it again just returns the same future.
+		'''
+		with self._room:
+			if self._closing is not None:
+				return self._closing
+			self.closed = True
+			self._rename_to = rename_to
+			self._closing = closing = Future()
+			# (Wakes writes waiting for room, they're too late)
+			self._room.notify_all()
+		_get_writer().wake(self)
+		return closing
+
+	# On the writer thread:
+	def _drain(self) -> Optional[float]:
+		'''
+		Writes what's buffered, flushing (or closing) if it's due,
+		returning when (time.monotonic()) it next needs flushing.
+		'''
+		with self._room:
+			chunks, self._chunks = self._chunks, []
+			closing = self._closing
+		if self.error is not None or (closing is not None and closing.done()):
+			return None
+		try:
+			if chunks:
+				start = time.perf_counter()
+				for chunk in chunks:
+					self._file.write(chunk)
+				recording_metrics.add("recording_write", (time.perf_counter() - start) * 1000)
+				written = sum(len(chunk) for chunk in chunks)
+				with self._room:
+					self._buffered -= written
+					self.bytes_written += written
+					self._room.notify_all()
+				self._dirty = True
+
+			if closing is not None:
+				self._finish(closing)
+				return None
+			if not self._dirty:
+				return None
+			due = self._last_flush + self.flush_ms / 1000
+			if time.monotonic() < due:
+				return due
+			self._flush(self.fsync == "flush")
+		except Exception as e:
+			self._fail(e)
+		return None
+
+	def _flush(self, sync: bool) -> None:
+		start = time.perf_counter()
+		self._file.flush()
+		if sync:
+			os.fsync(self._file.fileno())
+		recording_metrics.add("recording_flush", (time.perf_counter() - start) * 1000)
+		self._last_flush = time.monotonic()
+		self._dirty = False
+
+	def _finish(self, closing: Future) -> None:
+		self._flush(self.fsync != "never")
+		self._file.close()
+		if self._rename_to:
+			os.rename(self.path, self._rename_to)
+			self.path = self._rename_to
+		closing.set_result(self.path)
+
+	def _fail(self, error: Exception) -> None:
+		'''Gives up on the recording, dropping what's still buffered and failing writes (and close) with error.'''
+		print(f"[RECORDING] Failed to write {self.path}: {error}", flush=True)
+		with self._room:
+			self.error = error
+			self.closed = True
+			self._chunks = []
+			self._buffered = 0
+			if self._closing is None:
+				self._closing = Future()
+			closing = self._closing
+			self._room.notify_all()
+		try:
+			self._file.close()
+		except Exception:
+			pass
+		if not closing.done():
+			closing.set_exception(error)
+
+class _RecordingWriterThread:
+	'''The thread writing every recording, woken when one has something to write or is due a flush.'''
+	def __init__(self):
+		self._condition = Condition()
+		self._pending: Dict[RecordingWriter, None] = {}
+		'''Recordings with something to write, in the order they were woken.'''
+		self._due: Dict[RecordingWriter, float] = {}
+		'''When (time.monotonic()) recordings with unflushed writes need flushing.'''
+		Thread(target=self._run, name="recording_writer", daemon=True).start()
+
+	def wake(self, recording: RecordingWriter) -> None:
+		with self._condition:
+			self._pending[recording] = None
+			self._condition.notify()
+
+	def _run(self) -> None:
+		while True:
+			with self._condition:
+				while not self._pending:
+					if not self._due:
+						self._condition.wait()
+						continue
+					timeout = min(self._due.values()) - time.monotonic()
+					if timeout <= 0:
+						break
+					self._condition.wait(timeout)
+				now = time.monotonic()
+				recordings = list(self._pending) + [r for r, due in self._due.items() if due <= now and r not in self._pending]
+				self._pending.clear()
+				for recording in recordings:
+					self._due.pop(recording, None)
+			for recording in recordings:
+				try:
+					due = recording._drain()
+				except Exception as e:
+					print(f"[RECORDING] Failed to write {recording.path}: {e}", flush=True)
+					due = None
+				if due is not None:
+					with self._condition:
+						self._due.setdefault(recording, due)
+
+_writer: Optional[_RecordingWriterThread] = None
+_writer_lock = Lock()
+
+def _get_writer() -> _RecordingWriterThread:
+	'''The recording writer shared by every session, started on first use.'''
+	global _writer
+	with _writer_lock:
+		if _writer is None:
+			_writer = _RecordingWriterThread()
+		return _writer
+
+_encoder: Optional[ThreadPoolExecutor] = None
+
+def encode_pcm(path: str, ffmpeg: str = "ffmpeg", bitrate: str = "32k") -> Future:
+	'''
+	Compresses the finished raw PCM recording at path to Opus
+	(beside it, as .ogg) in the background, deleting the raw
+	file. The future's result is where the recording is now.
+
+	If ffmpeg isn't there (or fails) it's kept as a WAV instead,
+	the audio is never lost to a failed encode.
+	'''
+	global _encoder
+	with _writer_lock:
+		if _encoder is None:
+			_encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recording_encoder")
+	return _encoder.submit(_encode_pcm, path, ffmpeg, bitrate)
+
+def _encode_pcm(path: str, ffmpeg: str, bitrate: str) -> str:
+	start = time.perf_counter()
+	base = path[:-len(".pcm")] if path.endswith(".pcm") else path
+	encoded = base + ".ogg"
+	cmd = [
+		ffmpeg, "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+		"-f", "s16le", "-ar", str(PCM_SAMPLE_RATE), "-ac", "1", "-i", path,
+		"-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+		encoded,
+	]
+	try:
+		# (At a lower priority than anything live)
+		subprocess.run(cmd, check=True, capture_output=True, preexec_fn=(lambda: os.nice(10)) if hasattr(os, "nice") else None)
+	except (OSError, subprocess.CalledProcessError) as e:
+		print(f"[RECORDING] Couldn't encode {path} ({e}), keeping it as a WAV", flush=True)
+		if os.path.exists(encoded):
+			os.remove(encoded)
+		encoded = base + ".wav"
+		with open(path, "rb") as pcm, wave.open(encoded, "wb") as wav:
+			wav.setnchannels(1)
+			wav.setsampwidth(2)
+			wav.setframerate(PCM_SAMPLE_RATE)
+			while chunk := pcm.read(1024 * 1024):
+				wav.writeframes(chunk)
+	os.remove(path)
+	recording_metrics.add("recording_encode", (time.perf_counter() - start) * 1000)
+	return encoded
@@ -0,0 +1,268 @@
+'''
+Re-transcribing what was said with a bigger, slower model.
+
+Live transcription uses a small model so commands are matched
+quickly. A Retranscriber follows behind it: it groups the live
+words into utterances (separated by pauses) and once one ends
+transcribes it's audio again with an UtteranceTranscriber (eg
+a large whisper model run locally), announcing the better
+words as a Correction.
+
+The Application applies corrections to the words a
+ModalControl collects (eg dictating a message), so dictation
+gets the accuracy of the large model while commands keep the
+latency of the small one.
+
+Any model can be used by implementing UtteranceTranscriber,
+FasterWhisperTranscriber runs one locally and GroqTranscriber
+uses Groq's hosted whisper.
+'''
+from typing import Callable, List, Optional, Tuple
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from Alejandro.Core.WordNode import WordNode
+from Alejandro.Core.Tokenizer import tokenize
+from Alejandro.Core.EventLoop import EventLoopThread, shared_event_loop
+import asyncio
+import subprocess
+import io
+import wave
+import numpy as np
+
+SAMPLE_RATE = 16000
+'''Sample rate of the (mono, float32) audio given to transcribers.'''
+
+TranscribedWord = Tuple[str, float, float]
+'''A word and when it started & ended, in seconds into the audio it was transcribed from.'''
+
+class UtteranceTranscriber(ABC):
+	'''A model that transcribes a whole utterance at once, with word times.'''
+	@abstractmethod
+	def transcribe(self, audio: np.ndarray) -> List[TranscribedWord]:
+		'''The words in audio (mono float32 samples at SAMPLE_RATE).'''
+		pass
+
+class FasterWhisperTranscriber(UtteranceTranscriber):
+	'''A (local) faster-whisper model, loaded when this is made.'''
+	def __init__(self, model_size: str = "large-v3", language: Optional[str] = "en", device: str = "auto", compute_type: str = "default"):
+		from faster_whisper import WhisperModel
+		self.language = None if language == "auto" else language
+		self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+		self._lock = Lock()
+
+	def transcribe(self, audio: np.ndarray) -> List[TranscribedWord]:
+		with self._lock:
+			segments, _ = self.model.transcribe(audio, language=self.language, word_timestamps=True)
+			return [(word.word, word.start, word.end) for segment in segments for word in (segment.words or [])]
+
+class GroqTranscriber(UtteranceTranscriber):
+	'''Groq's hosted whisper (needs GROQ_API_KEY).'''
+	def __init__(self, model: str = "whisper-large-v3", language: str = "en"):
+		from groq import Groq
+		self.client = Groq()
+		self.model = model
+		self.language = language
+
+	def transcribe(self, audio: np.ndarray) -> List[TranscribedWord]:
+		wav = io.BytesIO()
+		with wave.open(wav, "wb") as f:
+			f.setnchannels(1)
+			f.setsampwidth(2)
+			f.setframerate(SAMPLE_RATE)
+			f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+		transcription = self.client.audio.transcriptions.create(
+			file=("utterance.wav", wav.getvalue()),
+			model=self.model,
+			response_format="verbose_json",
+			language=self.language,
+			timestamp_granularities=["word"],
+		)
+		words = transcription.to_dict().get("words", [])
+		return [(word.get("word", ""), word.get("start", 0.0), word.get("end", 0.0)) for word in words]
+
+class DeferredTranscriber(UtteranceTranscriber):
+	'''Uses the transcriber get returns, so a model is only loaded once something needs re-transcribing.'''
+	def __init__(self, get: Callable[[], UtteranceTranscriber]):
+		self.get = get
+
+	def transcribe(self, audio: np.ndarray) -> List[TranscribedWord]:
+		return self.get().transcribe(audio)
+
+class AudioSource(ABC):
+	'''The audio of a recording.'''
+	@abstractmethod
+	def read(self, start: float, end: float) -> np.ndarray:
+		'''The audio from start to end seconds into the recording (mono float32 at SAMPLE_RATE).'''
+		pass
+
+class RecordingFileAudio(AudioSource):
+	'''
+	Audio decoded (with ffmpeg) from a recording file, which
+	may still be being written to.
+	'''
+	def __init__(self, path: str, ffmpeg: str = "ffmpeg"):
+		self.path = path
+		'''Where the recording is (updated if it's renamed).'''
+		self.ffmpeg = ffmpeg
+
+	def read(self, start: float, end: float) -> np.ndarray:
+		# (Seeking after the input since live recordings have no index to seek with)
+		cmd = [
+			self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostats",
+			"-i", self.path,
+			"-ss", f"{start:.3f}", "-t", f"{end - start:.3f}",
+			"-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+			"pipe:1",
+		]
+		pcm = subprocess.run(cmd, check=True, capture_output=True).stdout
+		return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+class RecordingPCMAudio(RecordingFileAudio):
+	'''
+	A recording of raw mono PCM16 at SAMPLE_RATE, read straight
+	from the file without decoding it. Once it's been encoded
+	(path no longer ending in .pcm) it's decoded like any other.
+	'''
+	def read(self, start: float, end: float) -> np.ndarray:
+		if not self.path.endswith(".pcm"):
+			return super().read(start, end)
+		first = max(0, int(start * SAMPLE_RATE))
+		with open(self.path, "rb") as f:
+			f.seek(first * 2)
+			pcm = f.read(max(0, int(end * SAMPLE_RATE) - first) * 2)
+		pcm = pcm[:len(pcm) // 2 * 2] # (A sample may be half written)
+		return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+@dataclass
+class Correction:
+	'''Better words for everything said from start to end (seconds since the epoch).'''
+	start: float
+	end: float
+	words: List[WordNode]
+
+	@property
+	def text(self) -> str:
+		return " ".join(word.word for word in self.words)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+	'''One thread re-transcribing for every session, since they share a model.'''
+	global _executor
+	with _executor_lock:
+		if _executor is None:
+			_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retranscribe")
+		return _executor
+
+class Retranscriber:
+	'''
+	Re-transcribes the utterances of a recording's words with
+	transcriber, calling on_correction handlers with each one's
+	better words.
+
+	An utterance ends after pause seconds without a word (or
+	when flushed), it's audio is re-transcribed with padding
+	seconds either side. Only utterances that end while wanted()
+	are re-transcribed, the rest are skipped.
+	'''
+	def __init__(self, transcriber: UtteranceTranscriber, pause: float = 0.8, padding: float = 0.3, loop: Optional[EventLoopThread] = None):
+		self.transcriber = transcriber
+		self.pause = pause
+		self.padding = padding
+		self.loop = loop or shared_event_loop("transcription")
+		self.wanted: Callable[[], bool] = lambda: True
+		'''Whether corrections are currently wanted (eg while dictating).'''
+		self.on_correction: List[Callable[[Correction], None]] = []
+
+		self.audio: Optional[AudioSource] = None
+		self.origin: Optional[float] = None
+		'''When (since the epoch) the recording started.'''
+		self._start: Optional[float] = None
+		self._end: Optional[float] = None
+		self._lock = Lock()
+		self._timer: Optional[asyncio.TimerHandle] = None
+		self._last_job: Optional[Future] = None
+
+	def start_recording(self, audio: AudioSource, origin: float) -> None:
+		'''Follows a new recording (starting at origin) from now on.'''
+		with self._lock:
+			self.audio = audio
+			self.origin = origin
+			self._start = self._end = None
+
+	def add_words(self, words: List[WordNode]) -> None:
+		'''Adds the live transcription's newly finalized words to the current utterance.'''
+		timed = [word for word in words if word.audio_start is not None]
+		if not timed:
+			return
+		with self._lock:
+			if self._start is None:
+				self._start = timed[0].audio_start
+			self._end = timed[-1].audio_end
+		self.loop.call_soon(self._restart_timer)
+
+	def _restart_timer(self) -> None:
+		if self._timer:
+			self._timer.cancel()
+		self._timer = asyncio.get_running_loop().call_later(self.pause, self._utterance_ended)
+
+	def _utterance_ended(self) -> None:
+		self._timer = None
+		if self.wanted():
+			self._submit()
+		else:
+			with self._lock:
+				self._start = self._end = None
+
+	def flush(self) -> Future:
+		'''
+		Re-transcribes the current utterance now (without waiting
+		for a pause), returning a future that's done once it (and
+		any before it) has been corrected.
+		'''
+		self.loop.call_soon(self._cancel_timer)
+		return self._submit()
+
+	def _cancel_timer(self) -> None:
+		if self._timer:
+			self._timer.cancel()
+			self._timer = None
+
+	def _submit(self) -> Future:
+		with self._lock:
+			if self._start is None or self.audio is None:
+				if self._last_job is None:
+					self._last_job = Future()
+					self._last_job.set_result(None)
+				return self._last_job
+			window = (self.audio, self.origin, max(0.0, self._start - self.padding), self._end + self.padding)
+			self._start = self._end = None
+			self._last_job = _get_executor().submit(self._retranscribe, *window)
+			return self._last_job
+
+	def _retranscribe(self, audio: AudioSource, origin: float, start: float, end: float) -> Optional[Correction]:
+		try:
+			words = self.transcriber.transcribe(audio.read(start, end))
+		except Exception as e:
+			print(f"[RETRANSCRIBE] Failed to re-transcribe {start:.1f}s-{end:.1f}s: {e}", flush=True)
+			return None
+
+		nodes: List[WordNode] = []
+		for text, word_start, word_end in words:
+			for token in tokenize(text):
+				node = WordNode(token, origin + start + word_start, origin + start + word_end)
+				node.audio_start = start + word_start
+				node.audio_end = start + word_end
+				nodes.append(node)
+		correction = Correction(origin + start, origin + end, nodes)
+		print(f"[RETRANSCRIBE] {start:.1f}s-{end:.1f}s: '{correction.text}'", flush=True)
+
+		for handler in self.on_correction:
+			try:
+				handler(correction)
+			except Exception as e:
+				print(f"[RETRANSCRIBE] Correction handler failed: {e}", flush=True)
+		return correction
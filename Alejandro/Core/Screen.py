@@ -2,6 +2,7 @@ from typing import List, Dict, Any, Optional, TYPE_CHECKING, ClassVar, Type, Typ
 from weakref import ref, ReferenceType
 from Alejandro.Core.Control import Control
 from Alejandro.Core.ModalControl import ModalControl
+from Alejandro.Core.PhraseMatcher import PhraseMatcher
 from dataclasses import dataclass
 
 if TYPE_CHECKING:
@@ -19,6 +20,8 @@ class Screen:
 	title: str
 	controls: List[Control] = field(default_factory=list)
 	
+	_matcher: Optional[PhraseMatcher] = field(default=None, init=False, repr=False, metadata=config(exclude=True))
+	
 	types: ClassVar[Dict[str, Type['Screen']]] = {}
 	def get_template_data(self) -> Dict[str, Any]:
 		"""Get any additional template data needed for rendering"""
@@ -32,15 +35,41 @@ class Screen:
 			url = url[:-len("screen")]
 		return url
 	
+	@property
+	def matcher(self) -> PhraseMatcher:
+		'''
+		The compiled phrase matcher for all of this
+		screen's controls.
+		'''
+		if self._matcher is None:
+			self.compile_controls()
+		return self._matcher
+	
+	@property
+	def idle(self) -> bool:
+		'''Whether this screen only listens for wake controls (see Control.wake).'''
+		return len(self.controls) > 0 and all(control.wake for control in self.controls)
+	
+	def compile_controls(self) -> None:
+		'''
+		(Re)builds the phrase matcher for this screen's controls,
+		tokenizing all their phrases up front so the first word
+		spoken on this screen doesn't pay for it.
+		
+		Call this after changing controls on an existing screen.
+		'''
+		self._matcher = PhraseMatcher(self.controls)
+	
 	def __post_init__(self):
 		self.controls.extend( get_controls(self) )
+		self.compile_controls()
 	
 T = TypeVar('T')
 def screen_type(cls:Type[T]) -> Type[T]:
 	Screen.types[cls.url()] = cls
 	return cls
 
-def control(text: Optional[str] = None, keyphrases: List[str] = [], deactivate_phrases: List[str] = [], js_getter_function: Optional[str] = None, js_return_handler: Optional[str] = None):
+def control(text: Optional[str] = None, keyphrases: List[str] = [], deactivate_phrases: List[str] = [], js_getter_function: Optional[str] = None, js_return_handler: Optional[str] = None, max_fuzzy_cost: Optional[float] = None, background: bool = False, speculative: bool = False):
 	def decorator(method, text=text, keyphrases=keyphrases, deactivate_phrases=deactivate_phrases, js_getter_function=js_getter_function, js_return_handler=js_return_handler):
 		if not text:
 			assert len(keyphrases)>0, 'Must have at least 1 key phrase if text is not passed'
@@ -50,7 +79,10 @@ def control(text: Optional[str] = None, keyphrases: List[str] = [], deactivate_p
 			'text': text,
 			'keyphrases': keyphrases,
 			'js_getter_function': js_getter_function,
-			'js_return_handler': js_return_handler
+			'js_return_handler': js_return_handler,
+			'max_fuzzy_cost': max_fuzzy_cost,
+			'background': background,
+			'speculative': speculative
 		}
 		if deactivate_phrases:
 			method._control_config['deactivate_phrases'] = deactivate_phrases
@@ -31,6 +31,18 @@ class ScreenStack:
 			return True
 		return False
 		
+	def undo_push(self, screen: Screen) -> bool:
+		"""Goes back from screen if it was pushed and is still the current screen"""
+		if screen is self.current and len(self._stack) > 1:
+			return self.pop() is not None
+		return False
+		
+	def undo_pop(self, screen: Optional[Screen]) -> bool:
+		"""Goes forward to screen if it was popped and is still the next screen forward"""
+		if screen is not None and self._forward_stack and self._forward_stack[-1] is screen:
+			return self.forward()
+		return False
+		
 	def _internal_push(self, screen: Screen) -> None:
 		"""Push without clearing forward stack"""
 		self._stack.append(screen)
@@ -0,0 +1,109 @@
+'''
+Splits text into the lower case words we match controls on.
+
+By default this uses a few precompiled regular expressions
+that follow the rules of nltk's word_tokenize (which this
+project used to call for every piece of text) closely enough
+to produce the same words in the common cases, keeping only
+alphanumeric tokens as before:
+
+	"Don't open terminal #2, please." -> ['do', 'open', 'terminal', '2', 'please']
+
+Differences from nltk are in the rare cases: we drop a
+single trailing period from every word instead of relying
+on nltk's sentence splitter (so 'home. then' always gives
+'home'), and we don't split 'cannot', 'gonna' and friends
+in the middle of longer hyphenated or dotted tokens.
+
+nltk can be used instead with use_nltk(), it is only
+imported (and it's punkt data downloaded) once selected.
+'''
+from typing import List, Tuple
+from functools import lru_cache
+import re
+
+_WHITESPACE = re.compile(r"\S+")
+
+_SPLIT = re.compile(r"""(
+	\.\.\.|--|                          # ellipsis and dashes
+	[;@\#$%&?!\[\](){}<>"`]|          # always their own token
+	[«»“”‘’„]|                          # unicode quotes
+	[:,](?!\d)                          # , and : except inside numbers (1,000 10:30)
+)""", re.VERBOSE)
+
+_LEADING_QUOTE = re.compile(r"^'(?!(?:s|m|d|ll|re|ve|n|t)$)(?=\w)", re.IGNORECASE)
+_CONTRACTION = re.compile(r"(?<=[^'])('s|'m|'d|'ll|'re|'ve|n't|')$", re.IGNORECASE)
+_SPLIT_WORDS = re.compile(r"^(?:(can)(not)|(gim)(me)|(gon)(na)|(got)(ta)|(lem)(me)|(wan)(na)|(d)('ye)|(more)('n))$", re.IGNORECASE)
+
+def _split_token(token: str, out: List[str]) -> None:
+	'''Splits the quotes & contractions off of a token without spaces or punctuation.'''
+	if token.endswith(".") and not token.endswith(".."):
+		token = token[:-1]
+		if not token:
+			return
+	if _LEADING_QUOTE.match(token):
+		token = token[1:]
+
+	suffixes = []
+	while True:
+		contraction = _CONTRACTION.search(token)
+		if not contraction or contraction.start() == 0:
+			break
+		suffixes.append(contraction.group(1))
+		token = token[:contraction.start()]
+
+	split = _SPLIT_WORDS.match(token)
+	if split:
+		out.extend(part for part in split.groups() if part)
+	else:
+		out.append(token)
+	out.extend(reversed(suffixes))
+
+def regex_tokenize(text: str) -> List[str]:
+	'''Every token (punctuation included) in text, see module docs.'''
+	tokens: List[str] = []
+	for chunk in _WHITESPACE.findall(text):
+		for piece in _SPLIT.split(chunk):
+			if not piece:
+				continue
+			if _SPLIT.fullmatch(piece):
+				tokens.append(piece)
+			else:
+				_split_token(piece, tokens)
+	return tokens
+
+_nltk = None
+
+def nltk_tokenize(text: str) -> List[str]:
+	'''Every token in text according to nltk.word_tokenize, importing it on first use.'''
+	global _nltk
+	if _nltk is None:
+		import nltk
+		try:
+			nltk.data.find('tokenizers/punkt')
+			nltk.data.find('tokenizers/punkt_tab/english')
+		except LookupError:
+			nltk.download('punkt')
+			nltk.download('punkt_tab')
+		_nltk = nltk
+	return _nltk.word_tokenize(text)
+
+_use_nltk = False
+
+def use_nltk(enabled: bool = True) -> None:
+	'''Selects nltk (instead of the built in regex tokenizer) for tokenize.'''
+	global _use_nltk
+	if enabled != _use_nltk:
+		_use_nltk = enabled
+		tokenize.cache_clear()
+
+@lru_cache(maxsize=4096)
+def tokenize(text: str) -> Tuple[str, ...]:
+	'''
+	The lower case alphanumeric words of text, eg 'Open terminal 2!' -> ('open', 'terminal', '2').
+
+	Results are cached since the same phrases get tokenized over and over.
+	'''
+	text = text.lower()
+	tokens = nltk_tokenize(text) if _use_nltk else regex_tokenize(text)
+	return tuple(token for token in tokens if token.isalnum())
@@ -0,0 +1,146 @@
+'''
+Giving words transcribed from a live transcript the times
+they were spoken.
+
+WhisperLiveKit's results (FrontData) have lines of text,
+each with the start & end of it's audio (in seconds into the
+recording) and, depending on the backend, the same for each
+of it's words. We join the lines' text into one transcript,
+keeping track of which characters of it each line (or word)
+covers and when it was spoken, so any slice of the transcript
+can be turned into timed WordNodes, interpolating within a
+line by the length of it's words when that's all we have.
+'''
+from typing import Any, Callable, Iterable, List, Optional, Tuple, NamedTuple
+from Alejandro.Core.WordNode import WordNode
+from Alejandro.Core.Tokenizer import tokenize
+from Alejandro.Core.Latency import ChunkArrivals
+import time
+
+class TimedSpan(NamedTuple):
+	'''Characters [first, last) of a transcript were spoken from start to end seconds into the recording.'''
+	first: int
+	last: int
+	start: Optional[float]
+	end: Optional[float]
+
+def audio_seconds(value: Any) -> Optional[float]:
+	'''Seconds from a WhisperLiveKit time, either a number or a formatted 'H:MM:SS.ss' string.'''
+	if value is None:
+		return None
+	if isinstance(value, (int, float)):
+		return float(value)
+	try:
+		seconds = 0.0
+		for part in str(value).split(":"):
+			seconds = seconds * 60 + float(part)
+		return seconds
+	except ValueError:
+		return None
+
+def _word_spans(text: str, offset: int, words: Iterable[Any]) -> List[TimedSpan]:
+	'''Spans of a line's timed words, found in order in it's text.'''
+	spans = []
+	cursor = 0
+	for word in words:
+		word_text = (getattr(word, "text", None) or "").strip()
+		if not word_text:
+			continue
+		found = text.find(word_text, cursor)
+		if found < 0:
+			return [] # Words don't match the text, fall back to the line's times
+		cursor = found + len(word_text)
+		spans.append(TimedSpan(offset + found, offset + cursor, audio_seconds(getattr(word, "start", None)), audio_seconds(getattr(word, "end", None))))
+	return spans
+
+def line_spans(line: Any, offset: int) -> Tuple[str, List[TimedSpan]]:
+	'''
+	The (stripped) text of a line that starts offset characters
+	into a transcript and it's timed spans, one per word if it
+	has timed words or else one for the line.
+	'''
+	text = (getattr(line, "text", None) or "").strip()
+	if not text:
+		return text, []
+	spans = _word_spans(text, offset, getattr(line, "words", None) or [])
+	return text, spans or [TimedSpan(offset, offset + len(text), audio_seconds(getattr(line, "start", None)), audio_seconds(getattr(line, "end", None)))]
+
+def transcript_spans(lines: Iterable[Any]) -> Tuple[str, List[TimedSpan]]:
+	'''
+	The text of lines joined with spaces (blank ones skipped)
+	and the timed spans of it, one per word if lines have
+	timed words or else one per line.
+	'''
+	texts: List[str] = []
+	spans: List[TimedSpan] = []
+	offset = 0
+	for line in lines:
+		text, timed = line_spans(line, offset + 1 if texts else offset)
+		if not text:
+			continue
+		if texts:
+			offset += 1
+		spans.extend(timed)
+		texts.append(text)
+		offset += len(text)
+	return " ".join(texts), spans
+
+def _interpolate(tokens: Tuple[str, ...], start: float, end: float) -> List[Tuple[str, float, float]]:
+	'''Spreads start to end over tokens, by their length.'''
+	weights = [len(token) + 1 for token in tokens]
+	total = sum(weights)
+	timed = []
+	spent = 0
+	for token, weight in zip(tokens, weights):
+		timed.append((token, start + (end - start) * spent / total, start + (end - start) * (spent + weight) / total))
+		spent += weight
+	return timed
+
+def timed_words(text: str, offset: int, spans: List[TimedSpan], origin: Optional[float], arrivals: Optional[ChunkArrivals] = None, timeline: Optional[Callable[[float], float]] = None) -> List[WordNode]:
+	'''
+	WordNodes for the words of text, which is the slice of a
+	transcript starting at offset, timed from spans.
+
+	origin is when (since the epoch) the recording started,
+	words without times (or if there's no origin) are given
+	the current time instead. If the transcribed audio wasn't
+	all of the recording (eg silence was skipped, see
+	VoiceGate) timeline maps times in it to the recording's.
+	'''
+	now = time.time()
+	nodes: List[WordNode] = []
+	def untimed(piece: str):
+		nodes.extend(WordNode(token, now, now) for token in tokenize(piece))
+
+	if origin is None:
+		untimed(text)
+		return nodes
+
+	covered = offset
+	stop = offset + len(text)
+	for span in spans:
+		first, last = max(span.first, covered), min(span.last, stop)
+		if first >= last:
+			continue
+		if first > covered:
+			untimed(text[covered - offset:first - offset])
+		piece = text[first - offset:last - offset]
+		covered = last
+		if span.start is None or span.end is None:
+			untimed(piece)
+			continue
+
+		length = span.last - span.first
+		start = span.start + (span.end - span.start) * (first - span.first) / length
+		end = span.start + (span.end - span.start) * (last - span.first) / length
+		for token, audio_start, audio_end in _interpolate(tokenize(piece), start, end):
+			if timeline:
+				audio_start, audio_end = timeline(audio_start), timeline(audio_end)
+			node = WordNode(token, origin + audio_start, origin + audio_end)
+			node.audio_start = audio_start
+			node.audio_end = audio_end
+			node.arrived = arrivals.arrival_of(audio_end) if arrivals else None
+			nodes.append(node)
+	if covered < stop:
+		untimed(text[covered - offset:])
+	return nodes
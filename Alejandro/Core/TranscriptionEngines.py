@@ -0,0 +1,173 @@
+'''
+Loading the speech to text model(s) we transcribe with.
+
+Models take a long time to load (and a lot of memory), so
+nothing is loaded on import. The engine is loaded on a
+background thread the first time it's asked for (or when
+warm_up is called once the server has started), while
+everything that doesn't need it (the UI, typed text) keeps
+working, and status reports when it's ready.
+
+There are two: a small live one every session streams it's
+audio through (so commands are matched quickly), and a large
+one that re-transcribes what was said in the background (see
+Retranscriber) for accuracy where it matters, like dictation.
+The large one is only loaded once something needs it.
+
+Settings come from the environment (see
+TranscriptionSettings.from_env) so they can be changed per
+machine without editing code:
+
+	ALEJANDRO_WHISPER_MODEL=small ALEJANDRO_RETRANSCRIBE_MODEL=large-v3 python Alejandro/web/app.py
+'''
+from typing import Any, Callable, Dict, Optional
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import Future
+from threading import Thread, Lock
+import asyncio
+import time
+import os
+
+@dataclass
+class TranscriptionSettings:
+	'''How to set up WhisperLiveKit's TranscriptionEngine.'''
+	model_size: str = "base"
+	'''Whisper model to use, eg 'base', 'small', 'large-v3' (or a path, see model_path).'''
+	language: str = "en"
+	'''Language spoken, or 'auto' to detect it.'''
+	backend: str = "auto"
+	'''Whisper implementation, eg 'faster-whisper', 'mlx-whisper', 'whisper' ('auto' picks the best available).'''
+	backend_policy: str = "simulstreaming"
+	'''Streaming strategy, 'simulstreaming' or 'localagreement'.'''
+	min_chunk_size: float = 0.1
+	'''Seconds of audio to collect before transcribing more of it.'''
+	model_path: Optional[str] = None
+	'''A local model file or directory (or Hugging Face repo) to use instead of model_size.'''
+	diarization: bool = False
+	device: str = "auto"
+	'''Device to run models we load ourselves on (see Retranscriber), eg 'cuda' or 'cpu'.'''
+	compute_type: str = "default"
+	'''Precision to run models we load ourselves with, eg 'float16' or 'int8'.'''
+	enabled: bool = True
+	'''Whether to use the model at all (only re-transcription can be turned off).'''
+	extra: Dict[str, Any] = field(default_factory=dict)
+	'''Any other TranscriptionEngine arguments.'''
+
+	@staticmethod
+	def from_env(prefix: str = "ALEJANDRO_WHISPER_", **defaults: Any) -> 'TranscriptionSettings':
+		'''
+		Settings from prefix + MODEL, LANGUAGE, BACKEND,
+		BACKEND_POLICY, MIN_CHUNK_SIZE, MODEL_PATH, DIARIZATION,
+		DEVICE, COMPUTE_TYPE & ENABLED, defaulting any that
+		aren't set (to defaults, if given).
+		'''
+		settings = TranscriptionSettings(**defaults)
+		flag = lambda value: value.lower() in ("1", "true", "yes")
+		def get(name: str, default: Any, parse: Callable[[str], Any] = str) -> Any:
+			value = os.environ.get(prefix + name)
+			return default if value is None else parse(value)
+		settings.model_size = get("MODEL", settings.model_size)
+		settings.language = get("LANGUAGE", settings.language)
+		settings.backend = get("BACKEND", settings.backend)
+		settings.backend_policy = get("BACKEND_POLICY", settings.backend_policy)
+		settings.min_chunk_size = get("MIN_CHUNK_SIZE", settings.min_chunk_size, float)
+		settings.model_path = get("MODEL_PATH", settings.model_path)
+		settings.diarization = get("DIARIZATION", settings.diarization, flag)
+		settings.device = get("DEVICE", settings.device)
+		settings.compute_type = get("COMPUTE_TYPE", settings.compute_type)
+		settings.enabled = get("ENABLED", settings.enabled, flag)
+		return settings
+
+	def engine_kwargs(self) -> Dict[str, Any]:
+		'''Arguments for TranscriptionEngine.'''
+		kwargs = {
+			"model_size": self.model_size,
+			"lan": self.language,
+			"backend": self.backend,
+			"backend_policy": self.backend_policy,
+			"min_chunk_size": self.min_chunk_size,
+			"diarization": self.diarization,
+		}
+		if self.model_path:
+			kwargs["model_path"] = self.model_path
+		kwargs.update(self.extra)
+		return kwargs
+
+def _create_whisperlivekit_engine(settings: TranscriptionSettings) -> Any:
+	from whisperlivekit import TranscriptionEngine
+	return TranscriptionEngine(**settings.engine_kwargs())
+
+class EngineLoader:
+	'''
+	Loads an engine (create(settings)) once, on a background
+	thread, for whoever needs it.
+	'''
+	def __init__(self, settings: TranscriptionSettings, create: Callable[[TranscriptionSettings], Any] = _create_whisperlivekit_engine, name: str = "transcription"):
+		self.settings = settings
+		self.create = create
+		self.name = name
+		self._future: Optional[Future] = None
+		self._lock = Lock()
+		self._started: Optional[float] = None
+		self._load_seconds: Optional[float] = None
+
+	def warm_up(self) -> Future:
+		'''Starts loading the engine (if it isn't already), returning a future of it.'''
+		with self._lock:
+			if self._future is None:
+				self._future = Future()
+				self._started = time.time()
+				Thread(target=self._load, name=f"{self.name}_loader", daemon=True).start()
+			return self._future
+
+	def _load(self) -> None:
+		print(f"[ENGINE] Loading {self.name} engine: {self.settings.model_size} ({self.settings.backend}, {self.settings.language})", flush=True)
+		try:
+			engine = self.create(self.settings)
+		except Exception as e:
+			print(f"[ENGINE] Failed to load {self.name} engine: {e}", flush=True)
+			self._future.set_exception(e)
+			return
+		self._load_seconds = time.time() - self._started
+		print(f"[ENGINE] {self.name} engine ready after {self._load_seconds:.1f}s", flush=True)
+		self._future.set_result(engine)
+
+	def get(self, timeout: Optional[float] = None) -> Any:
+		'''The engine, blocking until it's loaded.'''
+		return self.warm_up().result(timeout)
+
+	async def aget(self) -> Any:
+		'''The engine, without blocking the event loop while it loads.'''
+		return await asyncio.wrap_future(self.warm_up())
+
+	@property
+	def ready(self) -> bool:
+		future = self._future
+		return future is not None and future.done() and future.exception() is None
+
+	def status(self) -> Dict[str, Any]:
+		'''Whether the engine is 'not_loaded', 'loading', 'ready' or 'failed' (and why), with it's settings.'''
+		future = self._future
+		status: Dict[str, Any] = {"settings": asdict(self.settings)}
+		if future is None:
+			status["state"] = "not_loaded"
+		elif not future.done():
+			status["state"] = "loading"
+			status["loading_seconds"] = round(time.time() - self._started, 1)
+		elif future.exception() is not None:
+			status["state"] = "failed"
+			status["error"] = str(future.exception())
+		else:
+			status["state"] = "ready"
+			status["load_seconds"] = round(self._load_seconds, 1)
+		return status
+
+def _create_faster_whisper_transcriber(settings: TranscriptionSettings) -> Any:
+	from Alejandro.Core.Retranscriber import FasterWhisperTranscriber
+	return FasterWhisperTranscriber(settings.model_path or settings.model_size, settings.language, settings.device, settings.compute_type)
+
+live_engine = EngineLoader(TranscriptionSettings.from_env(), name="live")
+'''The engine every session's live transcription shares.'''
+
+retranscribe_engine = EngineLoader(TranscriptionSettings.from_env("ALEJANDRO_RETRANSCRIBE_", model_size="large-v3"), create=_create_faster_whisper_transcriber, name="retranscribe")
+'''The (large, local) model every session's words are re-transcribed with (an UtteranceTranscriber).'''
@@ -0,0 +1,209 @@
+'''
+Keeping silence from the transcription model.
+
+Sessions listen for as long as they're open (the Welcome
+screen waits for "hey alejandro" indefinitely), and most of
+that audio is silence the model spends it's time on for
+nothing. A VoiceGate looks at the energy of each 20ms frame
+of raw PCM (see PCM_MIME in WhisperLiveKitWordStream) and
+only lets speech through, with padding_ms before it and
+hangover_ms after it so the model still hears words start
+and trail off.
+
+Only what the model hears is gated, the recording on disk is
+always complete. Since the model's audio is then shorter than
+the recording, recording_seconds maps times in it back to
+times in the recording.
+
+A gate can also withhold speech from the model altogether
+until it's released, when the model's given what was said in
+the last withhold_ms (eg while a WakeSpotter listens for the
+wake phrase instead).
+
+	ALEJANDRO_VAD=true               # gate raw PCM audio (false to give the model everything)
+	ALEJANDRO_VAD_THRESHOLD_DB=-45   # frames quieter than this (dBFS) are silence
+	ALEJANDRO_VAD_MARGIN_DB=10       # or quieter than this above the room's noise
+	ALEJANDRO_VAD_HANGOVER_MS=500    # speech kept going after the last loud frame
+	ALEJANDRO_VAD_PADDING_MS=250     # silence kept from before speech starts
+
+voice_activity() reports how much audio has been skipped.
+'''
+from typing import Dict, List, Optional, Tuple
+from bisect import bisect_right
+from collections import deque
+from threading import Lock
+from .RecordingWriter import PCM_SAMPLE_RATE
+import numpy as np
+import os
+
+_totals = {"recordings": 0, "seconds": 0.0, "skipped_seconds": 0.0}
+_totals_lock = Lock()
+
+def voice_activity() -> Dict[str, float]:
+	'''How much audio finished recordings had, and how much of it (and what fraction) was skipped as silence.'''
+	with _totals_lock:
+		totals = dict(_totals)
+	totals["skipped_fraction"] = totals["skipped_seconds"] / totals["seconds"] if totals["seconds"] else 0.0
+	return totals
+
+class VoiceGate:
+	'''
+	Passes the speech in a recording's raw PCM (16 bit mono at
+	sample_rate) on to the model, dropping the silence between.
+
+	A frame is speech if it's louder than threshold_db (dBFS)
+	and margin_db above the noise floor (how loud the room's
+	been, see noise_db).
+	'''
+	enabled: bool = os.environ.get("ALEJANDRO_VAD", "true").lower() not in ("0", "false", "off", "no")
+	threshold_db: float = float(os.environ.get("ALEJANDRO_VAD_THRESHOLD_DB", -45))
+	margin_db: float = float(os.environ.get("ALEJANDRO_VAD_MARGIN_DB", 10))
+	hangover_ms: float = float(os.environ.get("ALEJANDRO_VAD_HANGOVER_MS", 500))
+	padding_ms: float = float(os.environ.get("ALEJANDRO_VAD_PADDING_MS", 250))
+	withhold_ms: float = 3000
+	frame_ms: float = 20
+
+	def __init__(self, threshold_db: Optional[float] = None, margin_db: Optional[float] = None, hangover_ms: Optional[float] = None, padding_ms: Optional[float] = None, enabled: Optional[bool] = None, sample_rate: int = PCM_SAMPLE_RATE):
+		if enabled is not None:
+			self.enabled = enabled
+		if threshold_db is not None:
+			self.threshold_db = threshold_db
+		if margin_db is not None:
+			self.margin_db = margin_db
+		if hangover_ms is not None:
+			self.hangover_ms = hangover_ms
+		if padding_ms is not None:
+			self.padding_ms = padding_ms
+		self.sample_rate = sample_rate
+		self.frame_bytes = int(sample_rate * self.frame_ms / 1000) * 2
+		self.noise_db = self.threshold_db - self.margin_db
+		'''How loud the room is when no one's speaking (tracking the quietest frames).'''
+
+		self.frames = 0
+		'''Frames seen so far.'''
+		self.passed = 0
+		'''Frames the model was given.'''
+		self.finished = False
+
+		self._partial = b""
+		self._held: deque = deque(maxlen=round(self.padding_ms / self.frame_ms))
+		'''The latest silent frames (and where they are in the recording), given to the model if speech follows them.'''
+		self._withholding = False
+		self._withheld: deque = deque(maxlen=round(self.withhold_ms / self.frame_ms))
+		self._hangover_frames = round(self.hangover_ms / self.frame_ms)
+		self._quiet_for: Optional[int] = None
+		'''Frames since the last speech, None when it's been longer than hangover_ms.'''
+
+		# Where the model's audio jumps ahead in the recording, both in frames:
+		self._recording_frames: List[int] = [0]
+		self._model_frames: List[int] = [0]
+
+	@property
+	def speaking(self) -> bool:
+		return self._quiet_for is not None
+
+	@property
+	def withholding(self) -> bool:
+		'''Whether speech is being kept from the model (until release), rather than passed on.'''
+		return self._withholding
+
+	@withholding.setter
+	def withholding(self, withholding: bool) -> None:
+		if not withholding:
+			# (Not released, so it's skipped)
+			self._withheld.clear()
+		self._withholding = withholding
+
+	@property
+	def skipped_fraction(self) -> float:
+		'''How much of the recording so far the model hasn't been given.'''
+		return 1 - self.passed / self.frames if self.frames else 0.0
+
+	def process(self, pcm: bytes) -> bytes:
+		'''The audio (if any) from the next chunk of the recording to give the model.'''
+		data = self._partial + pcm
+		count = len(data) // self.frame_bytes
+		self._partial = data[count * self.frame_bytes:]
+		if not count:
+			return b""
+
+		if self.enabled:
+			samples = np.frombuffer(data, dtype="<i2", count=count * self.frame_bytes // 2).reshape(count, -1)
+			power = np.mean(np.square(samples, dtype=np.float64), axis=1) / (32768.0 ** 2)
+			levels = 10 * np.log10(power + 1e-10)
+		else:
+			levels = np.zeros(count)
+
+		out: List[bytes] = []
+		for i, db in enumerate(levels):
+			frame = (self.frames, data[i * self.frame_bytes:(i + 1) * self.frame_bytes])
+			self.frames += 1
+			if not self.enabled or (db >= self.threshold_db and db >= self.noise_db + self.margin_db):
+				if not self.speaking:
+					for held in self._held:
+						self._emit(held, out)
+					self._held.clear()
+				self._quiet_for = 0
+			elif self.speaking:
+				self._quiet_for += 1
+				if self._quiet_for > self._hangover_frames:
+					self._quiet_for = None
+			if self.enabled:
+				# (Falling quickly to quieter rooms, rising slowly enough that speech doesn't raise it much)
+				self.noise_db += (db - self.noise_db) * (0.2 if db < self.noise_db else 0.002)
+			if self.speaking:
+				self._emit(frame, out)
+			else:
+				self._held.append(frame)
+		return b"".join(out)
+
+	def _emit(self, frame: Tuple[int, bytes], out: List[bytes]) -> None:
+		'''Gives the model a frame (the index'th of the recording), or withholds it.'''
+		if self._withholding:
+			self._withheld.append(frame)
+			return
+		index, data = frame
+		if index - self._recording_frames[-1] != self.passed - self._model_frames[-1]:
+			# (The model's audio carries on from further into the recording)
+			self._recording_frames.append(index)
+			self._model_frames.append(self.passed)
+		out.append(data)
+		self.passed += 1
+
+	def release(self) -> bytes:
+		'''Stops withholding, returning the speech withheld in the last withhold_ms of the recording for the model.'''
+		self._withholding = False
+		out: List[bytes] = []
+		recent = self.frames - self._withheld.maxlen
+		for frame in self._withheld:
+			if frame[0] >= recent:
+				self._emit(frame, out)
+		self._withheld.clear()
+		return b"".join(out)
+
+	def flush(self) -> bytes:
+		'''The rest of the recording's audio for the model (the partial frame, if it's speech), once it's over.'''
+		rest = self._partial if self.speaking and not self._withholding else b""
+		self._partial = b""
+		if not self.finished:
+			self.finished = True
+			seconds = self.frames * self.frame_ms / 1000
+			with _totals_lock:
+				_totals["recordings"] += 1
+				_totals["seconds"] += seconds
+				_totals["skipped_seconds"] += seconds * self.skipped_fraction
+		return rest
+
+	def recording_seconds(self, model_seconds: float) -> float:
+		'''Where audio model_seconds into what the model was given is in the recording.'''
+		model_frames = model_seconds * 1000 / self.frame_ms
+		i = max(0, bisect_right(self._model_frames, model_frames) - 1)
+		return (self._recording_frames[i] + model_frames - self._model_frames[i]) * self.frame_ms / 1000
+
+	def stats(self) -> Dict[str, float]:
+		return {
+			"seconds": self.frames * self.frame_ms / 1000,
+			"passed_seconds": self.passed * self.frame_ms / 1000,
+			"skipped_fraction": round(self.skipped_fraction, 3),
+			"noise_db": round(self.noise_db, 1),
+		}
@@ -0,0 +1,395 @@
+'''
+Listening for the wake phrase without transcribing.
+
+While a session's idle (it's screen only has wake controls,
+eg the Welcome screen's "hey alejandro") there's only one
+thing worth hearing, so rather than the transcription model
+a WakeSpotter listens: it compares the audio to recordings of
+the wake phrase (templates) with dynamic time warping over
+MFCCs, about a millisecond per template, and only while
+there's speech.
+
+When it hears something like the wake phrase it hands over to
+the transcription model, giving it the last few seconds of
+speech (see VoiceGate.withholding), so the model has the final
+say on whether it was said and the session wakes up exactly
+as it would have otherwise. For handover_seconds after that
+the model keeps listening.
+
+So templates that don't match the speaker's voice (or room)
+can't lock the session out, it also hands over after every
+fallback_seconds of speech it hasn't heard the wake phrase
+in. If the model hears it then, it's learnt as a new template.
+
+Templates are learnt from the sessions' own recordings: each
+time the model hears a wake control's phrase, the spotter saves
+it's audio to WakeSpotter.directory (keeping the latest
+max_templates). Until there are some the model listens as
+usual. They can also be taken from saved recordings:
+
+	python -m Alejandro.Core.WakePhrase enroll <recording> <start seconds> <end seconds>
+	python -m Alejandro.Core.WakePhrase scan <recording>   # where it hears the wake phrase, to tune the threshold
+
+	ALEJANDRO_WAKE_SPOTTER=true          # false to always transcribe
+	ALEJANDRO_WAKE_THRESHOLD=0.4         # how close (0 to 2, lower is closer) audio has to be to a template
+	ALEJANDRO_WAKE_HANDOVER_SECONDS=10   # how long the model listens after the spotter hears it
+	ALEJANDRO_WAKE_FALLBACK_SECONDS=20   # speech without the wake phrase before the model listens anyway
+
+wake_metrics keeps how long checks take ('wake_check').
+'''
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from datetime import datetime
+from .RecordingWriter import PCM_SAMPLE_RATE
+from .Latency import LatencyTracker
+import argparse
+import glob
+import numpy as np
+import os
+import time
+import wave
+
+FRAME = 400
+'''Samples per MFCC frame (25ms).'''
+HOP = 160
+'''Samples between MFCC frames (10ms).'''
+FFT_SIZE = 512
+MEL_BANDS = 26
+CEPSTRA = 12
+
+def _mel_filters() -> np.ndarray:
+	def mel(hz):
+		return 2595 * np.log10(1 + hz / 700)
+	edges = 700 * (10 ** (np.linspace(mel(60), mel(PCM_SAMPLE_RATE / 2 - 400), MEL_BANDS + 2) / 2595) - 1)
+	bins = np.fft.rfftfreq(FFT_SIZE, 1 / PCM_SAMPLE_RATE)
+	filters = np.zeros((MEL_BANDS, len(bins)))
+	for band in range(MEL_BANDS):
+		low, center, high = edges[band:band + 3]
+		filters[band] = np.clip(np.minimum((bins - low) / (center - low), (high - bins) / (high - center)), 0, None)
+	return filters
+
+_window = np.hamming(FRAME)
+_filters = _mel_filters()
+_dct = np.cos(np.pi / MEL_BANDS * (np.arange(MEL_BANDS) + 0.5)[None, :] * np.arange(1, CEPSTRA + 1)[:, None])
+'''DCT-II rows 1 to CEPSTRA (without the 0th, the loudness, so templates match however loud it's said).'''
+
+wake_metrics = LatencyTracker()
+'''How long checking for the wake phrase takes ('wake_check').'''
+
+_detections = 0
+_fallbacks = 0
+_learner: Optional[ThreadPoolExecutor] = None
+
+def features(samples: np.ndarray) -> np.ndarray:
+	'''The MFCCs (scaled to unit length) of every whole frame of samples (mono at PCM_SAMPLE_RATE, float or int16).'''
+	samples = np.asarray(samples, dtype=np.float64)
+	if len(samples) < FRAME:
+		return np.zeros((0, CEPSTRA))
+	frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME)[::HOP] * _window
+	power = np.abs(np.fft.rfft(frames, FFT_SIZE)) ** 2
+	cepstra = np.log(power @ _filters.T + 1e-10) @ _dct.T
+	return cepstra / (np.linalg.norm(cepstra, axis=1, keepdims=True) + 1e-10)
+
+def match_costs(template: np.ndarray, query: np.ndarray) -> np.ndarray:
+	'''
+	For each frame of query, how far (the mean cosine distance
+	per template frame) the closest alignment of template ending
+	there is, infinite where none can.
+
+	Alignments can start anywhere and be from half to twice as
+	fast as the template.
+	'''
+	cost = 1 - template @ query.T
+	before, last = None, cost[0].copy()
+	for i in range(1, len(template)):
+		best = np.full(len(last), np.inf)
+		best[1:] = last[:-1]
+		best[2:] = np.minimum(best[2:], last[:-2])
+		if before is not None:
+			best[1:] = np.minimum(best[1:], before[:-1] + cost[i - 1, 1:])
+		before, last = last, cost[i] + best
+	return last / len(template)
+
+def trim(samples: np.ndarray, below_db: float = 35) -> np.ndarray:
+	'''samples without the frames at either end more than below_db quieter than the loudest.'''
+	count = len(samples) // HOP
+	if not count:
+		return samples
+	levels = 10 * np.log10(np.mean(np.square(samples[:count * HOP].reshape(count, HOP), dtype=np.float64), axis=1) + 1e-12)
+	loud = np.flatnonzero(levels >= levels.max() - below_db)
+	return samples[loud[0] * HOP:(loud[-1] + 1) * HOP]
+
+class WakeTemplates:
+	'''
+	The recordings of wake phrases spotters listen for, shared
+	by every session, saved (as WAVs) in directory.
+	'''
+	max_templates: int = int(os.environ.get("ALEJANDRO_WAKE_TEMPLATES", 10))
+	min_seconds: float = 0.3
+	max_seconds: float = 3.0
+
+	def __init__(self, directory: str, max_templates: Optional[int] = None):
+		self.directory = directory
+		if max_templates is not None:
+			self.max_templates = max_templates
+		self._lock = Lock()
+		self._paths: List[str] = []
+		self._templates: List[np.ndarray] = []
+		for path in sorted(glob.glob(os.path.join(directory, "*.wav")))[-self.max_templates:]:
+			try:
+				with wave.open(path) as f:
+					samples = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+				self._paths.append(path)
+				self._templates.append(features(samples / 32768.0))
+			except (OSError, wave.Error, EOFError) as e:
+				print(f"[WAKE] Couldn't load wake phrase {path}: {e}", flush=True)
+
+	def __len__(self) -> int:
+		return len(self._templates)
+
+	@property
+	def templates(self) -> List[np.ndarray]:
+		'''Each template's features (see features), the oldest first.'''
+		with self._lock:
+			return list(self._templates)
+
+	@property
+	def longest(self) -> int:
+		'''Frames in the longest template.'''
+		return max((len(template) for template in self.templates), default=0)
+
+	def add(self, samples: np.ndarray) -> Optional[str]:
+		'''
+		Saves samples (float, mono at PCM_SAMPLE_RATE) of the wake
+		phrase being said as a template, forgetting (and deleting)
+		the oldest past max_templates. Returns where it's saved,
+		or None if (once trimmed) it's too short or long to be one.
+		'''
+		samples = trim(np.asarray(samples, dtype=np.float64))
+		seconds = len(samples) / PCM_SAMPLE_RATE
+		if not self.min_seconds <= seconds <= self.max_seconds:
+			return None
+		os.makedirs(self.directory, exist_ok=True)
+		path = os.path.join(self.directory, f"wake_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.wav")
+		with wave.open(path, "wb") as f:
+			f.setnchannels(1)
+			f.setsampwidth(2)
+			f.setframerate(PCM_SAMPLE_RATE)
+			f.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+		template = features(samples)
+		with self._lock:
+			self._paths.append(path)
+			self._templates.append(template)
+			forgotten = self._paths[:-self.max_templates]
+			self._paths = self._paths[-self.max_templates:]
+			self._templates = self._templates[-self.max_templates:]
+		for old in forgotten:
+			try:
+				os.remove(old)
+			except OSError:
+				pass
+		print(f"[WAKE] Learnt the wake phrase ({seconds:.2f}s) as {path}", flush=True)
+		return path
+
+_templates: Optional[WakeTemplates] = None
+_templates_lock = Lock()
+
+def get_wake_templates() -> WakeTemplates:
+	'''The wake phrase templates shared by every session, loaded from WakeSpotter.directory on first use.'''
+	global _templates
+	with _templates_lock:
+		if _templates is None:
+			_templates = WakeTemplates(WakeSpotter.directory)
+		return _templates
+
+class WakeSpotter:
+	'''
+	Listens to a session's raw PCM audio for the wake phrase,
+	while it's active (it's enabled, has templates and the
+	session is idle, see wanted).
+
+	It keeps the last keep_seconds of the recording, so what
+	the model hears of the wake phrase can be learnt (enroll,
+	or learn to do it in the background).
+
+	hear is called with the recording's audio, and learn by
+	the Application as it processes words, so they share the
+	spotter's state under a lock.
+	'''
+	enabled: bool = os.environ.get("ALEJANDRO_WAKE_SPOTTER", "true").lower() not in ("0", "false", "off", "no")
+	threshold: float = float(os.environ.get("ALEJANDRO_WAKE_THRESHOLD", 0.4))
+	handover_seconds: float = float(os.environ.get("ALEJANDRO_WAKE_HANDOVER_SECONDS", 10))
+	fallback_seconds: float = float(os.environ.get("ALEJANDRO_WAKE_FALLBACK_SECONDS", 20))
+	directory: str = os.path.expanduser("~/Documents/Alejandro/WakePhrases")
+	keep_seconds: float = 10
+
+	def __init__(self, templates: Optional[WakeTemplates] = None, threshold: Optional[float] = None):
+		self.templates = templates if templates is not None else get_wake_templates()
+		if threshold is not None:
+			self.threshold = threshold
+		self.wanted: Callable[[], bool] = lambda: False
+		'''Whether the session's idle, waiting only for a wake phrase (set by the Application).'''
+		self.last_score: Optional[float] = None
+		'''How close the last check came to a template.'''
+		self._lock = Lock()
+		'''Held while using the kept audio and features.'''
+		self.start_recording()
+
+	def start_recording(self) -> None:
+		'''Forgets the last recording's audio, for a new one.'''
+		with self._lock:
+			self._audio = bytearray()
+			self._audio_start = 0
+			'''Which sample of the recording _audio starts at.'''
+			self._features: Optional[np.ndarray] = None
+			self._next_frame = 0
+			'''Which sample of the recording the next frame of _features starts at.'''
+			self._unchecked = 0
+			'''How many of the latest frames of _features haven't been checked for the end of the wake phrase.'''
+			self._unmatched = 0.0
+			'''Seconds of speech checked since the spotter became active, or last handed over.'''
+			self._handover_until = 0.0
+
+	@property
+	def active(self) -> bool:
+		'''Whether the spotter is listening for the wake phrase (so the model needn't).'''
+		return self.enabled and len(self.templates) > 0 and time.monotonic() >= self._handover_until and self.wanted()
+
+	def hear(self, pcm: bytes, check: bool = True) -> bool:
+		'''
+		Keeps the recording's next chunk of audio, and (while
+		active) checks whether the wake phrase was just said (if
+		check, eg only while there's speech), returning whether
+		it was, in which case it's handed over to the model.
+
+		It's also handed over (returning True) once there's been
+		fallback_seconds of speech without it.
+		'''
+		with self._lock:
+			return self._hear(pcm, check)
+
+	def _hear(self, pcm: bytes, check: bool) -> bool:
+		self._audio += pcm
+		excess = len(self._audio) - int(self.keep_seconds * PCM_SAMPLE_RATE) * 2
+		if excess > 0:
+			excess -= excess % 2
+			del self._audio[:excess]
+			self._audio_start += excess // 2
+		end = self._audio_start + len(self._audio) // 2
+
+		if not self.active:
+			self._features = None
+			self._unmatched = 0.0
+			return False
+		if self._features is None:
+			# (Starting from this chunk, anything before was heard by the model)
+			self._features = np.zeros((0, CEPSTRA))
+			self._next_frame = max(self._audio_start, end - len(pcm) // 2)
+			self._unchecked = 0
+		count = max(0, (end - self._next_frame - FRAME) // HOP + 1)
+		if count:
+			first = (self._next_frame - self._audio_start) * 2
+			samples = np.frombuffer(bytes(self._audio[first:first + ((count - 1) * HOP + FRAME) * 2]), dtype="<i2")
+			window = 2 * self.templates.longest
+			self._features = np.concatenate((self._features, features(samples / 32768.0)))[-window:]
+			self._next_frame += count * HOP
+			self._unchecked += count
+		if not check or not self._unchecked:
+			return False
+
+		start = time.perf_counter()
+		newest = min(self._unchecked, len(self._features))
+		self._unchecked = 0
+		self._unmatched += len(pcm) / 2 / PCM_SAMPLE_RATE
+		scores = [match_costs(template, self._features)[-newest:].min() for template in self.templates.templates if len(template) <= 2 * len(self._features)]
+		wake_metrics.add("wake_check", (time.perf_counter() - start) * 1000)
+		if scores:
+			self.last_score = float(min(scores))
+		global _detections, _fallbacks
+		if scores and self.last_score <= self.threshold:
+			_detections += 1
+			print(f"[WAKE] Heard the wake phrase (score {self.last_score:.3f}), handing over to transcription", flush=True)
+		elif self._unmatched >= self.fallback_seconds:
+			# (In case it's the templates that are wrong, if the model hears it it's learnt)
+			_fallbacks += 1
+			print(f"[WAKE] No wake phrase in {self._unmatched:.0f}s of speech, handing over to transcription anyway", flush=True)
+		else:
+			return False
+		self._handover_until = time.monotonic() + self.handover_seconds
+		self._features = None
+		self._unmatched = 0.0
+		return True
+
+	def enroll(self, start: float, end: float, padding: float = 0.15) -> Optional[str]:
+		'''
+		Learns the wake phrase from what was said start to end
+		seconds into the recording (if it's still kept, see
+		keep_seconds), returning where it's saved.
+		'''
+		with self._lock:
+			first = int((start - padding) * PCM_SAMPLE_RATE) - self._audio_start
+			last = min(int((end + padding) * PCM_SAMPLE_RATE) - self._audio_start, len(self._audio) // 2)
+			if first < 0 or last <= first:
+				return None
+			samples = np.frombuffer(bytes(self._audio[first * 2:last * 2]), dtype="<i2")
+		return self.templates.add(samples / 32768.0)
+
+	def learn(self, start: float, end: float) -> Future:
+		'''Like enroll, but on a thread shared by every spotter rather than the caller's.'''
+		global _learner
+		with _templates_lock:
+			if _learner is None:
+				_learner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wake_learner")
+		return _learner.submit(self.enroll, start, end)
+
+def wake_spotting() -> Dict[str, float]:
+	'''How long checks for the wake phrase take, how many templates there are, how often it's been heard and how often handed over without it.'''
+	summary = wake_metrics.summary()
+	summary["templates"] = len(get_wake_templates())
+	summary["detections"] = _detections
+	summary["fallbacks"] = _fallbacks
+	return summary
+
+def _read_recording(path: str) -> np.ndarray:
+	from .Retranscriber import RecordingFileAudio, RecordingPCMAudio
+	if path.endswith(".pcm"):
+		return RecordingPCMAudio(path).read(0, os.path.getsize(path) / 2 / PCM_SAMPLE_RATE)
+	return RecordingFileAudio(path).read(0, 24 * 60 * 60)
+
+def main(argv: Optional[List[str]] = None) -> None:
+	parser = argparse.ArgumentParser(description="Learns the wake phrase from saved recordings, or finds it in them.")
+	parser.add_argument("--directory", default=WakeSpotter.directory, help="Where wake phrase templates are kept")
+	commands = parser.add_subparsers(dest="command", required=True)
+	enroll = commands.add_parser("enroll", help="Learn the wake phrase from start to end seconds into a recording")
+	enroll.add_argument("recording")
+	enroll.add_argument("start", type=float)
+	enroll.add_argument("end", type=float)
+	scan = commands.add_parser("scan", help="Print where in a recording the wake phrase is heard")
+	scan.add_argument("recording")
+	scan.add_argument("--threshold", type=float, default=WakeSpotter.threshold)
+	args = parser.parse_args(argv)
+
+	templates = WakeTemplates(args.directory)
+	samples = _read_recording(args.recording)
+	if args.command == "enroll":
+		path = templates.add(samples[int(args.start * PCM_SAMPLE_RATE):int(args.end * PCM_SAMPLE_RATE)])
+		print(path or "Too short or long to be the wake phrase")
+		return
+
+	if not len(templates):
+		parser.error(f"No wake phrases in {args.directory} yet, enroll some first")
+	heard = features(samples)
+	costs = np.min([match_costs(template, heard) for template in templates.templates], axis=0)
+	frame = 0
+	while frame < len(costs):
+		if costs[frame] <= args.threshold:
+			# (The closest end of the match, rather than every frame of it)
+			best = frame + int(np.argmin(costs[frame:frame + 50]))
+			print(f"{best * HOP / PCM_SAMPLE_RATE:.2f}s: {costs[best]:.3f}")
+			frame = best + 50
+		else:
+			frame += 1
+
+if __name__ == "__main__":
+	main()
@@ -1,11 +1,22 @@
-from typing import Optional, Iterator, Dict, List
-from .WordStream import WordStream, WordNode
+from typing import Optional, Iterator, Dict, List, Tuple, AsyncGenerator, Any, Callable
+from .WordStream import QueuedWordStream, WordNode
+from .TranscriptTiming import timed_words
+from .LiveTranscript import LiveTranscript, AdaptiveStability
+from .Latency import ChunkArrivals, LatencyTracker
+from .EventLoop import EventLoopThread, shared_event_loop
+from .AudioProcessorPool import AudioProcessorPool
+from .FrontDataArchive import FrontDataArchive
+from .AudioIngest import serve_audio_stream
+from .VoiceActivity import VoiceGate, voice_activity
+from .WakePhrase import WakeSpotter, wake_spotting
+from .RecordingWriter import RecordingWriter, recording_metrics, buffer_depth, encode_pcm, PCM_SAMPLE_RATE
+from .TranscriptionEngines import live_engine, retranscribe_engine
+from .Retranscriber import Retranscriber, RecordingFileAudio, RecordingPCMAudio, DeferredTranscriber
 from flask import Blueprint, jsonify, Response, request, Flask, render_template
 from flask_socketio import SocketIO
-from io import BufferedWriter
-from queue import Queue, Empty
+from concurrent.futures import Future
 from datetime import datetime, timedelta
-import json
+import copy
 import os
 import time
 import threading
@@ -19,12 +30,62 @@ logging.getLogger('whisperlivekit').setLevel(logging.WARNING)
 logging.getLogger('werkzeug').setLevel(logging.WARNING)
 logging.getLogger('httpx').setLevel(logging.WARNING)
 
-# Import WhisperLiveKit components
-from whisperlivekit import TranscriptionEngine, AudioProcessor
+async def _create_audio_processor(pcm: bool = False) -> Tuple[Any, AsyncGenerator]:
+	'''
+	A new AudioProcessor (using the live TranscriptionEngine,
+	once it's loaded) ready for audio, and it's results.
+
+	A pcm one takes raw PCM (see PCM_MIME) as is, where any other
+	decodes what it's given through an ffmpeg process of it's own.
+	'''
+	transcription_engine = await live_engine.aget()
+	from whisperlivekit import AudioProcessor
+	if pcm:
+		# (Whether to expect PCM is an engine argument, so it's given a copy of the shared engine's with it set)
+		transcription_engine = copy.copy(transcription_engine)
+		transcription_engine.args = copy.copy(transcription_engine.args)
+		transcription_engine.args.pcm_input = True
+	audio_processor = await asyncio.to_thread(
+		AudioProcessor,
+		transcription_engine=transcription_engine
+	)
+	results_generator = await audio_processor.create_tasks()
+	return audio_processor, results_generator
 
-_transcription_engine = TranscriptionEngine(model="large-v3", diarization=False, lan="en")
+_processor_pools: Dict[bool, AudioProcessorPool] = {}
+
+def get_processor_pool(pcm: bool = True) -> AudioProcessorPool:
+	'''
+	The pool of AudioProcessors for raw PCM (or, if not pcm,
+	encoded audio like webm) shared by every session, filled in
+	the background once the first session is made.
+
+	It's size is WhisperLiveKitWordStream.processor_pool_size
+	(or ALEJANDRO_AUDIO_PROCESSOR_POOL_SIZE in the environment)
+	for PCM, and container_processor_pool_size (or
+	ALEJANDRO_CONTAINER_PROCESSOR_POOL_SIZE) for encoded audio.
+	'''
+	if pcm not in _processor_pools:
+		size = WhisperLiveKitWordStream.processor_pool_size if pcm else WhisperLiveKitWordStream.container_processor_pool_size
+		_processor_pools[pcm] = AudioProcessorPool(lambda: _create_audio_processor(pcm), shared_event_loop("transcription"), size)
+		_processor_pools[pcm].fill()
+	return _processor_pools[pcm]
+
+def processors_ready() -> int:
+	'''How many AudioProcessors (of either kind) are ready for sessions to start listening with.'''
+	return sum(get_processor_pool(pcm).ready for pcm in (True, False))
+
+PCM_MIME = "audio/pcm"
+'''
+Raw 16kHz mono PCM16 (little endian) audio, which WhisperLiveKit
+transcribes without decoding it first (and so without an ffmpeg
+process per session). The recording's kept raw while it's made
+and compressed once it's done (see encode_pcm).
+'''
+PCM_BYTES_PER_SECOND = PCM_SAMPLE_RATE * 2
 
 mime_to_config = {
+	PCM_MIME: ("pcm", "pcm_s16le"),
 	"audio/webm": ("webm", "opus"),
 	"audio/ogg": ("ogg", "opus"),
 	"audio/wav": ("wav", "pcm_s16le"),
@@ -32,7 +93,7 @@ mime_to_config = {
 	"audio/aac": ("aac", "aac"),
 }
 
-class WhisperLiveKitWordStream(WordStream):
+class WhisperLiveKitWordStream(QueuedWordStream):
 	bp = Blueprint('WhisperLiveKitWordStream', __name__)
 	socketio: SocketIO = SocketIO(
 		ping_interval=25,  # Increase from default 25s to reduce polling
@@ -40,6 +101,14 @@ class WhisperLiveKitWordStream(WordStream):
 		max_http_buffer_size=10000000  # 10MB for larger chunks
 	)
 	streams: Dict[str, 'WhisperLiveKitWordStream'] = {}
+	processor_pool_size: int = int(os.environ.get("ALEJANDRO_AUDIO_PROCESSOR_POOL_SIZE", 2))
+	'''How many (raw PCM) AudioProcessors to keep ready for sessions to start listening with.'''
+	container_processor_pool_size: int = int(os.environ.get("ALEJANDRO_CONTAINER_PROCESSOR_POOL_SIZE", 0))
+	'''How many AudioProcessors for encoded audio (each with an ffmpeg process) to keep ready, by default they're made when needed.'''
+	listening_latency = LatencyTracker()
+	'''How long after starting to listen sessions get an AudioProcessor ('processor_ready') and their first word ('first_word').'''
+	frontdata_sampling: str = os.environ.get("ALEJANDRO_FRONTDATA_SAMPLING", "changed")
+	'''Which WhisperLiveKit results to archive in WhisperLiveKitOutput, 'all', 'changed' or 'off' (see FrontDataArchive).'''
 
 	def __init__(
 		self,
@@ -52,8 +121,10 @@ class WhisperLiveKitWordStream(WordStream):
 		stored in.
 
 		Note: TranscriptionEngine settings (model, diarization, language) are
-		configured at module import time and shared across all instances.
+		shared across all instances, see TranscriptionEngines.
 		'''
+		super().__init__()
+		
 		# Setup a word stream for each session:
 		self.session_id = session_id
 		WhisperLiveKitWordStream.streams[session_id] = self
@@ -68,41 +139,79 @@ class WhisperLiveKitWordStream(WordStream):
 			os.makedirs(self.wlk_output_dir, exist_ok=True)
 		else:
 			self.wlk_output_dir = None
+		self.frontdata_archive: Optional[FrontDataArchive] = None
+		'''Where WhisperLiveKit's results are kept for analysis, written in the background.'''
+		if self.wlk_output_dir and WhisperLiveKitWordStream.frontdata_sampling != "off":
+			self.frontdata_archive = FrontDataArchive(self.wlk_output_dir, session_id, sampling=WhisperLiveKitWordStream.frontdata_sampling)
 
 		# AudioProcessor (created per-session, uses shared TranscriptionEngine)
-		self.audio_processor: Optional['AudioProcessor'] = None
-
-		# Async processing:
-		self.audio_chunk_queue: Queue = Queue()  # Queue for audio chunks to process
-		self.processing_loop: Optional[asyncio.AbstractEventLoop] = None
-		self.processing_thread: Optional[threading.Thread] = None
+		self.audio_processor: Optional[Any] = None
+
+		# Async processing (on the transcription loop shared by every session):
+		self.processing_loop: EventLoopThread = shared_event_loop("transcription")
+		get_processor_pool()
+
+		# The large model that corrects what the live (small) one heard, when wanted (see Retranscriber):
+		if retranscribe_engine.settings.enabled:
+			self.retranscriber = Retranscriber(DeferredTranscriber(retranscribe_engine.get), loop=self.processing_loop)
+		# What listens for the wake phrase instead of the model while the session's idle (see WakeSpotter):
+		if save_directory and WakeSpotter.enabled:
+			self.wake_spotter = WakeSpotter()
+		self.audio_chunk_queue: Optional[asyncio.Queue] = None
+		'''The current recording's audio chunks waiting to be processed, then None once it ends.'''
+		self.audio_bytes_queued = 0
+		self.audio_bytes_processed = 0
+		'''How much of the current recording's audio has been queued, and handed to it's AudioProcessor (see audio_backlog).'''
+		self.pcm_input = False
+		'''Whether the current recording is raw PCM (see PCM_MIME).'''
+		self.audio_bytes_received = 0
+		'''How much of the current recording has arrived (for raw PCM, how we know how long it is).'''
+		self.voice_gate: Optional[VoiceGate] = None
+		'''What keeps the current recording's silence (and while the wake spotter listens, everything) from the model (raw PCM only, see VoiceGate).'''
+		self.processing_task: Optional[Future] = None
+		'''(Concurrent) future of the current recording's processing, done once it's transcribed.'''
 		self.results_task: Optional[asyncio.Task] = None
+		self.finalization_timer: Optional[asyncio.TimerHandle] = None
+		'''Finalizes the buffer once it's been unchanged for long enough (see stability).'''
 
 		# State:
 		self._running = True
 		'''Used only once to close the client session.'''
 		self.is_recording = False
 		'''Toggled on start_listening and stop_listening.'''
-		self.word_queue = Queue()
-		'''All words that we have transcribed but that have not yet been consumed by the 'words' iterator.'''
 
 		# For saving the current audio:
 		self.current_audio_path: str = None
-		self.current_audio_file: BufferedWriter = None
+		self.current_audio_file: Optional[RecordingWriter] = None
+		'''Writes the current recording in the background, None once it's stopped.'''
 		self.start_time: datetime = None
 		self.end_time: datetime = None
+		self.audio_origin: Optional[float] = None
+		'''Time (since the epoch) the current recording started, what WhisperLiveKit's times are relative to.'''
+		self.chunk_arrivals: Optional[ChunkArrivals] = None
+		'''When the current recording's audio chunks arrived, for latency tracking.'''
 
-		self.last_node: WordNode = None
 		self.transcription_lock = threading.Lock()
 
 		# Track pending text segments for stability checking
-		self.pending_segments = []  # List of {"text": str, "timestamp": float}
-		self.last_finalized_len = 0  # How many characters of cumulative text we've finalized
-		self.last_seen_transcription = ""  # To skip duplicate transcriptions
-		self.stability_threshold = 0.5  # Seconds to wait before finalizing text
-		
-		self.finalization_event = threading.Event()
-		self.finalization_thread = None
+		self.transcript = LiveTranscript()  # The current recording's transcription so far
+		self.last_finalized_len = 0  # How many characters of the transcript we've finalized
+		self.hypothesis: Optional[Tuple[int, int, float]] = None
+		'''The (first, last) characters of the transcript's unfinalized buffer and when it was shown, until it's kept or revised.'''
+		self.stability = AdaptiveStability()
+		'''How long the buffer has to be unchanged before we finalize it, learnt from how often this session's is revised.'''
+		self.listening_started: Optional[float] = None
+		'''When we started listening, until the recording's first word (see listening_latency).'''
+
+	@staticmethod
+	def warm_up():
+		'''
+		Starts loading the transcription engine and filling the
+		AudioProcessor pool in the background (see transcription_status).
+		'''
+		live_engine.warm_up()
+		get_processor_pool(pcm=True)
+		get_processor_pool(pcm=False)
 
 	@staticmethod
 	def init_app(app: Flask):
@@ -112,205 +221,188 @@ class WhisperLiveKitWordStream(WordStream):
 		print(f"[INIT] SocketIO instance: {WhisperLiveKitWordStream.socketio}")
 		print(f"[INIT] Registered handlers: {WhisperLiveKitWordStream.socketio.server.handlers}")
 
-	def words(self) -> Iterator[WordNode]:
-		'''
-		Iterates all words produced by this live
-		transcription of the client's microphone.
-
-		Words are in the form of a linked list with
-		time stamps to do rule based verbal UI control.
-		'''
-		while self._running:
-			try:
-				yield self.word_queue.get(block=True, timeout=0.5)
-			except Empty:
-				pass
-		return
-
 	def close(self):
 		'''
 		Stops any 'self.words' iterator (or thread iterating it).
 		'''
 		self._stop_listening()
 		self._running = False
+		if self.frontdata_archive:
+			self.frontdata_archive.close()
+		super().close()
 		if self.session_id in WhisperLiveKitWordStream.streams:
 			del WhisperLiveKitWordStream.streams[self.session_id]
 
 	def _init_audio_processor(self):
 		'''
-		Initialize the AudioProcessor for this session.
-		Uses the global TranscriptionEngine.
-		Starts async processing thread.
-		'''
-		print(f"[WLK] Starting async processing thread for session {self.session_id}")
-
-		# Start the async processing thread
-		self.processing_thread = threading.Thread(
-			target=self._run_async_processor,
-			daemon=True
-		)
-		self.processing_thread.start()
-
-		# Give it a moment to initialize
-		time.sleep(0.5)
-		print("[WLK] AudioProcessor thread started successfully")
+		Starts processing a recording with a new AudioProcessor
+		(using the global TranscriptionEngine) on the shared
+		transcription loop, without waiting for it.
 
-	def _run_async_processor(self):
+		Chunks can be queued as soon as this returns, they wait
+		for the AudioProcessor to be ready.
 		'''
-		Run the async AudioProcessor in a separate thread with its own event loop.
-		This method runs in a separate thread.
-		'''
-		try:
-			print("[WLK] _run_async_processor: Starting...", flush=True)
-			# Create new event loop for this thread
-			self.processing_loop = asyncio.new_event_loop()
-			asyncio.set_event_loop(self.processing_loop)
-			print("[WLK] _run_async_processor: Event loop created", flush=True)
+		print(f"[WLK] Starting audio processing for session {self.session_id}")
+		self.audio_bytes_queued = self.audio_bytes_processed = 0
+		self.audio_chunk_queue = asyncio.Queue()
+		self.processing_task = self.processing_loop.submit(self._async_process_audio(self.audio_chunk_queue, get_processor_pool(self.pcm_input)))
 
-			# Run the async processing
-			self.processing_loop.run_until_complete(self._async_process_audio())
-			print("[WLK] _run_async_processor: Completed normally", flush=True)
-
-		except Exception as e:
-			print(f"[WLK] Error in async processor thread: {e}", flush=True)
-			import traceback
-			traceback.print_exc()
-		finally:
-			print("[WLK] _run_async_processor: Cleaning up event loop...", flush=True)
-			if self.processing_loop:
-				self.processing_loop.close()
-			print("[WLK] _run_async_processor: Thread exiting", flush=True)
-
-	async def _async_process_audio(self):
+	async def _async_process_audio(self, chunks: asyncio.Queue, pool: AudioProcessorPool):
 		'''
-		Async method that processes audio chunks.
-		This is the main async processing loop.
+		Processes a recording's audio chunks (with an AudioProcessor
+		from pool), until it ends (a None chunk) and it's results
+		have been handled.
+
+		The recording keeps to it's own AudioProcessor even once a
+		new one has started (and taken over self.audio_processor),
+		so it's last chunks and end still go to the right one.
 		'''
 		try:
-			print("[WLK] _async_process_audio: Starting...", flush=True)
-
-			# Create AudioProcessor for this session using the global TranscriptionEngine
-			print(f"[WLK] Creating AudioProcessor for session {self.session_id}", flush=True)
-			self.audio_processor = await asyncio.to_thread(
-				AudioProcessor,
-				transcription_engine=_transcription_engine
-			)
-			print(f"[WLK] AudioProcessor created successfully", flush=True)
-
-			# Create tasks and get results generator
-			print("[WLK] Calling create_tasks()...", flush=True)
-			results_generator = await self.audio_processor.create_tasks()
-			print(f"[WLK] create_tasks() returned: {type(results_generator)}", flush=True)
-
-			# Start results handler task
-			print("[WLK] Starting results handler task...", flush=True)
-			self.results_task = asyncio.create_task(
-				self._handle_transcription_results(results_generator)
+			# Take an AudioProcessor the pool already has ready (or wait for the next one):
+			audio_processor, results_generator = await pool.acquire()
+			results_task = asyncio.create_task(
+				self._handle_transcription_results(results_generator, chunks)
 			)
-			print("[WLK] Results handler task started", flush=True)
-
-			print("[WLK] AudioProcessor initialized, processing audio chunks...", flush=True)
-			print(f"[WLK] Initial state: is_recording={self.is_recording}, queue_size={self.audio_chunk_queue.qsize()}", flush=True)
-
-			# Process audio chunks from queue
-			while self.is_recording or not self.audio_chunk_queue.empty():
+			if self.audio_chunk_queue is chunks:
+				self.audio_processor, self.results_task = audio_processor, results_task
+				if self.listening_started is not None:
+					self._record_listening_latency("processor_ready")
+			print(f"[WLK] AudioProcessor initialized, processing audio chunks ({chunks.qsize()} queued)...", flush=True)
+
+			# Process audio chunks as they're handed to us, until the end of the recording:
+			while True:
+				audio_chunk = await chunks.get()
+				if audio_chunk is None:
+					break
 				try:
-					# Get audio chunk from queue (non-blocking with timeout)
-					if not self.audio_chunk_queue.empty():
-						audio_chunk = self.audio_chunk_queue.get_nowait()
-
-						# Process the audio chunk
-						await self.audio_processor.process_audio(audio_chunk)
-					else:
-						# Small sleep to avoid busy waiting
-						await asyncio.sleep(0.01)
-
-				except Empty:
-					await asyncio.sleep(0.01)
+					await audio_processor.process_audio(audio_chunk)
+					if self.audio_chunk_queue is chunks:
+						self.audio_bytes_processed += len(audio_chunk)
 				except Exception as e:
 					print(f"[WLK] Error processing audio chunk: {e}", flush=True)
 					import traceback
 					traceback.print_exc()
 
-			print("[WLK] Audio processing loop finished", flush=True)
+			# (An empty chunk tells WhisperLiveKit the audio is over, so it finishes it's results)
+			await audio_processor.process_audio(b"")
 
 			# Wait for results handler to finish
-			if self.results_task:
-				print("[WLK] Waiting for results handler to finish...", flush=True)
-				await self.results_task
-				print("[WLK] Results handler finished", flush=True)
+			await results_task
+			print("[WLK] Audio processing finished", flush=True)
 
 		except Exception as e:
 			print(f"[WLK] Error in async audio processing: {e}", flush=True)
 			import traceback
 			traceback.print_exc()
+		finally:
+			if self.audio_chunk_queue is chunks:
+				self._finish_transcription()
 
-	async def _handle_transcription_results(self, results_generator):
+	async def _handle_transcription_results(self, results_generator, chunks: asyncio.Queue):
 		'''
 		Async method that handles transcription results from the generator.
 		'''
 		try:
 			async for result in results_generator:
 				# Process results silently - detailed logging happens in _process_wlk_transcription
-				if result:
+				# (unless a new recording has started since, which we'd confuse them with)
+				if result and self.audio_chunk_queue is chunks:
 					self._process_wlk_transcription(result)
 		except Exception as e:
 			print(f"[WLK] Error handling transcription results: {e}")
 			import traceback
 			traceback.print_exc()
 
-	def _close_audio_processor(self):
-		'''Close the AudioProcessor for this session'''
+	def _queue_audio(self, chunk: Optional[bytes]) -> bool:
+		'''
+		Hands chunk to the current recording's processing (None
+		ending the recording), returning False if there is none.
+		'''
+		chunks = self.audio_chunk_queue
+		if chunks is None or not self.processing_task or self.processing_task.done():
+			return False
 		try:
-			print(f"[WLK] Closing AudioProcessor for session {self.session_id}")
-
-			# Stop is_recording to signal the async loop to finish
-			# (already done in _stop_listening, but just in case)
+			self.processing_loop.call_soon(chunks.put_nowait, chunk)
+			if chunk:
+				self.audio_bytes_queued += len(chunk)
+			return True
+		except RuntimeError: # Loop closed
+			return False
+
+	@property
+	def audio_backlog(self) -> int:
+		'''
+		Bytes of the current recording's audio waiting to be
+		transcribed (approximately, it's counted from two threads
+		without a lock), 0 when there's no recording.
+		'''
+		if self.audio_chunk_queue is None:
+			return 0
+		return max(0, self.audio_bytes_queued - self.audio_bytes_processed)
 
-			# Wait for processing thread to finish
-			if self.processing_thread and self.processing_thread.is_alive():
-				print("[WLK] Waiting for processing thread to finish...")
-				self.processing_thread.join(timeout=2.0)
+	def _close_audio_processor(self):
+		'''
+		Ends the recording being processed, it's remaining chunks
+		and results are processed in the background (after which
+		it's last words are finalized, see _finish_transcription).
+		'''
+		print(f"[WLK] Closing AudioProcessor for session {self.session_id}")
+		self._queue_audio(None)
 
-			# Clean up
+	def _finish_transcription(self):
+		'''
+		Finalizes whatever is still pending of a recording's
+		transcription and resets for the next one.
+		'''
+		with self.transcription_lock:
+			if self.finalization_timer:
+				self.finalization_timer.cancel()
+				self.finalization_timer = None
+			self._finalize_up_to(len(self.transcript))
+
+			# Reset transcript tracking for next recording
+			self.transcript = LiveTranscript()
+			self.last_finalized_len = 0
+			self.hypothesis = None
+			self.chunk_arrivals = None
+			self.listening_started = None
 			self.audio_processor = None
-			self.processing_loop = None
-			self.processing_thread = None
 			self.results_task = None
-
-			print("[WLK] AudioProcessor closed")
-
-		except Exception as e:
-			print(f"[WLK] Error closing AudioProcessor: {e}")
-			import traceback
-			traceback.print_exc()
+			self.audio_chunk_queue = None
 
 	def _start_listening(self, mime_type: str) -> None:
 		'''
 		Start recording client audio chunks to file
 		and initialize WhisperLiveKit AudioProcessor.
 		'''
+		if self.audio_chunk_queue is not None:
+			# Previous recording is still being transcribed, keep what we have of it:
+			self._finish_transcription()
+
 		self.start_time = datetime.now()
+		self.audio_origin = self.start_time.timestamp()
+		self.chunk_arrivals = ChunkArrivals(self.audio_origin)
 		timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
 
+		self.pcm_input = mime_type == PCM_MIME
+		self.audio_bytes_received = 0
+		# (Only raw PCM can be gated or spotted in, anything else would need decoding first)
+		self.voice_gate = VoiceGate() if self.pcm_input else None
+		if self.wake_spotter:
+			self.wake_spotter.start_recording()
 		self.file_ext = mime_to_config[mime_type][0]
 		self.current_audio_path = os.path.join(
 			self.save_directory,
 			f"raw_recording_{timestamp}.{self.file_ext}"
 		)
 		print(f"[FILE] Opening audio file: {self.current_audio_path}")
-		self.current_audio_file = open(self.current_audio_path, "wb")
+		self.current_audio_file = RecordingWriter(self.current_audio_path)
+		if self.retranscriber:
+			audio = RecordingPCMAudio(self.current_audio_path) if self.pcm_input else RecordingFileAudio(self.current_audio_path)
+			self.retranscriber.start_recording(audio, self.audio_origin)
 
-		# Set is_recording BEFORE starting processor thread to avoid race condition
 		self.is_recording = True
-		print(f"[START] Setting is_recording={self.is_recording} before initializing processor")
-		
-		# Start finalization thread
-		self.finalization_thread = threading.Thread(
-			target=self._run_finalization_thread,
-			daemon=True
-		)
-		self.finalization_thread.start()
+		self.listening_started = time.time()
 		
 		# Initialize WhisperLiveKit AudioProcessor
 		self._init_audio_processor()
@@ -320,173 +412,179 @@ class WhisperLiveKitWordStream(WordStream):
 	def _stop_listening(self) -> None:
 		'''
 		Close WhisperLiveKit AudioProcessor and finalize audio recording.
+
+		The rest of the recording is transcribed in the background,
+		it's words still being added to this stream as they're final.
 		'''
 		print(f"[STOP] Stopping recording...")
 		self.end_time = datetime.now()
 
-		# Close audio file
-		if self.current_audio_file:
-			self.current_audio_file.close()
-			print(f"[FILE] Closed audio file")
-
-		# Close WhisperLiveKit AudioProcessor
+		# Close WhisperLiveKit AudioProcessor (with whatever speech the gate was still holding)
+		if self.voice_gate and not self.voice_gate.finished:
+			rest = self.voice_gate.flush()
+			if rest:
+				self._queue_audio(rest)
+			print(f"[VAD] Skipped {self.voice_gate.skipped_fraction:.0%} of the recording as silence", flush=True)
 		self._close_audio_processor()
 
-		# Rename the finished recording
-		if self.current_audio_path and os.path.exists(self.current_audio_path):
+		# Finish writing the recording and rename it in the background:
+		if self.current_audio_file:
 			start_str = self.start_time.strftime("%Y%m%d_%H%M%S")
 			end_str = self.end_time.strftime("%Y%m%d_%H%M%S")
 			new_raw = os.path.join(
 				self.save_directory,
 				f"recording_{start_str}__{end_str}.{self.file_ext}"
 			)
-			os.rename(self.current_audio_path, new_raw)
-			print(f"[FILE] Renamed recording to: {new_raw}")
+			audio = self.retranscriber.audio if self.retranscriber else None
+			def moved(done: Future):
+				if done.exception():
+					return
+				if audio:
+					audio.path = done.result()
+				print(f"[FILE] Saved recording to: {done.result()}", flush=True)
+			def renamed(closed: Future):
+				if closed.exception():
+					return
+				moved(closed)
+				if pcm_input:
+					# (Compressed off the audio's way in, see encode_pcm)
+					encode_pcm(closed.result()).add_done_callback(moved)
+			pcm_input = self.pcm_input
+			self.current_audio_file.close(new_raw).add_done_callback(renamed)
+			self.current_audio_file = None
 
 		self.is_recording = False
-
-		# Flush any pending segments before resetting
-		with self.transcription_lock:
-			import nltk
-			for seg in self.pending_segments:
-				tokens = nltk.word_tokenize(seg["text"].lower())
-				tokens = [t for t in tokens if t.isalnum()]
-				for token in tokens:
-					node = WordNode(word=token, start_time=datetime.now(), end_time=datetime.now())
-					if self.last_node:
-						self.last_node.next = node
-						node.prev = self.last_node
-					self.last_node = node
-					self.word_queue.put(node)
-
-		# Stop finalization thread
-		if self.finalization_thread and self.finalization_thread.is_alive():
-			self.finalization_event.set()  # Wake thread to exit
-			self.finalization_thread.join(timeout=1.0)
-			
-		# Reset segment tracking for next session
-		self.pending_segments = []
-		self.last_finalized_len = 0
-		self.last_seen_transcription = ""
-
 		print(f"[STOP] Recording stopped")
 
 	def _handle_audio_chunk(self, data: bytes):
 		"""
 		Record audio chunk to file and queue for WhisperLiveKit processing.
 		"""
-		# Write to disk (CRITICAL: preserve this functionality!)
-		if self.current_audio_file and not self.current_audio_file.closed:
-			self.current_audio_file.write(data)
-			self.current_audio_file.flush()
+		self.audio_bytes_received += len(data)
+		if self.chunk_arrivals:
+			# (Raw PCM's length is known from it's size, anything else is assumed to be real time)
+			self.chunk_arrivals.add(time.time(), self.audio_bytes_received / PCM_BYTES_PER_SECOND if self.pcm_input else None)
 
-		# Queue audio chunk for async processing
-		if self.is_recording and self.processing_thread and self.processing_thread.is_alive():
-			try:
-				self.audio_chunk_queue.put(data)
-			except Exception as e:
-				print(f"[WLK] Error queuing audio chunk: {e}")
-		else:
-			if not self.processing_thread:
-				print(f"[WLK] Not processing: processing thread not started")
-			elif not self.processing_thread.is_alive():
-				print(f"[WLK] Not processing: processing thread died")
-			elif not self.is_recording:
-				print(f"[WLK] Not processing: is_recording={self.is_recording}")
-
-	def _process_wlk_transcription(self, front_data):
-		def extract_segment_text():
-			for segment in (front_data.lines if front_data.lines else []):
-				if hasattr(segment, 'text') and segment.text:
-					stripped = segment.text.strip()
-					if stripped:
-						yield stripped
-
-		current_text = " ".join(extract_segment_text())
-
-		if self.wlk_output_dir:
-			now = datetime.now()
-			timestamp_str = f"{now.year}_{now.month:02d}_{now.day:02d}__{now.hour:02d}_{now.minute:02d}_{now.second:02d}.{now.microsecond // 1000:03d}"
-			output_file = os.path.join(self.wlk_output_dir, f"frontdata_{timestamp_str}.json")
+		# Write to disk (CRITICAL: preserve this functionality!)
+		# (In the background, this only waits if the disk's fallen far behind)
+		recording = self.current_audio_file
+		if recording:
 			try:
-				with open(output_file, 'w') as f:
-					json.dump(front_data.to_dict(), f, indent=4, default=str)
-			except Exception as e:
-				print(f"[WLK] Failed to save FrontData: {e}")
+				recording.write(data)
+			except (ValueError, OSError):
+				pass # (Stopped since we looked, or failed and already said so)
 
-		if not current_text:
+		# Queue audio chunk for async processing (only what's speech, if it's gated)
+		if not self.is_recording:
+			print(f"[WLK] Not processing: is_recording={self.is_recording}")
 			return
-
-		with self.transcription_lock:
-			# Skip duplicate transcriptions
-			if current_text == self.last_seen_transcription:
+		if self.voice_gate:
+			spotter = self.wake_spotter
+			self.voice_gate.withholding = bool(spotter and spotter.active)
+			heard = data
+			data = self.voice_gate.process(heard)
+			if spotter and spotter.hear(heard, self.voice_gate.speaking):
+				# Might've been the wake phrase, the model hears it (and what follows) to be sure:
+				data = self.voice_gate.release()
+			if not data:
 				return
+		if not self._queue_audio(data):
+			print(f"[WLK] Not processing: audio processing stopped")
 
-			print(f"[WLK] NEW TRANSCRIPTION: '{current_text}'")
-			self.last_seen_transcription = current_text
+	def _process_wlk_transcription(self, front_data):
+		lines = front_data.lines or []
+		buffer = getattr(front_data, "buffer_transcription", None) or ""
 
-			current_time = time.time()
-			current_text_of_interest = current_text[self.last_finalized_len:]
+		if self.frontdata_archive:
+			self.frontdata_archive.write(front_data)
 
-			if not current_text_of_interest:
-				return
+		if not lines and not buffer:
+			return
 
-			# Check which existing segments still match
-			accumulated = ""
-			for i, seg in enumerate(self.pending_segments):
-				accumulated += seg["text"]
-				if not current_text_of_interest.startswith(accumulated):
-					# Text changed at this segment
-					seg["timestamp"] = current_time
-					self.pending_segments = self.pending_segments[:i+1]
-					break
+		with self.transcription_lock:
+			# Only reading the lines that could have changed:
+			changed = self.transcript.update(lines, buffer)
+			if changed is not None:
+				print(f"[WLK] NEW TRANSCRIPTION: '{self.transcript.text(changed)}'")
+				self._hypothesis_changed(changed, time.time())
+
+			# Committed text is final as soon as WhisperLiveKit commits it:
+			self._finalize_up_to(self.transcript.committed)
+
+			# The buffer is only a hypothesis, finalized once it's been unchanged for long enough:
+			if changed is not None:
+				self._restart_finalization_timer()
+
+			# (But whoever can act on it before then can have it now)
+			hypothesis: List[WordNode] = []
+			first = self.last_finalized_len
+			if changed is not None and self.hypothesis_handlers and len(self.transcript) > first:
+				hypothesis = timed_words(self.transcript.text(first), first, self.transcript.spans(first), self.audio_origin, self.chunk_arrivals, self._timeline())
+		if hypothesis:
+			self.announce_hypothesis(hypothesis)
+
+	def _hypothesis_changed(self, changed: int, now: float):
+		'''Learns whether the last hypothesis was kept or revised (see stability), showing the next.'''
+		if self.hypothesis is not None:
+			first, last, shown = self.hypothesis
+			if first <= changed < last:
+				self.stability.revised(now - shown)
+			elif changed >= last:
+				self.stability.kept()
+		first = max(self.transcript.committed, self.last_finalized_len)
+		last = len(self.transcript)
+		self.hypothesis = (first, last, now) if last > first else None
+
+	def _finalize_up_to(self, end: int):
+		'''Queues the words of the transcript from the last finalized character up to end, timed from the transcription.'''
+		first = self.last_finalized_len
+		if end <= first:
+			return
+		around = self.transcript.text(first - 1, first + 1) if first else ""
+		if len(around) == 2 and not around[0].isspace() and not around[1].isspace():
+			# A hypothesis we finalized was revised longer, don't give the rest of a word we already gave:
+			space = self.transcript.text(first, end).find(" ")
+			first = end if space < 0 else first + space
+
+		combined_text = self.transcript.text(first, end)
+		words = timed_words(combined_text, first, self.transcript.spans(first, end), self.audio_origin, self.chunk_arrivals, self._timeline())
+		if self.retranscriber:
+			# (First, so they're in the utterance by the time anything acts on them)
+			self.retranscriber.add_words(words)
+		self.add_words_to_queue(words)
+		if words and self.listening_started is not None:
+			self._record_listening_latency("first_word", words[0].finalized)
+			self.listening_started = None
+
+		if words and words[-1].audio_end is not None and self.chunk_arrivals:
+			self.chunk_arrivals.forget_before(words[-1].audio_end)
+		self.last_finalized_len = end
+
+	def _timeline(self) -> Optional[Callable[[float], float]]:
+		'''Maps times in the audio the model heard to the recording's, if it didn't hear all of it.'''
+		return self.voice_gate.recording_seconds if self.voice_gate else None
+
+	def _record_listening_latency(self, name: str, when: Optional[float] = None):
+		ms = ((when or time.time()) - self.listening_started) * 1000
+		WhisperLiveKitWordStream.listening_latency.add(name, ms)
+		print(f"[WLK] {name} {ms:.0f}ms after starting to listen (session {self.session_id})", flush=True)
+
+	def _restart_finalization_timer(self):
+		'''(Re)starts waiting for the buffer to go unchanged for long enough (on the transcription loop), if there is any.'''
+		if self.finalization_timer:
+			self.finalization_timer.cancel()
+			self.finalization_timer = None
+		if len(self.transcript) > self.last_finalized_len:
+			self.finalization_timer = asyncio.get_running_loop().call_later(self.stability.seconds, self._on_transcription_stable)
+
+	def _on_transcription_stable(self):
+		'''Finalizes the buffer, since it's gone unchanged for long enough to probably be final.'''
+		with self.transcription_lock:
+			self.finalization_timer = None
+			if len(self.transcript) > self.last_finalized_len:
+				print(f"[WLK] Finalizing uncommitted '{self.transcript.text(self.last_finalized_len)}' after {self.stability.seconds:.2f}s unchanged", flush=True)
+				self._finalize_up_to(len(self.transcript))
 
-			# If current text is longer than accumulated segments, add new segment
-			if len(current_text_of_interest) > len(accumulated):
-				new_text = current_text_of_interest[len(accumulated):]
-				self.pending_segments.append({"text": new_text, "timestamp": current_time})
-
-			# Finalize segments that are past the threshold
-			self._finalize_stable_segments(current_time)
-		# Signal to reset the finalization thread timer
-		self.finalization_event.set()
-
-	def _finalize_stable_segments(self, current_time: float):
-		"""Finalize segments that have been stable past the threshold."""
-		num_to_finalize = 0
-		for seg in self.pending_segments:
-			if current_time - seg["timestamp"] > self.stability_threshold:
-				num_to_finalize += 1
-			else:
-				break
-
-		if num_to_finalize > 0:
-			import nltk
-			combined_text = "".join(seg["text"] for seg in self.pending_segments[:num_to_finalize])
-			tokens = nltk.word_tokenize(combined_text.lower())
-			tokens = [t for t in tokens if t.isalnum()]
-
-			for token in tokens:
-				node = WordNode(word=token, start_time=datetime.now(), end_time=datetime.now())
-				if self.last_node:
-					self.last_node.next = node
-					node.prev = self.last_node
-				self.last_node = node
-				self.word_queue.put(node)
-
-			self.last_finalized_len += len(combined_text)
-			self.pending_segments = self.pending_segments[num_to_finalize:]
-
-	def _run_finalization_thread(self):
-		"""Background thread that waits for stability_threshold and finalizes if timeout occurs."""
-		while self.is_recording:
-			self.finalization_event.clear()
-			timed_out = not self.finalization_event.wait(timeout=self.stability_threshold)
-			if timed_out:
-				with self.transcription_lock:
-					current_time = time.time()
-					self._finalize_stable_segments(current_time)
-						
 def get_stream(session_id: str) -> WhisperLiveKitWordStream:
 	'''
 	Gets the word stream for the given session.
@@ -575,7 +673,8 @@ def http_start_listening():
 	try:
 		print(f"[HTTP] start_listening for session={session_id}, mime={mime_type}")
 		get_stream(session_id)._start_listening(mime_type)
-		return jsonify({"status": "ok"}), 200
+		# (Audio is kept until the engine is ready, but the client may want to say it's still loading)
+		return jsonify({"status": "ok", "transcription": live_engine.status()["state"]}), 200
 	except Exception as e:
 		print(f"[HTTP] Error starting listening: {e}")
 		return jsonify({"error": str(e)}), 500
@@ -623,6 +722,76 @@ def http_audio_chunk():
 		return jsonify({"error": str(e)}), 500
 
 
+@WhisperLiveKitWordStream.bp.route('/audio_stream', websocket=True)
+def audio_stream():
+	'''
+	WebSocket streaming a recording's audio as binary
+	messages, listening for as long as it's open. The session
+	is only looked up once, and the client is told to slow
+	down or pause if transcription falls behind (see AudioIngest).
+	'''
+	session_id = request.args.get('session_id')
+	mime_type = request.args.get('mime_type', 'audio/webm')
+	if not session_id:
+		return jsonify({"error": "Missing session_id"}), 400
+	if mime_type not in mime_to_config:
+		return jsonify({"error": f"Unsupported mime_type {mime_type}"}), 400
+	print(f"[INGEST] Audio stream for session={session_id}, mime={mime_type}")
+	return serve_audio_stream(request.environ, get_stream(session_id), mime_type)
+
+
+@WhisperLiveKitWordStream.bp.route('/transcription_status')
+def transcription_status():
+	'''
+	Whether live transcription is available yet ('state' is
+	'not_loaded', 'loading', 'ready' or 'failed'), and how many
+	AudioProcessors are ready for sessions to start listening.
+	'''
+	status = live_engine.status()
+	status["processors_ready"] = processors_ready()
+	return jsonify(status)
+
+
+@WhisperLiveKitWordStream.bp.route('/listening_latency')
+def listening_latency():
+	'''
+	How long sessions take to be ready for audio and to
+	hear their first word after starting to listen.
+	'''
+	summary = WhisperLiveKitWordStream.listening_latency.summary()
+	summary["processors_ready"] = processors_ready()
+	return jsonify(summary)
+
+
+@WhisperLiveKitWordStream.bp.route('/recording_writer')
+def recording_writer():
+	'''
+	How long writing recordings to disk takes, and how much
+	audio is waiting to be written (see RecordingWriter).
+	'''
+	summary = recording_metrics.summary()
+	summary.update(buffer_depth())
+	return jsonify(summary)
+
+
+@WhisperLiveKitWordStream.bp.route('/voice_activity')
+def voice_activity_status():
+	'''
+	How much of the finished recordings' audio was kept from
+	the model as silence (see VoiceGate).
+	'''
+	return jsonify(voice_activity())
+
+
+@WhisperLiveKitWordStream.bp.route('/wake_spotter')
+def wake_spotter_status():
+	'''
+	How long idle sessions' checks for the wake phrase take,
+	and how often it's been heard (see WakeSpotter).
+	'''
+	return jsonify(wake_spotting())
+
+
 @WhisperLiveKitWordStream.bp.route('/recorder')
 def recorder():
 	'''
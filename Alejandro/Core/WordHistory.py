@@ -0,0 +1,88 @@
+from typing import Deque, Iterable, Optional
+from collections import deque
+from threading import Lock
+from Alejandro.Core.WordNode import WordNode
+
+class WordHistory:
+	'''
+	The bounded window of recent words a WordStream keeps
+	linked together.
+
+	Each word appended is linked after the last, and words
+	that fall out of the window are detached (their links
+	cleared) so that a session listening all day doesn't keep
+	every word it ever heard alive through the prev chain.
+
+	The window holds at most max_words words and, if set,
+	only the words spoken in the last max_seconds, but never
+	less than min_words, which is set to fit the longest phrase
+	being matched (see fit) so phrase matching always has the
+	words it needs.
+
+	Anything else holding on to WordNodes (eg, a ModalControl's
+	collected words) keeps those alive, just not linked to
+	words outside the window.
+	'''
+	def __init__(self, max_words: int = 1000, max_seconds: Optional[float] = None, min_words: int = 0):
+		self.max_words = max_words
+		'''Most words kept linked, should exceed how far the consumer can fall behind the stream.'''
+		self.max_seconds = max_seconds
+		'''If set, words ending more than this long before the newest one are detached.'''
+		self.min_words = min_words
+		'''Fewest words kept regardless of max_words and max_seconds.'''
+		self._min_words = min_words
+
+		self._window: Deque[WordNode] = deque()
+		self._lock = Lock()
+
+	@property
+	def last(self) -> Optional[WordNode]:
+		'''The most recent word, or None if there have been none.'''
+		return self._window[-1] if self._window else None
+
+	def __len__(self) -> int:
+		return len(self._window)
+
+	def fit(self, phrase_length: int) -> None:
+		'''
+		Makes sure phrases of phrase_length words (the longest the
+		current matcher has) can always be matched, without keeping
+		more for a longer one matched before it.
+		'''
+		self.min_words = max(self._min_words, phrase_length)
+
+	def append(self, node: WordNode) -> WordNode:
+		'''Links node after the last word, detaching any words that fall out of the window.'''
+		with self._lock:
+			last = self.last
+			if last is not None and last is not node:
+				last.set_next(node)
+			else:
+				node.prev = None
+			self._window.append(node)
+			self._trim()
+		return node
+
+	def extend(self, nodes: Iterable[WordNode]) -> None:
+		for node in nodes:
+			self.append(node)
+
+	def clear(self) -> None:
+		'''Detaches every word, the next one appended starts a new list.'''
+		with self._lock:
+			for node in self._window:
+				node.prev = node.next = None
+			self._window.clear()
+
+	def _trim(self) -> None:
+		window = self._window
+		keep = max(self.min_words, 1)
+		limit = max(self.max_words, keep)
+		newest = window[-1].end
+		while len(window) > keep and (
+			len(window) > limit or
+			(self.max_seconds is not None and newest - window[0].end > self.max_seconds)
+		):
+			oldest = window.popleft()
+			oldest.next = None
+			window[0].prev = None
@@ -1,19 +1,28 @@
-from typing import Dict, List
-
-# Define equivalent word groups
-WORD_GROUPS = [
-	["0", "zero"],
-	["1", "one"],
-	["2", "two"],
-	["3", "three"],
-	["4", "four"],
-	["5", "five"],
-	["6", "six"],
-	["7", "seven"],
-	["8", "eight"],
-	["9", "nine"],
-	["10", "ten"]
-]
+from typing import Dict, List, Tuple, Optional
+from itertools import product
+import threading
+import re
+
+UNITS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+	"ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen"]
+TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+SCALES = {"hundred": 100, "thousand": 1000, "million": 1000000}
+
+ORDINAL_UNITS = ["zeroth", "first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth", "ninth",
+	"tenth", "eleventh", "twelfth", "thirteenth", "fourteenth", "fifteenth", "sixteenth", "seventeenth", "eighteenth", "nineteenth"]
+ORDINAL_TENS = ["", "", "twentieth", "thirtieth", "fortieth", "fiftieth", "sixtieth", "seventieth", "eightieth", "ninetieth"]
+ORDINAL_SCALES = {"hundredth": 100, "thousandth": 1000, "millionth": 1000000}
+
+def ordinal_suffix(n: int) -> str:
+	if 10 <= n % 100 <= 20:
+		return "th"
+	return {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+
+# Define equivalent word groups (words that are interchangeable on their own):
+WORD_GROUPS = [[str(n), word] for n, word in enumerate(UNITS)]
+WORD_GROUPS += [[str(n*10), TENS[n]] for n in range(2, 10)]
+WORD_GROUPS += [[f"{n}{ordinal_suffix(n)}", word] for n, word in enumerate(ORDINAL_UNITS) if n]
+WORD_GROUPS += [[f"{n*10}th", ORDINAL_TENS[n]] for n in range(2, 10)]
 
 # Build mapping where each word maps to all equivalent forms
 WORD_MAP: Dict[str, List[str]] = {}
@@ -21,3 +30,175 @@ for group in WORD_GROUPS:
 	for word in group:
 		WORD_MAP[word] = [w for w in group if w != word]
 		WORD_MAP[word].append(word)  # Include self in equivalents
+
+_word_ids: Dict[str, int] = {}
+_word_ids_lock = threading.Lock()
+for group_id, group in enumerate(WORD_GROUPS):
+	for word in group:
+		_word_ids[word] = group_id
+_next_word_id = len(WORD_GROUPS)
+
+def word_id(word: str) -> int:
+	'''
+	Gets the interned id of a word.
+
+	Equivalent words (see WORD_GROUPS) share an id and
+	comparison is case insensitive, so two words match
+	exactly when their ids are equal.
+	'''
+	global _next_word_id
+	id = _word_ids.get(word)
+	if id is None:
+		lower = word.lower()
+		with _word_ids_lock:
+			id = _word_ids.get(lower)
+			if id is None:
+				id = _word_ids[lower] = _next_word_id
+				_next_word_id += 1
+			_word_ids[word] = id
+	return id
+
+def number_to_words(n: int, ordinal: bool = False) -> List[str]:
+	'''
+	Spells out a non negative integer, eg 125 -> ['one', 'hundred', 'twenty', 'five'].
+
+	If ordinal, the last word is made ordinal (['one', 'hundred', 'twenty', 'fifth']).
+	'''
+	if n < 20:
+		return [(ORDINAL_UNITS if ordinal else UNITS)[n]]
+	if n < 100:
+		tens, units = divmod(n, 10)
+		if not units:
+			return [(ORDINAL_TENS if ordinal else TENS)[tens]]
+		return [TENS[tens]] + number_to_words(units, ordinal)
+	for scale_word, scale in reversed(SCALES.items()):
+		if n >= scale:
+			high, low = divmod(n, scale)
+			words = number_to_words(high) + [scale_word]
+			if low:
+				return words + number_to_words(low, ordinal)
+			if ordinal:
+				words[-1] += "th"
+			return words
+	return []
+
+_UNIT_VALUES = {w: n for n, w in enumerate(UNITS)}
+_TENS_VALUES = {w: n*10 for n, w in enumerate(TENS) if w}
+_ORDINAL_VALUES = {w: n for n, w in enumerate(ORDINAL_UNITS)}
+_ORDINAL_VALUES.update({w: n*10 for n, w in enumerate(ORDINAL_TENS) if w})
+_DIGITS = re.compile(r"^(\d+)(st|nd|rd|th)?$")
+
+def parse_number(words: List[str], start: int = 0) -> Optional[Tuple[int, bool, int]]:
+	'''
+	Parses the longest spoken or written number in words
+	beginning at start.
+
+	Returns (value, is_ordinal, end) where end is the index
+	after the last word used, or None if there is no number
+	at start.
+	'''
+	digits = _DIGITS.match(words[start])
+	if digits:
+		return int(digits.group(1)), bool(digits.group(2)), start + 1
+
+	total, current, last = 0, 0, None
+	result = None
+	i = start
+	while i < len(words):
+		word = words[i]
+		if word == "and" and last in ("hundred", "scale") and i + 1 < len(words) and (words[i+1] in _UNIT_VALUES or words[i+1] in _TENS_VALUES or words[i+1] in _ORDINAL_VALUES):
+			i += 1
+			continue
+		if word in _UNIT_VALUES or word in _ORDINAL_VALUES and _ORDINAL_VALUES[word] < 20:
+			value = _UNIT_VALUES.get(word, _ORDINAL_VALUES.get(word))
+			if value == 0 and last is not None:
+				break
+			if value < 10 and last not in (None, "tens", "hundred", "scale"):
+				break
+			if value >= 10 and last not in (None, "hundred", "scale"):
+				break
+			current += value
+			last = "unit" if value < 10 else "teen"
+		elif word in _TENS_VALUES or word in _ORDINAL_VALUES:
+			if last not in (None, "hundred", "scale"):
+				break
+			current += _TENS_VALUES.get(word, _ORDINAL_VALUES.get(word))
+			last = "tens"
+		elif word in ("hundred", "hundredth"):
+			if not 0 < current < 100 or last == "hundred":
+				break
+			current *= 100
+			last = "hundred"
+		elif word in SCALES or word in ORDINAL_SCALES:
+			scale = SCALES.get(word, ORDINAL_SCALES.get(word))
+			if not current:
+				break
+			total += current * scale
+			current = 0
+			last = "scale"
+		else:
+			break
+		i += 1
+		result = (total + current, word in _ORDINAL_VALUES or word in ORDINAL_SCALES or word == "hundredth", i)
+		if result[1]:
+			break
+	return result
+
+def _number_forms(value: int, ordinal: bool, written: Optional[str] = None) -> List[List[str]]:
+	'''Every way we accept a number (written as written, if it was digits) to be written or spoken.'''
+	if ordinal:
+		return [[f"{value}{ordinal_suffix(value)}"], number_to_words(value, ordinal=True)]
+
+	forms = [[str(value)], number_to_words(value)]
+
+	# 'nineteen hundred':
+	if value % 100 == 0 and 1000 < value < 10000 and value % 1000:
+		forms.append(number_to_words(value // 100) + ["hundred"])
+
+	# 'one hundred and five':
+	if value > 100 and value % 100 and value < 1000:
+		forms.append(number_to_words(value // 100 * 100) + ["and"] + number_to_words(value % 100))
+
+	# Codes read digit by digit, 'two oh five' or 'two zero five' (keeping leading zeros, 'oh five' for '05'):
+	code = written if written and written.isdigit() else str(value)
+	if len(code) <= 5:
+		digits = [UNITS[int(d)] for d in code]
+		if len(digits) > 1:
+			forms.append(digits)
+		if "zero" in digits:
+			forms.append(["oh" if d == "zero" else d for d in digits])
+	return forms
+
+MAX_PHRASE_VARIANTS = 32
+'''Limit on how many spellings one phrase expands to (phrases with many numbers).'''
+
+def phrase_variants(words: List[str]) -> List[Tuple[int, ...]]:
+	'''
+	Expands the (already tokenized) words of a phrase into
+	the word id sequences that should all count as saying it.
+
+	Numbers are the reason a phrase can have more than one
+	sequence, since 'twenty five' and '25' differ in length.
+	Words that are equivalent on their own already share
+	an id so don't produce extra variants.
+	'''
+	parts: List[List[List[str]]] = []
+	i = 0
+	while i < len(words):
+		number = parse_number(words, i)
+		if number:
+			value, ordinal, end = number
+			parts.append([words[i:end]] + _number_forms(value, ordinal, words[i] if end == i + 1 else None))
+			i = end
+		else:
+			parts.append([[words[i]]])
+			i += 1
+
+	variants: List[Tuple[int, ...]] = []
+	for combination in product(*parts):
+		ids = tuple(word_id(w) for form in combination for w in form)
+		if ids not in variants:
+			variants.append(ids)
+			if len(variants) >= MAX_PHRASE_VARIANTS:
+				break
+	return variants
@@ -1,25 +1,80 @@
 from datetime import datetime
-from typing import Optional
-from RequiredAI.json_dataclass import json_dataclass
+from typing import Optional, Union
+from Alejandro.Core.WordMapping import word_id as get_word_id
+
+Timestamp = Union[datetime, float]
+'''A datetime or seconds since the epoch (time.time()).'''
+
+def _seconds(timestamp: Optional[Timestamp]) -> float:
+	if timestamp is None:
+		return 0.0
+	if isinstance(timestamp, datetime):
+		return timestamp.timestamp()
+	return float(timestamp)
 
-@json_dataclass
 class WordNode:
-	"""A node in a linked list of transcribed words"""
-	word: str
-	start_time: datetime
-	end_time: datetime
-	prev: Optional['WordNode'] = None 
-	next: Optional['WordNode'] = None
+	"""
+	A node in a linked list of transcribed words.
+
+	There is one of these for every word spoken so they are
+	kept small, using __slots__ and storing their times as
+	seconds since the epoch (start & end), with start_time
+	and end_time as datetime views of them.
+
+	Streams only keep a bounded window of these linked
+	together (see WordHistory), prev is None past it.
+	"""
+	__slots__ = ("word", "start", "end", "prev", "next", "word_id", "audio_start", "audio_end", "arrived", "finalized")
+
+	def __init__(self, word: str, start_time: Timestamp, end_time: Timestamp, prev: Optional['WordNode'] = None, next: Optional['WordNode'] = None):
+		self.word = word
+		self.start: float = _seconds(start_time)
+		'''Time the word started being spoken, in seconds since the epoch.'''
+		self.end: float = _seconds(end_time)
+		'''Time the word finished being spoken, in seconds since the epoch.'''
+		self.prev = prev
+		self.next = next
+		self.word_id: int = get_word_id(word)
+		'''Interned id of word, equal for equivalent words (see WordMapping.word_id).'''
+		
+		# Where the word came from, for latency tracking (see Latency):
+		self.audio_start: Optional[float] = None
+		'''Seconds into the recording the word started, if it was transcribed from audio.'''
+		self.audio_end: Optional[float] = None
+		'''Seconds into the recording the word ended, if it was transcribed from audio.'''
+		self.arrived: Optional[float] = None
+		'''Time (since the epoch) the audio chunk holding the end of the word reached the server.'''
+		self.finalized: Optional[float] = None
+		'''Time (since the epoch) the word was final and handed to the word stream's consumer.'''
+
+	@property
+	def start_time(self) -> datetime:
+		return datetime.fromtimestamp(self.start)
+
+	@start_time.setter
+	def start_time(self, value: Timestamp):
+		self.start = _seconds(value)
+
+	@property
+	def end_time(self) -> datetime:
+		return datetime.fromtimestamp(self.end)
+
+	@end_time.setter
+	def end_time(self, value: Timestamp):
+		self.end = _seconds(value)
 
 	def __str__(self) -> str:
 		return self.word
-	
+
+	def __repr__(self) -> str:
+		return f"WordNode({self.word!r}, start={self.start}, end={self.end})"
+
 	def set_next(self, node:'WordNode'):
-		node.next = node
+		self.next = node
 		node.prev = self
-	
+
 	@staticmethod
 	def join_returning_next(prev:'WordNode', next:'WordNode'):
 		if prev:
 			prev.set_next(next)
-		return next
\ No newline at end of file
+		return next
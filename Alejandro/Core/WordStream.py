@@ -1,18 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import Iterator, List, Callable
+from typing import Iterator, AsyncIterator, List, Tuple, Callable, Optional, TYPE_CHECKING
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
-import nltk
-
-# Download required NLTK data
-try:
-	nltk.data.find('tokenizers/punkt')
-	nltk.data.find('tokenizers/punkt_tab/english')
-except LookupError:
-	nltk.download('punkt')
-	nltk.download('punkt_tab')
-
+from queue import Queue
+from threading import Lock
+import asyncio
 from Alejandro.Core.WordNode import WordNode
+from Alejandro.Core.Tokenizer import tokenize
+from Alejandro.Core.WordHistory import WordHistory
+import time
+if TYPE_CHECKING:
+	from Alejandro.Core.Retranscriber import Retranscriber
+	from Alejandro.Core.WakePhrase import WakeSpotter
 
 @dataclass
 class WordStream(ABC):
@@ -21,9 +20,42 @@ class WordStream(ABC):
 	
 	Implementations should handle the actual transcription process
 	and word segmentation, while maintaining the linked list structure
-	of WordNodes.
+	of WordNodes (by adding every word they produce to history).
 	"""
 	
+	history: WordHistory = field(default_factory=WordHistory, kw_only=True)
+	'''The bounded window of recent words, linked together.'''
+	
+	retranscriber: Optional['Retranscriber'] = field(default=None, kw_only=True)
+	'''Corrects this stream's words with a better model in the background, if it has one.'''
+	
+	wake_spotter: Optional['WakeSpotter'] = field(default=None, kw_only=True)
+	'''Listens for wake phrases in place of the transcription while the session's idle, if this stream can.'''
+	
+	hypothesis_handlers: List[Callable[[List[WordNode]], None]] = field(default_factory=list, kw_only=True)
+	'''
+	Called with the words the transcription currently thinks
+	were said after the last word it produced, whenever that
+	changes (for streams that know, see announce_hypothesis).
+	They may still be revised, or never be produced at all.
+	'''
+	
+	@property
+	def last_node(self) -> WordNode:
+		'''The most recent word produced by this stream.'''
+		return self.history.last
+	
+	def announce_hypothesis(self, words: List[WordNode]) -> None:
+		'''
+		Hands words (not yet final, following the last word
+		produced) to hypothesis_handlers.
+		'''
+		for handler in self.hypothesis_handlers:
+			try:
+				handler(words)
+			except Exception as e:
+				print(f"[STREAM] Hypothesis handler failed: {e}", flush=True)
+	
 	@abstractmethod
 	def words(self) -> Iterator[WordNode]:
 		"""
@@ -34,6 +66,25 @@ class WordStream(ABC):
 		"""
 		pass
 	
+	async def aiter_words(self) -> AsyncIterator[WordNode]:
+		"""
+		Asynchronously iterate over transcribed words as they
+		become available, like words().
+		
+		This default adapts words() by iterating it on the loop's
+		default executor, so it still ties up a thread per stream
+		while waiting, streams that can deliver words to the event
+		loop directly (see QueuedWordStream) override it.
+		"""
+		loop = asyncio.get_running_loop()
+		iterator = iter(self.words())
+		done = object()
+		while True:
+			word = await loop.run_in_executor(None, next, iterator, done)
+			if word is done:
+				return
+			yield word
+	
 	@abstractmethod
 	def close(self):
 		pass
@@ -46,18 +97,15 @@ class WordStream(ABC):
 		This is useful for testing and for processing text from other sources.
 		The returned list contains WordNodes that are already linked together.
 		"""
-		# Tokenize using NLTK
-		tokens = nltk.word_tokenize(text.lower())
-		
-		# Keep alphanumeric tokens (words and numbers)
-		tokens = [token for token in tokens if token.isalnum()]
+		# Lower case alphanumeric tokens (words and numbers):
+		tokens = tokenize(text)
 		
 		if not tokens:
 			return []
 			
 		# Create nodes with timestamps
 		nodes = []
-		current_time = datetime.now()
+		current_time = time.time()
 		for token in tokens:
 			node = WordNode(
 				word=token,
@@ -68,7 +116,95 @@ class WordStream(ABC):
 			
 		# Link nodes
 		for i in range(len(nodes)-1):
-			nodes[i].next = nodes[i+1]
-			nodes[i+1].prev = nodes[i]
+			nodes[i].set_next(nodes[i+1])
 			
 		return nodes
+
+class QueuedWordStream(WordStream):
+	"""
+	A WordStream that words are pushed into (from any thread)
+	with add_words_to_queue, delivering them to whoever is
+	iterating it without polling:
+	
+	words() blocks on word_queue until there is a word, and
+	aiter_words() has words handed to it's event loop as they
+	arrive (instead of going to word_queue), so a session
+	iterating it asynchronously needs no thread of it's own.
+	
+	Either iteration ends as soon as the stream is closed.
+	"""
+	def __init__(self):
+		super().__init__()
+		self.word_queue = Queue()
+		'''All words that we have transcribed but that have not yet been consumed by the 'words' iterator.'''
+		self._async_consumers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+		self._delivery_lock = Lock()
+		self._words_closed = False
+	
+	def add_words_to_queue(self, word_nodes: List[WordNode]) -> None:
+		'''
+		Links word_nodes onto the end of this stream's history
+		and hands them to whoever is iterating this stream,
+		stamping when they were finalized (if not already).
+		'''
+		now = time.time()
+		with self._delivery_lock:
+			for node in word_nodes:
+				if node.finalized is None:
+					node.finalized = now
+				self.history.append(node)
+				self._deliver(node)
+	
+	def _deliver(self, node: WordNode) -> None:
+		if self._async_consumers:
+			for loop, queue in self._async_consumers:
+				try:
+					loop.call_soon_threadsafe(queue.put_nowait, node)
+				except RuntimeError:
+					pass # Loop closed, it's iteration is over
+		else:
+			self.word_queue.put(node)
+	
+	def words(self) -> Iterator[WordNode]:
+		'''
+		Iterates words as they are added to this stream,
+		until it is closed.
+		'''
+		while True:
+			word = self.word_queue.get()
+			if word is None:
+				# Leave the end marker for any other iterator:
+				self.word_queue.put(None)
+				return
+			yield word
+	
+	async def aiter_words(self) -> AsyncIterator[WordNode]:
+		'''
+		Iterates words as they are added to this stream,
+		until it is closed, without blocking the event loop.
+		'''
+		queue: asyncio.Queue = asyncio.Queue()
+		consumer = (asyncio.get_running_loop(), queue)
+		with self._delivery_lock:
+			# Words that arrived before we started listening:
+			while not self.word_queue.empty():
+				queue.put_nowait(self.word_queue.get_nowait())
+			if self._words_closed:
+				queue.put_nowait(None)
+			self._async_consumers.append(consumer)
+		try:
+			while True:
+				word = await queue.get()
+				if word is None:
+					return
+				yield word
+		finally:
+			with self._delivery_lock:
+				self._async_consumers.remove(consumer)
+	
+	def close(self):
+		'''Ends any iteration of this stream, once it's consumed the words already added.'''
+		with self._delivery_lock:
+			if not self._words_closed:
+				self._words_closed = True
+				self._deliver(None)
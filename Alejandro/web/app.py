@@ -47,4 +47,6 @@ app.register_blueprint(events_bp)
 WhisperLiveKitWordStream.init_app(app)
 
 if __name__ == '__main__':
+	# Load the transcription model in the background, the UI works meanwhile:
+	WhisperLiveKitWordStream.warm_up()
 	app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
\ No newline at end of file
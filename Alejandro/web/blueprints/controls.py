@@ -32,7 +32,9 @@ def trigger_control() -> Response:
 				control_arg_name = control.get_action_control_arg(list(function_arguments.keys()))
 				if control_arg_name:
 					function_arguments[control_arg_name] = control
-				result = control.action(**function_arguments)
+				# Queued behind anything the session is already running, so actions stay in order:
+				action = control.action
+				result = session.app.control_executor.submit(lambda: action(**function_arguments), background=control.background).result()
 				if result is not None:
 					response_data["return_value"] = json.dumps(result)
 			if from_python:
@@ -40,3 +42,15 @@ def trigger_control() -> Response:
 			return jsonify(response_data)
 	   
 	return jsonify({"error": "Control not found"}), 404
+
+@bp.route('/latency', methods=['GET'])
+def control_latency() -> Response:
+	'''
+	How long the session's words are taking to get through each
+	stage, from being spoken to their control's action being done.
+	'''
+	session_id = request.args.get('session')
+	if not session_id:
+		return jsonify({"error": "Missing session"}), 400
+	session = get_or_create_session(session_id)
+	return jsonify(session.app.latency.summary())
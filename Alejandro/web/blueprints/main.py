@@ -20,19 +20,25 @@ class MainScreen(Screen):
 					id="conversations",
 					text="Conversations",
 					keyphrases=["conversations", "show conversations"],
-					action=session.navigator(ConversationsScreen)
+					action=session.navigator(ConversationsScreen),
+					speculative=True,
+					undo=session.undo_navigate
 				),
 				Control(
 					id="terminal", 
 					text="Terminal",
 					keyphrases=["terminal", "open terminal"],
-					action=session.navigator(TerminalScreen)
+					action=session.navigator(TerminalScreen),
+					speculative=True,
+					undo=session.undo_navigate
 				),
 				Control(
 					id="notes", 
 					text="Notes",
 					keyphrases=["note", "open notes"],
-					action=session.navigator(NotesScreen)
+					action=session.navigator(NotesScreen),
+					speculative=True,
+					undo=session.undo_navigate
 				),
 				session.make_back_control()
 			]
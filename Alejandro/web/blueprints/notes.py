@@ -36,7 +36,7 @@ class NotesScreen(Screen):
 			self.session.conversation_manager.current_conversation.add_message(msg)
 			self.session.conversation_manager.update_screen()
 
-	@control(keyphrases=["save note", "add a note", "make a note", "create note"], deactivate_phrases=['finished', 'done', 'save'])
+	@control(keyphrases=["save note", "add a note", "make a note", "create note"], deactivate_phrases=['finished', 'done', 'save'], background=True)
 	def save_note(self, control: ModalControl):
 		collected_text = control.collected_words
 		name_model = client.model(base_model=gpt_oss_120b, requirements=[
@@ -83,7 +83,7 @@ class NotesScreen(Screen):
 		print("Saving note...", str(note))
 		note.save()
 
-	@control(keyphrases=["search notes"], deactivate_phrases=['finished', 'done'])
+	@control(keyphrases=["search notes"], deactivate_phrases=['finished', 'done'], background=True)
 	def search_notes(self, control: ModalControl):
 		search_text = control.collected_words
 		notes = Note.list_notes()
@@ -120,7 +120,7 @@ class NotesScreen(Screen):
 			top_note_name = ranked_names[0]
 			self.load_note(top_note_name)
 
-	@control(keyphrases=["find note"], deactivate_phrases=['finished', 'done'])
+	@control(keyphrases=["find note"], deactivate_phrases=['finished', 'done'], background=True)
 	def find_note(self, control: ModalControl):
 		search_text = control.collected_words
 		notes = Note.list_notes()
@@ -24,19 +24,24 @@ class TerminalScreen(Screen):
 					id="new",
 					text="New Terminal",
 					keyphrases=["new terminal", "create terminal"],
-					action=self._create_new_terminal
+					action=self._create_new_terminal,
+					background=True
 				),
 				Control(
 					id="next",
 					text="Next Terminal",
 					keyphrases=["next terminal"],
-					action=self._next_terminal
+					action=self._next_terminal,
+					speculative=True,
+					undo=self._prev_terminal
 				),
 				Control(
 					id="prev",
 					text="Previous Terminal",
 					keyphrases=["previous terminal", "prev terminal"],
-					action=self._prev_terminal
+					action=self._prev_terminal,
+					speculative=True,
+					undo=self._next_terminal
 				),
 				session.make_back_control()
 			]
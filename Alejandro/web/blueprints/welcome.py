@@ -18,7 +18,9 @@ class WelcomeScreen(Screen):
 					id="activate",
 					text="Hey Alejandro",
 					keyphrases=["hey alejandro", "hello alejandro"],
-					action=session.navigator(MainScreen)
+					action=session.navigator(MainScreen),
+					max_fuzzy_cost=0.3,
+					wake=True
 				)
 			]
 		)
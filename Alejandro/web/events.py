@@ -2,6 +2,7 @@ from RequiredAI.json_dataclass import json_dataclass, config, field
 from typing import Optional, Type, Dict, Any, Iterator
 from datetime import datetime
 import queue
+import threading
 from Alejandro.Core.Screen import Screen
 from flask import Blueprint, Response, request, jsonify
 from Alejandro.Core.Control import Control
@@ -9,6 +10,10 @@ import time
 
 # Global event queue
 event_queue = queue.Queue()
+
+# Number of connected event streams per session:
+_clients: Dict[str, int] = {}
+_clients_lock = threading.Lock()
 events_bp = Blueprint('events', __name__)
 
 @json_dataclass
@@ -96,21 +101,35 @@ def event_stream() -> Response:
 	
 	#Ensure the session exists:
 	from Alejandro.web.session import get_or_create_session
-	get_or_create_session(session_id)
+	session = get_or_create_session(session_id)
 	
 	def event_stream(session_id: str) -> Iterator[str]:
-		while True:
-			try:
-				event = event_queue.get_nowait()
-				if isinstance(event, Event):
-					if event.session_id == session_id:
-						yield f"data: {event.to_json()}\n\n"
-			except queue.Empty:
-				pass
+		with _clients_lock:
+			_clients[session_id] = _clients.get(session_id, 0) + 1
+		try:
+			while True:
+				try:
+					event = event_queue.get_nowait()
+					if isinstance(event, Event):
+						if event.session_id == session_id:
+							yield f"data: {event.to_json()}\n\n"
+				except queue.Empty:
+					pass
+				
+				# Keep-alive
+				time.sleep(0.1)
+				yield ": keepalive\n\n"
+		finally:
+			with _clients_lock:
+				_clients[session_id] -= 1
+				disconnected = _clients[session_id] <= 0
+				if disconnected:
+					del _clients[session_id]
 			
-			# Keep-alive
-			time.sleep(0.1)
-			yield ": keepalive\n\n"
+			# Nobody is left to answer controls we're waiting on:
+			if disconnected:
+				print(f"Event stream for session {session_id} disconnected", flush=True)
+				session.app.cancel_waiting_controls()
 			
 	return Response(
 		event_stream(session_id),
@@ -3,9 +3,10 @@ from typing import Dict, Optional, Type, Union, TypeVar, Tuple, List, Callable
 from weakref import ref, ReferenceType
 from datetime import datetime, timedelta
 from Alejandro.Core.Control import Control
-from Alejandro.Core.Application import Application 
+from Alejandro.Core.Application import AsyncApplication
 from Alejandro.Core.ScreenStack import ScreenStack
 from Alejandro.Core.WhisperLiveKitWordStream import WhisperLiveKitWordStream
+from Alejandro.Core.RecordedWordStream import RecordingWordStream
 from Alejandro.Core.Assistant import Assistant,Conversation
 from Alejandro.web.events import NavigationEvent, ConversationUpdateEvent, push_event
 from Alejandro.Core.Screen import Screen
@@ -36,13 +37,22 @@ class Session:
 			))
 		self.conversation_manager.screen_should_update.connect(_push_update)
 		
-		# Create session-specific word stream and app
+		# Create session-specific word stream and app, recording
+		# every word heard (if enabled) so sessions can be replayed later:
 		self.word_stream = WhisperLiveKitWordStream(
 			os.path.expanduser("~/Documents/Alejandro/Recordings"),
 			session_id=self.id
 		)
+		if RecordingWordStream.enabled:
+			self.word_stream = RecordingWordStream(
+				self.word_stream,
+				os.path.expanduser(f"~/Documents/Alejandro/WordRecordings/words_{self.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"),
+				session_id=self.id,
+				screen_provider=lambda: type(self.app.screen_stack.current).__name__
+			)
 		welcome_screen = self.get_screen(welcome_screen_type)
-		self.app = Application(self.word_stream, welcome_screen)
+		# (Every session's word loop runs on one shared event loop)
+		self.app = AsyncApplication(self.word_stream, welcome_screen)
 		
 	def get_screen(self, screen_type: Type[Screen], **kwargs) -> Screen:
 		"""Get existing screen instance or create new one"""
@@ -51,8 +61,8 @@ class Session:
 			self._screens[screen_type] = screen
 		return self._screens[screen_type]
 		
-	def navigate(self, target_screen: Union[Type[Screen], Screen]) -> None:
-		"""Navigate to a screen"""
+	def navigate(self, target_screen: Union[Type[Screen], Screen]) -> Screen:
+		"""Navigate to a screen, returning it"""
 		if isinstance(target_screen, type):
 			screen = self.get_screen(target_screen)
 		else:
@@ -69,28 +79,40 @@ class Session:
 			session_id=self.id,
 			extra_url_params=extra_url_params
 		))
+		return screen
 	
-	def navigator(self, target_screen: Union[Type[Screen], Screen]) -> Callable[[],None]:
+	def navigator(self, target_screen: Union[Type[Screen], Screen]) -> Callable[[],Screen]:
 		'''Returns a function that will navigate to the passed screen when called'''
 		return partial(self.navigate, target_screen)
 	
-	def go_back(self) -> None:
-		"""Pop current screen and return to previous"""
-		if self.app.screen_stack.pop():
-			current = self.app.screen_stack.current
-			push_event(NavigationEvent(
-				screen=type(current),
-				session_id=self.id
-			))
+	def go_back(self) -> Optional[Screen]:
+		"""Pop current screen and return to previous, returning the popped screen (None if there was no previous)"""
+		popped = self.app.screen_stack.pop()
+		if popped:
+			self._push_current()
+		return popped
 			
 	def go_forward(self) -> None:
 		"""Navigate forward in history if possible"""
 		if self.app.screen_stack.forward():
-			current = self.app.screen_stack.current
-			push_event(NavigationEvent(
-				screen=type(current),
-				session_id=self.id
-			))
+			self._push_current()
+	
+	def undo_navigate(self, screen: Screen) -> None:
+		"""Undoes navigate having gone to screen, if we're still on it"""
+		if self.app.screen_stack.undo_push(screen):
+			self._push_current()
+	
+	def undo_go_back(self, popped: Optional[Screen]) -> None:
+		"""Undoes go_back having popped popped, if it did and nothing's been navigated to since"""
+		if self.app.screen_stack.undo_pop(popped):
+			self._push_current()
+	
+	def _push_current(self) -> None:
+		"""Tells the client which screen is now current"""
+		push_event(NavigationEvent(
+			screen=type(self.app.screen_stack.current),
+			session_id=self.id
+		))
 			
 	def make_back_control(self) -> Control:
 		"""Create a back navigation control"""
@@ -98,7 +120,9 @@ class Session:
 			id="back",
 			text="Back",
 			keyphrases=["back", "go back", "return"],
-			action=lambda s=self: s.go_back() if s else None
+			action=self.go_back,
+			speculative=True,
+			undo=self.undo_go_back
 		)
 	
 	def close(self):
@@ -0,0 +1,13 @@
+// Hands each frame of microphone audio (float32, at the AudioContext's
+// sample rate) to the page, which packs it into PCM16 chunks to stream.
+class PCMCapture extends AudioWorkletProcessor {
+    process(inputs) {
+        const channel = inputs[0] && inputs[0][0];
+        if (channel) {
+            this.port.postMessage(channel.slice(0));
+        }
+        return true;
+    }
+}
+
+registerProcessor("pcm-capture", PCMCapture);
@@ -1,5 +1,5 @@
 const socket = io();
-let mediaRecorder;
+let recorder;
 
 function toggleButtons(isRecording) {
     const startButton = document.getElementById('startButton');
@@ -8,73 +8,150 @@ function toggleButtons(isRecording) {
     stopButton.classList.toggle('hidden', !isRecording);
 }
 
+// Audio is streamed over one WebSocket (see AudioIngest.py), each chunk
+// prefixed by it's 4 byte sequence number. The server asks us to "slow"
+// (batch chunks together) or "pause" (hold them) when transcription is behind.
+let audioSocket;
+let sequence = 0;
+let flow = "ok";
+let heldChunks = [];
+const SLOW_BATCH = 4;
+
+function sendHeldChunks(force) {
+    if (!audioSocket || audioSocket.readyState !== WebSocket.OPEN || heldChunks.length === 0) return;
+    if (!force && (flow === "pause" || (flow === "slow" && heldChunks.length < SLOW_BATCH))) return;
+    const audio = new Blob(heldChunks);
+    heldChunks = [];
+    const header = new DataView(new ArrayBuffer(4));
+    header.setUint32(0, sequence++);
+    audioSocket.send(new Blob([header.buffer, audio]));
+}
+
+function sendChunk(chunk) {
+    heldChunks.push(chunk);
+    sendHeldChunks(false);
+}
+
+function finishStream() {
+    // (Send anything still held and stop listening)
+    sendHeldChunks(true);
+    if (audioSocket && audioSocket.readyState === WebSocket.OPEN) {
+        audioSocket.send(JSON.stringify({ type: "stop" }));
+    }
+    toggleButtons(false);
+    console.log("stopRecording sent");
+}
+
+// Where we can, the microphone is captured as raw 16kHz mono PCM16 so the
+// server can transcribe it without decoding it first, otherwise it's
+// recorded as webm.
+const PCM_SAMPLE_RATE = 16000;
+const PCM_CHUNK_SAMPLES = PCM_SAMPLE_RATE / 4; // 250ms
+
+class PCMRecorder {
+    constructor(stream) {
+        this.stream = stream;
+        this.mimeType = "audio/pcm";
+        this.samples = new Int16Array(PCM_CHUNK_SAMPLES);
+        this.length = 0;
+    }
+
+    async start() {
+        this.context = new AudioContext({ sampleRate: PCM_SAMPLE_RATE });
+        await this.context.audioWorklet.addModule("/static/js/pcm_worklet.js");
+        this.source = this.context.createMediaStreamSource(this.stream);
+        this.node = new AudioWorkletNode(this.context, "pcm-capture");
+        this.node.port.onmessage = (event) => this.add(event.data);
+        this.source.connect(this.node);
+    }
+
+    add(frame) {
+        for (let i = 0; i < frame.length; i++) {
+            const sample = Math.max(-1, Math.min(1, frame[i]));
+            this.samples[this.length++] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+            if (this.length === PCM_CHUNK_SAMPLES) this.flush();
+        }
+    }
+
+    flush() {
+        if (this.length > 0) {
+            sendChunk(this.samples.slice(0, this.length).buffer);
+            this.length = 0;
+        }
+    }
+
+    stop() {
+        this.source.disconnect();
+        this.node.disconnect();
+        this.context.close();
+        this.stream.getTracks().forEach(track => track.stop());
+        this.flush();
+        finishStream();
+    }
+}
+
+class WebmRecorder {
+    constructor(stream) {
+        this.mediaRecorder = new MediaRecorder(stream, { mimeType: "audio/webm" });
+        this.mimeType = this.mediaRecorder.mimeType;
+        this.mediaRecorder.ondataavailable = (event) => {
+            if (event.data.size > 0) sendChunk(event.data);
+        };
+        // (The last chunk comes before onstop)
+        this.mediaRecorder.onstop = finishStream;
+    }
+
+    async start() {
+        this.mediaRecorder.start(250); // Send chunks every 250ms
+    }
+
+    stop() {
+        this.mediaRecorder.stop();
+        this.mediaRecorder.stream.getTracks().forEach(track => track.stop());
+    }
+}
+
 async function startRecording() {
     console.log("startRecording clicked");
-    if (mediaRecorder && mediaRecorder.state === 'recording') return;
+    if (recorder) return;
 
     const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-    mediaRecorder = new MediaRecorder(stream, { mimeType: "audio/webm" });
-    mediaRecorder.ondataavailable = async (event) => {
-        if (event.data.size > 0) {
-            // Send audio via HTTP POST instead of SocketIO to avoid payload limits
-            const formData = new FormData();
-            formData.append('session_id', localStorage.getItem('sessionId'));
-            formData.append('audio_data', event.data);
-
-            try {
-                await fetch('/audio_chunk', {
-                    method: 'POST',
-                    body: formData
-                });
-            } catch (error) {
-                console.error("Failed to send audio chunk:", error);
-            }
+    recorder = window.AudioWorkletNode ? new PCMRecorder(stream) : new WebmRecorder(stream);
+
+    const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+    const params = new URLSearchParams({
+        session_id: localStorage.getItem('sessionId'),
+        mime_type: recorder.mimeType
+    });
+    audioSocket = new WebSocket(`${protocol}//${location.host}/audio_stream?${params}`);
+    sequence = 0;
+    flow = "ok";
+    heldChunks = [];
+    audioSocket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === "ack" && message.flow !== flow) {
+            console.log(`Audio stream flow: ${message.flow} (backlog ${message.backlog} bytes)`);
+            flow = message.flow;
+            sendHeldChunks(false);
+        } else if (message.type === "stopped") {
+            console.log("Audio stream stopped:", message);
         }
     };
-    mediaRecorder.onstop = () => {
-        toggleButtons(false);
+    audioSocket.onerror = (error) => {
+        console.error("Audio stream error:", error);
+    };
+    audioSocket.onopen = async () => {
+        await recorder.start();
+        console.log(`startRecording streaming ${recorder.mimeType}`);
+        toggleButtons(true);
     };
-    mediaRecorder.start(2000); // Send chunks every 2000ms
-
-    // Send start_listening via HTTP instead of SocketIO to avoid rate limits
-    try {
-        await fetch('/start_listening', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                session_id: localStorage.getItem('sessionId'),
-                mime_type: mediaRecorder.mimeType
-            })
-        });
-        console.log("startRecording sent via HTTP");
-    } catch (error) {
-        console.error("Failed to start listening:", error);
-    }
-
-    toggleButtons(true);
 }
 
 async function stopRecording() {
     console.log("stopRecording clicked");
-    if (mediaRecorder && mediaRecorder.state === 'recording') {
-        mediaRecorder.stop();
-        mediaRecorder.stream.getTracks().forEach(track => track.stop());
-
-        // Wait for final chunk to be sent, then send stop via HTTP
-        setTimeout(async () => {
-            try {
-                await fetch('/stop_listening', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        session_id: localStorage.getItem('sessionId')
-                    })
-                });
-                console.log("stopRecording sent via HTTP");
-            } catch (error) {
-                console.error("Failed to stop listening:", error);
-            }
-        }, 1000);
+    if (recorder) {
+        recorder.stop();
+        recorder = null;
     }
 }
 
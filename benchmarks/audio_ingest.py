@@ -0,0 +1,212 @@
+'''
+Benchmarks streaming audio to a session over the
+/audio_stream WebSocket (see AudioIngest).
+
+Sends chunks of audio (random bytes, or a recording's with
+--file) as fast as it can, or at the pace they'd be recorded
+with --realtime, each with it's sequence number, holding
+them while the server asks it to pause and batching them
+while it asks it to slow down, like the browser does.
+
+Reports throughput, how long sending each chunk took on the
+client and how long handling it took on the server (from
+the server's stats when the stream stops) as JSON so runs
+can be compared between releases:
+
+	python benchmarks/audio_ingest.py --output before.json
+	... change things ...
+	python benchmarks/audio_ingest.py --compare before.json
+
+By default it starts it's own server (just the WebSocket,
+on a free port, with a stream that isn't attached to a
+session or Application, transcribing only if WhisperLiveKit
+is installed). To measure a running server instead:
+
+	python benchmarks/audio_ingest.py --url "ws://localhost:5000/audio_stream?session_id=<id>"
+'''
+from typing import Any, Dict, List, Optional
+from contextlib import redirect_stdout
+from datetime import datetime
+from urllib.parse import urlencode
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simple_websocket import Client, ConnectionClosed
+from control_engine import NullWriter, git_revision, percentile
+from Alejandro.Core.AudioIngest import HEADER, serve_audio_stream
+from Alejandro.Core.WhisperLiveKitWordStream import WhisperLiveKitWordStream
+
+SLOW_BATCH = 4
+'''Chunks sent together while the server asks to slow down.'''
+
+def start_local_server(save_directory: str) -> str:
+	'''Serves /audio_stream to a stream of it's own on a free port, returning it's url.'''
+	from flask import Flask, request
+	from werkzeug.serving import make_server
+
+	WhisperLiveKitWordStream.processor_pool_size = 0
+	stream = WhisperLiveKitWordStream(save_directory=save_directory, session_id="benchmark")
+	stream.retranscriber = None
+
+	app = Flask(__name__)
+	@app.route("/audio_stream", websocket=True)
+	def audio_stream():
+		return serve_audio_stream(request.environ, stream, request.args.get("mime_type", "audio/webm"))
+
+	server = make_server("127.0.0.1", 0, app, threaded=True)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	return f"ws://127.0.0.1:{server.server_port}/audio_stream"
+
+def make_chunks(count: int, size: int, path: Optional[str], seed: int) -> List[bytes]:
+	if path:
+		with open(path, "rb") as f:
+			data = f.read()
+		return [data[i:i + size] for i in range(0, len(data), size)][:count]
+	rng = random.Random(seed)
+	return [rng.randbytes(size) for _ in range(count)]
+
+def run(url: str, chunks: List[bytes], chunk_seconds: Optional[float]) -> Dict[str, Any]:
+	'''Streams chunks to url (pacing them chunk_seconds apart if given), returning what it measured.'''
+	ws = Client.connect(url)
+	ready = json.loads(ws.receive(timeout=10))
+	sequence = ready["next"]
+	flow = "ok"
+	flows: Dict[str, int] = {}
+	held: List[bytes] = []
+	send_ns: List[int] = []
+	sent = 0
+
+	def handle(message: Optional[str]) -> None:
+		nonlocal flow
+		if message is None:
+			return
+		reply = json.loads(message)
+		if reply["type"] == "ack" and reply["flow"] != flow:
+			flow = reply["flow"]
+			flows[flow] = flows.get(flow, 0) + 1
+
+	def send_held(force: bool = False) -> None:
+		nonlocal sequence, sent
+		if not held or (not force and (flow == "pause" or (flow == "slow" and len(held) < SLOW_BATCH))):
+			return
+		message = HEADER.pack(sequence) + b"".join(held)
+		start = time.perf_counter_ns()
+		ws.send(message)
+		send_ns.append(time.perf_counter_ns() - start)
+		sequence += 1
+		sent += len(message) - HEADER.size
+		held.clear()
+
+	start = time.perf_counter()
+	for i, chunk in enumerate(chunks):
+		if chunk_seconds:
+			time.sleep(max(0.0, start + i * chunk_seconds - time.perf_counter()))
+		held.append(chunk)
+		send_held()
+		# (Whatever the server's said meanwhile, without waiting for it)
+		handle(ws.receive(timeout=0))
+	while held and flow == "pause":
+		handle(ws.receive(timeout=1))
+	send_held(force=True)
+	send_seconds = time.perf_counter() - start
+
+	ws.send(json.dumps({"type": "stop"}))
+	server: Dict[str, Any] = {}
+	while True:
+		message = ws.receive(timeout=30)
+		if message is None:
+			break
+		reply = json.loads(message)
+		if reply["type"] == "stopped":
+			server = reply
+			break
+		handle(message)
+	try:
+		ws.close()
+	except ConnectionClosed:
+		pass # (The server closed it first)
+
+	send_ns.sort()
+	return {
+		"chunks": len(chunks),
+		"messages": sequence - ready["next"],
+		"bytes": sent,
+		"seconds": round(send_seconds, 3),
+		"chunks_per_second": round(len(chunks) / send_seconds, 1),
+		"mb_per_second": round(sent / send_seconds / 1e6, 2),
+		"client_send_p50_us": round(percentile(send_ns, 0.50) / 1000, 1),
+		"client_send_p99_us": round(percentile(send_ns, 0.99) / 1000, 1),
+		"client_send_mean_us": round(statistics.fmean(send_ns) / 1000, 1),
+		"flow_changes": flows,
+		"server": {key: value for key, value in server.items() if key != "type"},
+	}
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+	'''Prints throughput and overhead relative to a previous run.'''
+	with open(baseline_path) as f:
+		before = json.load(f)["result"]
+	after = results["result"]
+	for name, a, b in (
+		("chunks/sec", after["chunks_per_second"], before["chunks_per_second"]),
+		("client send p50", after["client_send_p50_us"], before["client_send_p50_us"]),
+		("server p50", after["server"].get("overhead_p50_us"), before["server"].get("overhead_p50_us")),
+		("server p99", after["server"].get("overhead_p99_us"), before["server"].get("overhead_p99_us")),
+	):
+		if a and b:
+			print(f"{name:<18}{a / b:>9.2f}x", file=sys.stderr)
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--url", help="A running server's /audio_stream (with session_id), instead of starting one")
+	parser.add_argument("--chunks", type=int, default=2000)
+	parser.add_argument("--chunk-bytes", type=int, default=4000, help="Bytes of audio per chunk (default about 250ms of webm/opus)")
+	parser.add_argument("--chunk-ms", type=float, default=250, help="Milliseconds of audio per chunk, for --realtime")
+	parser.add_argument("--realtime", action="store_true", help="Send chunks at the pace they'd be recorded")
+	parser.add_argument("--mime-type", default="audio/webm")
+	parser.add_argument("--file", help="Stream this recording's bytes rather than random ones")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+	parser.add_argument("--compare", help="A previous JSON output to print ratios against")
+	args = parser.parse_args(argv)
+
+	chunks = make_chunks(args.chunks, args.chunk_bytes, args.file, args.seed)
+	with tempfile.TemporaryDirectory() as save_directory, redirect_stdout(NullWriter()):
+		url = args.url or start_local_server(save_directory)
+		url += ("&" if "?" in url else "?") + urlencode({"mime_type": args.mime_type})
+		result = run(url, chunks, args.chunk_ms / 1000 if args.realtime else None)
+
+	results = {
+		"benchmark": "audio_ingest",
+		"format_version": 1,
+		"revision": git_revision(),
+		"timestamp": datetime.now().isoformat(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"server": args.url or "local",
+		"realtime": args.realtime,
+		"result": result,
+	}
+
+	output = json.dumps(results, indent=2)
+	if args.output:
+		with open(args.output, "w") as f:
+			f.write(output)
+	else:
+		print(output)
+	if args.compare:
+		compare(results, args.compare)
+	return results
+
+if __name__ == "__main__":
+	main()
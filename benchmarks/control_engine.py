@@ -0,0 +1,254 @@
+'''
+Benchmarks how fast Application matches words to controls.
+
+Drives Application.process_word with synthetic word streams
+(see WordStream.process_text) over screens of 10, 100 and
+1000 generated controls, with stub actions and without
+starting the web server, reporting words/sec, per word
+latency percentiles and allocations as JSON so runs can be
+compared between releases:
+
+	python benchmarks/control_engine.py --output before.json
+	... change things ...
+	python benchmarks/control_engine.py --compare before.json
+
+Scenarios (with --replay, which words are spoken comes from
+a recording instead, see RecordedWordStream):
+	commands    filler speech with control phrases mixed in
+	modal_hold  a ModalControl held open collecting every word
+	fuzzy       commands against fuzzy matched controls, misspoken
+'''
+from typing import List, Dict, Any, Iterator, Optional
+from contextlib import redirect_stdout
+from concurrent.futures import Future
+from datetime import datetime
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Alejandro.Core.Application import Application
+from Alejandro.Core.Control import Control
+from Alejandro.Core.ModalControl import ModalControl
+from Alejandro.Core.Screen import Screen
+from Alejandro.Core.WordNode import WordNode
+from Alejandro.Core.WordStream import WordStream
+from Alejandro.Core.RecordedWordStream import read_recording
+
+SYLLABLES = ["al", "be", "ca", "do", "el", "fi", "go", "ha", "in", "jo", "ka", "lu", "me", "no", "or", "pa", "qui", "ro", "sa", "te", "un", "ve", "wa", "xi", "yo", "ze"]
+FILLER = "so i was thinking that we could maybe go ahead and take a look at the thing from yesterday if you have a minute".split()
+MODAL_EVERY = 10
+'''Every this many generated controls is a ModalControl.'''
+
+class BenchSession:
+	'''Stands in for web.session.Session, Screens and Application only need it's id.'''
+	id = "benchmark"
+
+class ListWordStream(WordStream):
+	'''A word stream with nothing to give, words are fed to process_word directly.'''
+	def words(self) -> Iterator[WordNode]:
+		return iter([])
+
+	def close(self):
+		pass
+
+class NullWriter:
+	'''Swallows Application's per word logging so it isn't what we measure.'''
+	def write(self, text: str) -> int:
+		return len(text)
+
+	def flush(self):
+		pass
+
+def make_word(rng: random.Random) -> str:
+	return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+def make_controls(count: int, rng: random.Random, max_fuzzy_cost: Optional[float] = None) -> List[Control]:
+	'''Generates count controls with 2 to 3 word phrases, every MODAL_EVERY'th being modal.'''
+	controls = []
+	for i in range(count):
+		text = f"{make_word(rng)} {make_word(rng)}"
+		keyphrases = [f"{make_word(rng)} {make_word(rng)} {i}"]
+		if i % MODAL_EVERY == MODAL_EVERY - 1:
+			controls.append(ModalControl(
+				id=f"modal_{i}", text=text, keyphrases=keyphrases,
+				deactivate_phrases=[f"done {make_word(rng)}"],
+				action=lambda control: None, max_fuzzy_cost=max_fuzzy_cost
+			))
+		else:
+			controls.append(Control(
+				id=f"control_{i}", text=text, keyphrases=keyphrases,
+				action=lambda: None, max_fuzzy_cost=max_fuzzy_cost
+			))
+	return controls
+
+def misspell(phrase: str, rng: random.Random) -> str:
+	'''Swaps a letter in the longest word of phrase, like a transcription near miss.'''
+	words = phrase.split()
+	longest = max(range(len(words)), key=lambda i: len(words[i]))
+	word = words[longest]
+	if len(word) > 4 and not word.isdigit():
+		i = rng.randrange(1, len(word) - 1)
+		words[longest] = word[:i] + rng.choice("aeiou") + word[i+1:]
+	return " ".join(words)
+
+def make_text(controls: List[Control], scenario: str, words: int, rng: random.Random) -> str:
+	'''Synthetic speech for scenario of about words words.'''
+	plain = [c for c in controls if not isinstance(c, ModalControl)]
+	parts: List[str] = []
+	count = 0
+	if scenario == "modal_hold":
+		modal = next(c for c in controls if isinstance(c, ModalControl))
+		parts.append(modal.text)
+	while count < words:
+		if scenario != "modal_hold" and rng.random() < 0.2:
+			control = rng.choice(plain)
+			phrase = rng.choice([control.text] + control.keyphrases)
+			if scenario == "fuzzy":
+				phrase = misspell(phrase, rng)
+		else:
+			phrase = rng.choice(FILLER)
+		parts.append(phrase)
+		count += len(phrase.split())
+	return " ".join(parts)
+
+def make_application(controls: List[Control]) -> Application:
+	screen = Screen(session=BenchSession(), title="Benchmark", controls=controls)
+	return Application(ListWordStream(), screen)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+	index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+	return sorted_values[index]
+
+def run_scenario(scenario: str, control_count: int, words: int, seed: int, replay: Optional[str] = None) -> Dict[str, Any]:
+	rng = random.Random(seed)
+	controls = make_controls(control_count, rng, max_fuzzy_cost=0.3 if scenario == "fuzzy" else None)
+
+	start = time.perf_counter()
+	app = make_application(controls)
+	compile_ms = (time.perf_counter() - start) * 1000
+
+	if replay:
+		nodes = WordStream.process_text(" ".join(w.word for w in read_recording(replay)[1]))
+	else:
+		nodes = WordStream.process_text(make_text(controls, scenario, words, rng))
+	triggers = 0
+	call_control = app.call_control
+	def count_trigger(control: Control, after: Optional[Future] = None) -> Optional[Future]:
+		nonlocal triggers
+		triggers += 1
+		return call_control(control, after)
+	app.call_control = count_trigger
+
+	with redirect_stdout(NullWriter()):
+		# Warm up (caches, first use of each matcher) on a separate application:
+		warm = make_application(controls)
+		for node in WordStream.process_text(" ".join(n.word for n in nodes[:200])):
+			warm.process_word(node)
+
+		latencies = []
+		clock = time.perf_counter_ns
+		total_start = clock()
+		for node in nodes:
+			word_start = clock()
+			app.process_word(node)
+			latencies.append(clock() - word_start)
+		total_ns = clock() - total_start
+
+		# Allocations are measured on a separate pass as tracing slows everything down:
+		traced = make_application(controls)
+		traced_nodes = WordStream.process_text(" ".join(n.word for n in nodes))
+		blocks_before = sys.getallocatedblocks()
+		tracemalloc.start()
+		for node in traced_nodes:
+			traced.process_word(node)
+		retained_bytes, peak_bytes = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		retained_blocks = sys.getallocatedblocks() - blocks_before
+
+	latencies.sort()
+	return {
+		"scenario": scenario,
+		"controls": control_count,
+		"words": len(nodes),
+		"triggers": triggers,
+		"compile_ms": round(compile_ms, 3),
+		"words_per_sec": round(len(nodes) / (total_ns / 1e9), 1),
+		"p50_us": round(percentile(latencies, 0.50) / 1000, 3),
+		"p99_us": round(percentile(latencies, 0.99) / 1000, 3),
+		"mean_us": round(statistics.fmean(latencies) / 1000, 3),
+		"max_us": round(latencies[-1] / 1000, 3),
+		"alloc_peak_kb": round(peak_bytes / 1024, 1),
+		"retained_bytes_per_word": round(retained_bytes / len(nodes), 1),
+		"retained_blocks_per_word": round(retained_blocks / len(nodes), 2),
+	}
+
+def git_revision() -> Optional[str]:
+	try:
+		return subprocess.run(
+			["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+			cwd=os.path.dirname(os.path.abspath(__file__))
+		).stdout.strip() or None
+	except OSError:
+		return None
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+	'''Prints each result's throughput and latency relative to a previous run.'''
+	with open(baseline_path) as f:
+		baseline = {(r["scenario"], r["controls"]): r for r in json.load(f)["results"]}
+	print(f"{'scenario':<12}{'controls':>9}{'words/sec':>10}{'p50':>10}{'p99':>10}", file=sys.stderr)
+	for result in results["results"]:
+		before = baseline.get((result["scenario"], result["controls"]))
+		if not before:
+			continue
+		ratios = [result[key] / before[key] if before[key] else float("nan") for key in ("words_per_sec", "p50_us", "p99_us")]
+		print(f"{result['scenario']:<12}{result['controls']:>9}" + "".join(f"{r:>9.2f}x" for r in ratios), file=sys.stderr)
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Control counts to benchmark")
+	parser.add_argument("--scenarios", nargs="+", default=["commands", "modal_hold", "fuzzy"])
+	parser.add_argument("--words", type=int, default=5000, help="Words per scenario")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--replay", help="Speak the words of a word stream recording (see RecordedWordStream) instead of synthetic text")
+	parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+	parser.add_argument("--compare", help="A previous JSON output to print ratios against")
+	args = parser.parse_args(argv)
+
+	results = {
+		"benchmark": "control_engine",
+		"format_version": 1,
+		"revision": git_revision(),
+		"timestamp": datetime.now().isoformat(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"words": args.words,
+		"seed": args.seed,
+		"replay": args.replay,
+		"results": [
+			run_scenario(scenario, size, args.words, args.seed, args.replay)
+			for scenario in args.scenarios
+			for size in args.sizes
+		]
+	}
+
+	output = json.dumps(results, indent=2)
+	if args.output:
+		with open(args.output, "w") as f:
+			f.write(output)
+	else:
+		print(output)
+	if args.compare:
+		compare(results, args.compare)
+	return results
+
+if __name__ == "__main__":
+	main()
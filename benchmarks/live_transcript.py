@@ -0,0 +1,243 @@
+'''
+Benchmarks how the cost of following a live transcript grows
+over a long recording.
+
+Feeds WhisperLiveKitWordStream._process_wlk_transcription a
+synthetic hour (by default) of WhisperLiveKit results, an
+update every quarter second of audio, each with every line so
+far: the last one growing a word at a time (and sometimes
+revising it's last word) with a new one started after every
+sentence. No audio or model is used and the web server isn't
+started.
+
+Reports per update latency percentiles for each ten minutes
+of the session, and how much slower the last ten minutes were
+than the first (growth, flat being 1.0), as JSON so runs can
+be compared between releases:
+
+	python benchmarks/live_transcript.py --output before.json
+	... change things ...
+	python benchmarks/live_transcript.py --compare before.json
+
+With --joined the same session is also run through a copy of
+how the transcript used to be followed (joining every line
+and comparing it all, each update), for reference.
+'''
+from typing import Any, Dict, List, Optional, Tuple
+from contextlib import redirect_stdout
+from datetime import datetime
+from types import SimpleNamespace
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from control_engine import FILLER, NullWriter, git_revision, percentile
+from Alejandro.Core.TranscriptTiming import transcript_spans, timed_words
+from Alejandro.Core.WhisperLiveKitWordStream import WhisperLiveKitWordStream
+
+UPDATE_SECONDS = 0.25
+'''Seconds of audio between results.'''
+BUCKET_SECONDS = 600
+'''Seconds of the session each latency summary covers.'''
+
+def make_session(seconds: float, seed: int) -> List[Tuple[int, Tuple[str, float, float]]]:
+	'''
+	Every result of a session seconds long, as how many lines
+	it has and the (text, start, end) of the last one (the
+	lines before it being the same as in the result before).
+	'''
+	rng = random.Random(seed)
+	updates: List[Tuple[int, Tuple[str, float, float]]] = []
+	lines: List[Any] = []
+	words_left = 0
+	now = 0.0
+	while now < seconds:
+		now += UPDATE_SECONDS
+		roll = rng.random()
+		if words_left <= 0:
+			# A pause, then the next sentence starts a new line:
+			words_left = rng.randint(6, 20)
+			lines.append((rng.choice(FILLER), now, now))
+			words_left -= 1
+		elif roll < 0.6:
+			text, start, _ = lines[-1]
+			lines[-1] = (f"{text} {rng.choice(FILLER)}", start, now)
+			words_left -= 1
+		elif roll < 0.7:
+			text, start, _ = lines[-1]
+			lines[-1] = (f"{text.rsplit(' ', 1)[0]} {rng.choice(FILLER)}".strip(), start, now)
+		updates.append((len(lines), lines[-1]))
+	return updates
+
+class SessionLines:
+	'''Replays make_session's updates as FrontData like results (sharing the lines that no longer change).'''
+	def __init__(self, updates: List[Any]):
+		self.updates = updates
+		self.lines: List[Any] = []
+
+	def result(self, i: int) -> Any:
+		count, (text, start, end) = self.updates[i]
+		del self.lines[count - 1:]
+		self.lines.append(SimpleNamespace(text=text, start=start, end=end, words=None, speaker=1))
+		return SimpleNamespace(lines=self.lines[:], buffer_transcription="")
+
+class JoinedTranscription:
+	'''How _process_wlk_transcription used to follow the transcript, joining and comparing all of it every update.'''
+	def __init__(self, stream: WhisperLiveKitWordStream):
+		self.stream = stream
+		self.pending_segments: List[Dict[str, Any]] = []
+		self.last_finalized_len = 0
+		self.last_seen_transcription = ""
+		self.transcription_spans: List[Any] = []
+		# (Finalize everything the update after it arrives, rather than waiting in real time)
+		self.stability_threshold = 0.0
+
+	def process(self, front_data: Any) -> None:
+		current_text, spans = transcript_spans(front_data.lines or [])
+		if not current_text or current_text == self.last_seen_transcription:
+			return
+		print(f"[WLK] NEW TRANSCRIPTION: '{current_text}'")
+		self.last_seen_transcription = current_text
+		self.transcription_spans = spans
+		current_time = time.time()
+		current_text_of_interest = current_text[self.last_finalized_len:]
+		if not current_text_of_interest:
+			return
+		accumulated = ""
+		for i, seg in enumerate(self.pending_segments):
+			accumulated += seg["text"]
+			if not current_text_of_interest.startswith(accumulated):
+				seg["timestamp"] = current_time
+				self.pending_segments = self.pending_segments[:i+1]
+				break
+		if len(current_text_of_interest) > len(accumulated):
+			self.pending_segments.append({"text": current_text_of_interest[len(accumulated):], "timestamp": current_time})
+		count = 0
+		for seg in self.pending_segments:
+			if current_time - seg["timestamp"] > self.stability_threshold:
+				count += 1
+			else:
+				break
+		if count:
+			combined_text = "".join(seg["text"] for seg in self.pending_segments[:count])
+			self.stream.add_words_to_queue(timed_words(combined_text, self.last_finalized_len, self.transcription_spans, self.stream.audio_origin))
+			self.last_finalized_len += len(combined_text)
+			self.pending_segments = self.pending_segments[count:]
+
+def make_stream() -> WhisperLiveKitWordStream:
+	'''A stream that's only given results, without audio, an AudioProcessor or re-transcription.'''
+	WhisperLiveKitWordStream.processor_pool_size = 0
+	stream = WhisperLiveKitWordStream(save_directory=None, session_id="benchmark")
+	stream.retranscriber = None
+	stream.audio_origin = time.time()
+	return stream
+
+def run(method: str, updates: List[Any]) -> Dict[str, Any]:
+	stream = make_stream()
+	process = stream._process_wlk_transcription if method == "incremental" else JoinedTranscription(stream).process
+	session = SessionLines(updates)
+	per_bucket = int(BUCKET_SECONDS / UPDATE_SECONDS)
+	latencies: List[int] = []
+	finalized = 0
+	add_words_to_queue = stream.add_words_to_queue
+	def count_words(words: List[Any]) -> None:
+		nonlocal finalized
+		finalized += len(words)
+		add_words_to_queue(words)
+	stream.add_words_to_queue = count_words
+
+	async def drive():
+		# (On an event loop, like the transcription loop, for the finalization timer)
+		clock = time.perf_counter_ns
+		for i in range(len(updates)):
+			front_data = session.result(i)
+			start = clock()
+			process(front_data)
+			latencies.append(clock() - start)
+		if stream.finalization_timer:
+			stream.finalization_timer.cancel()
+
+	with redirect_stdout(NullWriter()):
+		total_start = time.perf_counter()
+		asyncio.run(drive())
+		total_seconds = time.perf_counter() - total_start
+
+	buckets = []
+	for first in range(0, len(latencies), per_bucket):
+		bucket = sorted(latencies[first:first + per_bucket])
+		buckets.append({
+			"minute": round(first * UPDATE_SECONDS / 60),
+			"updates": len(bucket),
+			"p50_us": round(percentile(bucket, 0.50) / 1000, 3),
+			"p99_us": round(percentile(bucket, 0.99) / 1000, 3),
+			"mean_us": round(statistics.fmean(bucket) / 1000, 3),
+		})
+	WhisperLiveKitWordStream.streams.pop("benchmark", None)
+	return {
+		"method": method,
+		"updates": len(latencies),
+		"finalized_words": finalized,
+		"total_seconds": round(total_seconds, 3),
+		"growth": round(buckets[-1]["p50_us"] / buckets[0]["p50_us"], 2) if buckets[0]["p50_us"] else None,
+		"buckets": buckets,
+	}
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+	'''Prints each method's growth and last ten minutes' latency relative to a previous run.'''
+	with open(baseline_path) as f:
+		baseline = {r["method"]: r for r in json.load(f)["results"]}
+	print(f"{'method':<12}{'growth':>10}{'last p50':>10}{'last p99':>10}", file=sys.stderr)
+	for result in results["results"]:
+		before = baseline.get(result["method"])
+		if not before:
+			continue
+		ratios = [
+			result["growth"] / before["growth"] if before["growth"] else float("nan"),
+			*(result["buckets"][-1][key] / before["buckets"][-1][key] if before["buckets"][-1][key] else float("nan") for key in ("p50_us", "p99_us"))
+		]
+		print(f"{result['method']:<12}" + "".join(f"{r:>9.2f}x" for r in ratios), file=sys.stderr)
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--minutes", type=float, default=60, help="Length of the synthetic session")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--joined", action="store_true", help="Also run the session the way it used to be followed, for reference")
+	parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+	parser.add_argument("--compare", help="A previous JSON output to print ratios against")
+	args = parser.parse_args(argv)
+
+	updates = make_session(args.minutes * 60, args.seed)
+	methods = ["incremental"] + (["joined"] if args.joined else [])
+	results = {
+		"benchmark": "live_transcript",
+		"format_version": 1,
+		"revision": git_revision(),
+		"timestamp": datetime.now().isoformat(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"minutes": args.minutes,
+		"seed": args.seed,
+		"results": [run(method, updates) for method in methods]
+	}
+
+	output = json.dumps(results, indent=2)
+	if args.output:
+		with open(args.output, "w") as f:
+			f.write(output)
+	else:
+		print(output)
+	if args.compare:
+		compare(results, args.compare)
+	return results
+
+if __name__ == "__main__":
+	main()
@@ -33,9 +33,9 @@ setup(
 		"flask",
 		"flask-socketio",
 		"python-socketio",
+		"simple-websocket",
 		"groq",
 		"dataclasses-json",
-		"nltk",
 		"websocket-client",
 		"whisperlivekit",
 		my_dependency("RequiredAI"),
@@ -44,5 +44,7 @@ setup(
 	],
 	extras_require={
 		"dev": ["unittest"],
+		"nltk": ["nltk"],
+		"retranscribe": ["faster-whisper"],
 	},
 )
\ No newline at end of file
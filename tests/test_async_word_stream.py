@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from Alejandro.Core.Application import AsyncApplication
+from Alejandro.Core.Control import Control
+from Alejandro.Core.EventLoop import EventLoopThread, shared_event_loop
+from Alejandro.Core.Screen import Screen
+from Alejandro.Core.WordStream import WordStream, QueuedWordStream
+
+
+class Session:
+    def __init__(self, id):
+        self.id = id
+
+
+class TestQueuedWordStream(unittest.TestCase):
+    """Tests for delivering words to sync and async iterators."""
+
+    def test_words_ends_on_close(self):
+        stream = QueuedWordStream()
+        stream.add_words_to_queue(WordStream.process_text("go back"))
+        stream.close()
+        self.assertEqual([w.word for w in stream.words()], ["go", "back"])
+
+    def test_aiter_words_from_other_thread(self):
+        stream = QueuedWordStream()
+        # Words added before iterating aren't lost:
+        stream.add_words_to_queue(WordStream.process_text("hello"))
+
+        def speak():
+            time.sleep(0.05)
+            stream.add_words_to_queue(WordStream.process_text("there world"))
+            stream.close()
+
+        async def collect():
+            return [w.word async for w in stream.aiter_words()]
+
+        threading.Thread(target=speak).start()
+        self.assertEqual(asyncio.run(collect()), ["hello", "there", "world"])
+
+
+class TestAsyncApplication(unittest.TestCase):
+    """Tests for running many sessions' word loops on one event loop."""
+
+    def test_sessions_share_a_loop(self):
+        loop = EventLoopThread("test_loop")
+        fired = []
+        apps = []
+        for i in range(50):
+            control = Control(id="back", text="go back", keyphrases=[], action=lambda i=i: fired.append(i))
+            screen = Screen(session=Session(str(i)), title="Test", controls=[control])
+            apps.append(AsyncApplication(QueuedWordStream(), screen, event_loop=loop))
+
+        for app in apps:
+            app.word_stream.add_words_to_queue(WordStream.process_text("please go back"))
+            app.close()
+        for app in apps:
+            app.task.result(timeout=2)
+        loop.stop()
+        self.assertEqual(sorted(fired), list(range(50)))
+
+    def test_named_shared_loops(self):
+        transcription = shared_event_loop("transcription")
+        self.assertIs(shared_event_loop("transcription"), transcription)
+        self.assertIsNot(shared_event_loop(), transcription)
+        self.assertTrue(transcription.running)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import threading
+import unittest
+
+from flask import Flask, request
+from simple_websocket import Client
+from werkzeug.serving import make_server
+
+from Alejandro.Core.AudioIngest import HEADER, AudioIngest, FlowControl, serve_audio_stream
+
+
+class Stream:
+    """Stands in for WhisperLiveKitWordStream, with a backlog the test sets."""
+    def __init__(self):
+        self.chunks = []
+        self.audio_backlog = 0
+        self.listening = None
+
+    def _start_listening(self, mime_type):
+        self.listening = mime_type
+
+    def _stop_listening(self):
+        self.listening = None
+
+    def _handle_audio_chunk(self, data):
+        self.chunks.append(data)
+
+
+def chunk(seq, audio=b"audio"):
+    return HEADER.pack(seq) + audio
+
+
+class TestAudioIngest(unittest.TestCase):
+    """Tests for streaming audio over a WebSocket with flow control."""
+
+    def test_flow_hysteresis(self):
+        flow = FlowControl(slow_bytes=100, pause_bytes=1000, resume_bytes=10)
+        states = []
+        for backlog in [50, 100, 50, 1000, 500, 99, 50, 9]:
+            flow.update(backlog)
+            states.append(flow.state)
+        self.assertEqual(states, ["ok", "slow", "slow", "pause", "pause", "slow", "slow", "ok"])
+
+    def test_sequence_numbers(self):
+        stream = Stream()
+        ingest = AudioIngest(stream, ack_every=2)
+        self.assertIsNone(ingest.receive(chunk(0, b"a")))
+        self.assertEqual(ingest.receive(chunk(1, b"b")), {"type": "ack", "seq": 1, "flow": "ok", "backlog": 0})
+        self.assertIsNone(ingest.receive(chunk(1, b"b")))
+        self.assertIsNone(ingest.receive(chunk(4, b"e")))
+        self.assertIsNone(ingest.receive(b"\x00"))
+        self.assertEqual(stream.chunks, [b"a", b"b", b"e"])
+        self.assertEqual((ingest.next, ingest.duplicates, ingest.missing), (5, 1, 2))
+
+    def test_flow_changes_acked(self):
+        stream = Stream()
+        ingest = AudioIngest(stream, FlowControl(slow_bytes=100, pause_bytes=1000, resume_bytes=10), ack_every=100)
+        stream.audio_backlog = 2000
+        self.assertEqual(ingest.receive(chunk(0))["flow"], "pause")
+        self.assertIsNone(ingest.receive(chunk(1)))
+        # While the client holds it's audio the backlog's checked without it:
+        self.assertIsNone(ingest.poll())
+        stream.audio_backlog = 0
+        self.assertEqual(ingest.poll(), {"type": "ack", "seq": 1, "flow": "ok", "backlog": 0})
+        self.assertEqual(ingest.stats()["flow_changes"], 2)
+
+    def test_websocket(self):
+        stream = Stream()
+        app = Flask(__name__)
+
+        @app.route("/audio_stream", websocket=True)
+        def audio_stream():
+            return serve_audio_stream(request.environ, stream, request.args["mime_type"], ack_every=2)
+
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            ws = Client.connect(f"ws://127.0.0.1:{server.server_port}/audio_stream?mime_type=audio/wav")
+            self.assertEqual(json.loads(ws.receive(timeout=2)), {"type": "ready", "next": 0})
+            self.assertEqual(stream.listening, "audio/wav")
+            for seq in range(3):
+                ws.send(chunk(seq, bytes([seq])))
+            self.assertEqual(json.loads(ws.receive(timeout=2))["seq"], 1)
+            ws.send(json.dumps({"type": "stop"}))
+            stopped = json.loads(ws.receive(timeout=2))
+            self.assertEqual((stopped["type"], stopped["chunks"], stopped["bytes"]), ("stopped", 3, 3))
+            self.assertEqual(stream.chunks, [b"\x00", b"\x01", b"\x02"])
+            self.assertIsNone(stream.listening)
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+
+from Alejandro.Core.AudioProcessorPool import AudioProcessorPool
+from Alejandro.Core.EventLoop import EventLoopThread
+
+
+class TestAudioProcessorPool(unittest.TestCase):
+    """Tests for keeping audio processors ready ahead of time."""
+
+    def setUp(self):
+        self.loop = EventLoopThread("test_pool")
+        self.created = 0
+
+    def tearDown(self):
+        self.loop.stop()
+
+    async def create(self):
+        await asyncio.sleep(0.01)
+        self.created += 1
+        return self.created
+
+    def wait_ready(self, pool, count):
+        for _ in range(100):
+            if pool.ready == count:
+                return
+            self.loop.submit(asyncio.sleep(0.01)).result()
+        self.fail(f"pool has {pool.ready} ready, not {count}")
+
+    def test_fills_and_refills(self):
+        pool = AudioProcessorPool(self.create, self.loop, size=2)
+        pool.fill()
+        self.wait_ready(pool, 2)
+
+        self.assertEqual(self.loop.submit(pool.acquire()).result(timeout=1), 1)
+        self.wait_ready(pool, 2)
+        self.assertEqual(self.created, 3)
+
+    def test_acquire_waits_when_empty(self):
+        pool = AudioProcessorPool(self.create, self.loop, size=0)
+        async def acquire_two():
+            return await asyncio.gather(pool.acquire(), pool.acquire())
+        self.assertEqual(sorted(self.loop.submit(acquire_two()).result(timeout=1)), [1, 2])
+        self.assertEqual(pool.ready, 0)
+
+    def test_failed_create_fails_acquire(self):
+        async def fail():
+            raise RuntimeError("no model")
+        pool = AudioProcessorPool(fail, self.loop, size=0)
+        with self.assertRaises(RuntimeError):
+            self.loop.submit(pool.acquire()).result(timeout=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+
+from Alejandro.Core.ControlExecutor import ControlExecutor
+
+
+class TestControlExecutor(unittest.TestCase):
+    """Tests for the per-session ordered ControlExecutor."""
+
+    def test_inline_runs_immediately(self):
+        """Inline actions run on the calling thread when nothing is queued."""
+        executor = ControlExecutor()
+        future = executor.submit(threading.get_ident, background=False)
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), threading.get_ident())
+
+    def test_background_does_not_block(self):
+        """Background actions return straight away and complete later."""
+        executor = ControlExecutor()
+        release = threading.Event()
+        future = executor.submit(release.wait)
+        self.assertFalse(future.done())
+        release.set()
+        self.assertTrue(future.result(timeout=1))
+
+    def test_actions_run_in_order(self):
+        """Inline actions queue behind pending background ones."""
+        executor = ControlExecutor()
+        order = []
+        executor.submit(lambda: (time.sleep(0.05), order.append("slow")))
+        inline = executor.submit(lambda: order.append("fast"), background=False)
+        self.assertFalse(inline.done())
+        inline.result(timeout=1)
+        self.assertEqual(order, ["slow", "fast"])
+
+    def test_inline_from_two_threads(self):
+        """An inline action running on one thread holds back actions submitted from others."""
+        executor = ControlExecutor()
+        order = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(1)
+            order.append("first")
+
+        thread = threading.Thread(target=executor.submit, args=(slow,), kwargs={"background": False})
+        thread.start()
+        self.assertTrue(started.wait(1))
+        self.assertTrue(executor.busy)
+        inline = executor.submit(lambda: order.append("inline"), background=False)
+        background = executor.submit(lambda: order.append("background"))
+        self.assertFalse(inline.done())
+        release.set()
+        thread.join(1)
+        background.result(timeout=1)
+        self.assertEqual(order, ["first", "inline", "background"])
+
+    def test_failure_does_not_stop_queue(self):
+        executor = ControlExecutor()
+        failed = executor.submit(lambda: 1 / 0)
+        after = executor.submit(lambda: "ok")
+        self.assertEqual(after.result(timeout=1), "ok")
+        self.assertIsInstance(failed.exception(), ZeroDivisionError)
+
+
+if __name__ == "__main__":
+    unittest.main()
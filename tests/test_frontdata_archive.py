@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from Alejandro.Core.FrontDataArchive import FrontDataArchive, read_archive
+
+
+class FrontData:
+    def __init__(self, text):
+        self.text = text
+
+    def to_dict(self):
+        return {"lines": [{"text": self.text}], "buffer_transcription": ""}
+
+
+class TestFrontDataArchive(unittest.TestCase):
+    """Tests for archiving WhisperLiveKit results in the background."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_changed_results_round_trip(self):
+        archive = FrontDataArchive(self.path, "session")
+        for i, text in enumerate(["go", "go", "go back", "go back", "go back now"]):
+            self.assertTrue(archive.write(FrontData(text), when=100.0 + i))
+        archive.close().result(timeout=2)
+        self.assertFalse(archive.write(FrontData("late")))
+
+        results = list(read_archive(self.path))
+        self.assertEqual([r.data["lines"][0]["text"] for r in results], ["go", "go back", "go back now"])
+        self.assertEqual([r.time for r in results], [100.0, 102.0, 104.0])
+        self.assertEqual({r.session for r in results}, {"session"})
+        self.assertEqual((archive.written, archive.skipped, archive.dropped), (3, 2, 0))
+        self.assertEqual(len(os.listdir(self.path)), 1)
+
+    def test_rotates_by_size_and_age(self):
+        archive = FrontDataArchive(self.path, "session", sampling="all", max_bytes=200, max_seconds=10)
+        for i in range(10):
+            archive.write({"text": "x" * 50, "i": i}, when=100.0 + i)
+        archive.write({"text": "later", "i": 10}, when=200.0)
+        archive.close().result(timeout=2)
+
+        self.assertGreater(len(archive.paths), 3)
+        self.assertEqual(sorted(os.listdir(self.path)), sorted(os.path.basename(p) for p in archive.paths))
+        self.assertEqual([r.data["i"] for r in read_archive(self.path)], list(range(11)))
+        self.assertEqual([r.data["i"] for r in read_archive(archive.paths[-1])], [10])
+
+    def test_sampling(self):
+        every = FrontDataArchive(os.path.join(self.path, "every"), "a", sampling="all", every=3)
+        off = FrontDataArchive(os.path.join(self.path, "off"), "b", sampling="off")
+        for i in range(7):
+            every.write({"i": i})
+            self.assertFalse(off.write({"i": i}))
+        every.close().result(timeout=2)
+        off.close().result(timeout=2)
+
+        self.assertEqual([r.data["i"] for r in read_archive(os.path.join(self.path, "every"), session_id="a")], [0, 3, 6])
+        self.assertEqual(list(read_archive(os.path.join(self.path, "every"), session_id="b")), [])
+        self.assertFalse(os.path.exists(os.path.join(self.path, "off")))
+
+
+if __name__ == "__main__":
+    unittest.main()
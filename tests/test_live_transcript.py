@@ -0,0 +1,261 @@
+import asyncio
+import os
+import random
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from Alejandro.Core.LiveTranscript import AdaptiveStability, LiveTranscript
+from Alejandro.Core.TranscriptTiming import transcript_spans
+from Alejandro.Core import WhisperLiveKitWordStream as wlk
+from Alejandro.Core.WhisperLiveKitWordStream import WhisperLiveKitWordStream, PCM_MIME
+
+
+def line(text, start, end=None):
+    return SimpleNamespace(text=text, start=start, end=end if end is not None else start + 1.0, words=None)
+
+
+class CountingLines(list):
+    """A result's lines, counting which of them are read."""
+    def __init__(self, lines):
+        super().__init__(lines)
+        self.read = set()
+
+    def __getitem__(self, index):
+        self.read.add(index)
+        return super().__getitem__(index)
+
+
+class TestLiveTranscript(unittest.TestCase):
+    """Tests for following WhisperLiveKit's lines incrementally."""
+
+    def assertMatchesJoined(self, transcript, lines):
+        text, spans = transcript_spans(lines)
+        self.assertEqual(len(transcript), len(text))
+        self.assertEqual(transcript.text(), text)
+        self.assertEqual(transcript.spans(), spans)
+
+    def test_growing_last_line(self):
+        transcript = LiveTranscript()
+        self.assertEqual(transcript.update([line("go", 0.0)]), 0)
+        self.assertIsNone(transcript.update([line("go", 0.0)]))
+        self.assertEqual(transcript.update([line("go back", 0.0)]), 2)
+        self.assertEqual(transcript.update([line("go back", 0.0), line("", 1.0), line("open", 2.0)]), 7)
+        self.assertEqual(transcript.text(3), "back open")
+        self.assertEqual(transcript.text(3, 7), "back")
+        self.assertEqual(transcript.update([line("go back", 0.0), line("", 1.0), line("opened", 2.0)]), 12)
+
+    def test_only_reads_from_last_line(self):
+        transcript = LiveTranscript()
+        lines = [line(f"sentence number {i}", float(i)) for i in range(100)]
+        transcript.update(lines)
+
+        grown = CountingLines(lines[:99] + [line("sentence number 99 and", 99.0), line("more", 100.0)])
+        self.assertEqual(transcript.update(grown), len(transcript_spans(lines)[0]))
+        self.assertEqual(grown.read, {98, 99, 100})
+        self.assertMatchesJoined(transcript, grown)
+
+    def test_earlier_line_changed(self):
+        transcript = LiveTranscript()
+        transcript.update([line("one", 0.0), line("two", 1.0), line("three", 2.0)])
+        # (eg re-assigning speakers, merging the first two lines)
+        merged = [line("one two", 0.0), line("three", 2.0)]
+        self.assertIsNone(transcript.update(merged))
+        self.assertMatchesJoined(transcript, merged)
+        changed = [line("one, two", 0.0), line("three", 2.0)]
+        self.assertEqual(transcript.update(changed), 3)
+        self.assertMatchesJoined(transcript, changed)
+
+        self.assertEqual(transcript.update([line("one, two", 0.0)]), 8)
+        self.assertEqual(transcript.update([]), 0)
+        self.assertEqual(len(transcript), 0)
+
+    def test_matches_joining_every_line(self):
+        rng = random.Random(0)
+        transcript = LiveTranscript()
+        lines = []
+        previous = ""
+        for _ in range(500):
+            roll = rng.random()
+            if roll < 0.5 and lines:
+                last = lines[-1]
+                lines[-1] = line(last.text + " " + rng.choice(["go", "back", "open", "notes"]), last.start)
+            elif roll < 0.9 or not lines:
+                lines.append(line(rng.choice(["", "hello", "stop listening"]), float(len(lines))))
+            else:
+                # (Committed lines don't change, only the last couple can be re-split)
+                lines[rng.randrange(max(0, len(lines) - 2), len(lines))] = line(rng.choice(["edited", ""]), -1.0)
+
+            changed = transcript.update(list(lines))
+            text = transcript_spans(lines)[0]
+            self.assertMatchesJoined(transcript, lines)
+            if text == previous:
+                self.assertIsNone(changed)
+            else:
+                self.assertEqual(text[:changed], previous[:changed])
+                self.assertNotEqual(text[changed:], previous[changed:])
+            previous = text
+
+    def test_buffer_after_lines(self):
+        transcript = LiveTranscript()
+        self.assertEqual(transcript.update([], " go"), 0)
+        self.assertEqual((transcript.committed, transcript.text()), (0, "go"))
+        self.assertEqual(transcript.update([], "go back"), 2)
+        # Committing the buffer as it was changes nothing:
+        self.assertIsNone(transcript.update([line("go", 0.0)], "back"))
+        self.assertEqual((transcript.committed, transcript.text()), (2, "go back"))
+        self.assertEqual(transcript.update([line("go", 0.0)], "bad"), 5)
+        self.assertEqual(transcript.text(1, 5), "o ba")
+        self.assertEqual([span.last for span in transcript.spans(3)], [2])
+
+
+class TestAdaptiveStability(unittest.TestCase):
+
+    def test_learns_from_revisions(self):
+        stability = AdaptiveStability(initial=0.5, minimum=0.1, maximum=1.0, warm_up=5)
+        for _ in range(4):
+            stability.revised(0.3)
+        self.assertEqual(stability.seconds, 0.5)
+        stability.revised(0.3)
+        self.assertAlmostEqual(stability.seconds, 0.36)
+
+        for _ in range(100):
+            stability.kept()
+        self.assertEqual(stability.seconds, 0.1)
+        for _ in range(100):
+            stability.revised(2.0)
+        self.assertEqual(stability.seconds, 1.0)
+
+
+def result(lines, buffer=""):
+    return SimpleNamespace(lines=lines, buffer_transcription=buffer)
+
+
+class TestCommitAwareFinalization(unittest.TestCase):
+    """Tests for when WhisperLiveKitWordStream finalizes words."""
+
+    def setUp(self):
+        WhisperLiveKitWordStream.processor_pool_size = 0
+        self.stream = WhisperLiveKitWordStream(save_directory=None, session_id="test_live_transcript")
+        self.stream.retranscriber = None
+        self.stream.stability = AdaptiveStability(initial=0.1)
+
+    def tearDown(self):
+        WhisperLiveKitWordStream.streams.pop("test_live_transcript", None)
+
+    def finalized(self):
+        queue = self.stream.word_queue
+        return [queue.get_nowait().word for _ in range(queue.qsize())]
+
+    def test_committed_now_buffer_when_stable(self):
+        async def speak():
+            process = self.stream._process_wlk_transcription
+            process(result([line("go back", 0.0)], "open"))
+            self.assertEqual(self.finalized(), ["go", "back"])
+            process(result([line("go back", 0.0)], "open no"))
+            await asyncio.sleep(0.05)
+            process(result([line("go back", 0.0)], "open notes"))
+            self.assertEqual(self.finalized(), [])
+
+            await asyncio.sleep(0.2)
+            self.assertEqual(self.finalized(), ["open", "notes"])
+            self.assertEqual(list(self.stream.stability.ages), [0.0, 0.0])
+            # (Already given when it was stable)
+            process(result([line("go back open notes", 0.0)]))
+            self.assertEqual(self.finalized(), [])
+            process(result([line("go back open notes", 0.0), line("stop", 1.0)]))
+            self.assertEqual(self.finalized(), ["stop"])
+        asyncio.run(speak())
+
+    def test_revised_hypothesis(self):
+        async def speak():
+            process = self.stream._process_wlk_transcription
+            process(result([], "by"))
+            await asyncio.sleep(0.05)
+            process(result([], "buy milk"))
+            self.assertEqual(len(self.stream.stability.ages), 1)
+            self.assertGreater(self.stream.stability.ages[0], 0.0)
+            process(result([line("buy milk", 0.0)]))
+            self.assertEqual(self.finalized(), ["buy", "milk"])
+        asyncio.run(speak())
+
+
+class Processor:
+    """Stands in for an AudioProcessor, keeping the chunks it's given (taking delay seconds each)."""
+    def __init__(self, delay):
+        self.delay = delay
+        self.chunks = []
+        self.ended = asyncio.Event()
+
+    async def process_audio(self, chunk):
+        await asyncio.sleep(self.delay)
+        self.chunks.append(chunk)
+        if not chunk:
+            self.ended.set()
+
+    async def results(self):
+        await self.ended.wait()
+        return
+        yield
+
+
+class Pool:
+    """Stands in for an AudioProcessorPool, the first processor being slow."""
+    def __init__(self):
+        self.processors = []
+
+    async def acquire(self):
+        processor = Processor(0.05 if not self.processors else 0.001)
+        self.processors.append(processor)
+        return processor, processor.results()
+
+
+class TestRecordings(unittest.TestCase):
+    """Tests for transcribing one recording after another."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pools = dict(wlk._processor_pools)
+        self.pool = wlk._processor_pools[True] = Pool()
+        self.sampling = WhisperLiveKitWordStream.frontdata_sampling
+        WhisperLiveKitWordStream.frontdata_sampling = "off"
+        self.stream = WhisperLiveKitWordStream(os.path.join(self.directory.name, "Recordings"), session_id="test_recordings")
+        self.stream.retranscriber = None
+        self.stream.wake_spotter = None
+
+    def tearDown(self):
+        self.stream.close()
+        wlk._processor_pools.clear()
+        wlk._processor_pools.update(self.pools)
+        WhisperLiveKitWordStream.frontdata_sampling = self.sampling
+        self.directory.cleanup()
+
+    def test_restarted_quickly(self):
+        stream = self.stream
+        stream._start_listening(PCM_MIME)
+        first = stream.processing_task
+        for i in range(5):
+            stream._queue_audio(bytes([i]) * 10)
+        # Started again while the first recording's chunks are still being processed:
+        stream._stop_listening()
+        stream._start_listening(PCM_MIME)
+        stream._queue_audio(b"second")
+        first.result(timeout=2)
+
+        old, new = self.pool.processors
+        self.assertEqual(old.chunks, [bytes([i]) * 10 for i in range(5)] + [b""])
+        for _ in range(100):
+            if new.chunks:
+                break
+            time.sleep(0.01)
+        self.assertEqual(new.chunks, [b"second"])
+        self.assertIs(stream.audio_processor, new)
+
+        stream._stop_listening()
+        stream.processing_task.result(timeout=2)
+        self.assertEqual(new.chunks, [b"second", b""])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from typing import List
+
+from Alejandro.Core.Control import Control, ControlResult
+from Alejandro.Core.ModalControl import ModalControl
+from Alejandro.Core.PhraseMatcher import PhraseMatcher, PhraseKind
+from Alejandro.Core.WordNode import WordNode
+from Alejandro.Core.WordStream import WordStream
+
+
+class TestPhraseMatcher(unittest.TestCase):
+    """Tests for the compiled per-screen PhraseMatcher."""
+
+    def setUp(self):
+        self.back = Control(id="back", text="Back", keyphrases=["go back", "return"], action=None)
+        self.terminal = Control(id="terminal", text="Terminal", keyphrases=["open terminal 1"], action=None)
+        self.speak = ModalControl(
+            id="speak",
+            text="Start Speaking",
+            keyphrases=[],
+            deactivate_phrases=["stop speaking"],
+            action=None
+        )
+        self.matcher = PhraseMatcher([self.back, self.terminal, self.speak])
+
+    def _feed(self, text: str, state: int = 0) -> List[List[str]]:
+        """Feed text through the matcher returning the matched control ids per word."""
+        found = []
+        for word in WordStream.process_text(text):
+            state, matches = self.matcher.advance(state, word)
+            found.append([m.control.id for m in matches])
+        return found
+
+    def test_matches_end_of_phrase(self):
+        """Phrases are reported on the word that completes them."""
+        found = self._feed("please go back now")
+        self.assertEqual(found, [[], [], ["back", "back"], []])
+
+    def test_matches_overlapping_phrases(self):
+        """A failed partial match does not hide a phrase starting inside it."""
+        found = self._feed("open open terminal one")
+        self.assertEqual(found[-1], ["terminal"])
+
+    def test_agrees_with_check_phrase(self):
+        """The automaton reports the same controls as walking the word stream."""
+        nodes = WordStream.process_text("terminal go back start speaking hi stop speaking return")
+        state = 0
+        for node in nodes:
+            state, matches = self.matcher.advance(state, node)
+            matched = {m.control.id for m in matches if m.kind == PhraseKind.ACTIVATE}
+            expected = {
+                c.id for c in (self.back, self.terminal, self.speak)
+                if c._activated(node, None)
+            }
+            self.assertEqual(matched, expected, node.word)
+
+    def test_prime_resumes_partial_phrase(self):
+        """Priming from earlier words lets a phrase span a matcher switch."""
+        nodes = WordStream.process_text("go back")
+        state = self.matcher.prime(nodes[0])
+        _, matches = self.matcher.advance(state, nodes[1])
+        self.assertIn(self.back, [m.control for m in matches])
+
+    def test_numbers_match_across_spellings(self):
+        """A phrase written with digits matches the number spoken in words."""
+        found = self._feed("open terminal one")
+        self.assertEqual(found[-1], ["terminal"])
+        control = Control(id="room", text="Room 25", keyphrases=[], action=None)
+        matcher = PhraseMatcher([control])
+        state = 0
+        for node in WordStream.process_text("room twenty five"):
+            state, matches = matcher.advance(state, node)
+        self.assertEqual([m.length for m in matches], [3])
+
+    def test_fuzzy_matching(self):
+        """Controls with a max_fuzzy_cost match near misses, reporting their cost."""
+        fuzzy = Control(id="wake", text="Hey Alejandro", keyphrases=[], action=None, max_fuzzy_cost=0.3)
+        matcher = PhraseMatcher([self.back, fuzzy])
+
+        def costs(text: str):
+            state = 0
+            for node in WordStream.process_text(text):
+                state, matches = matcher.advance(state, node)
+            return [(m.control.id, round(m.cost, 2)) for m in matches]
+
+        self.assertEqual(costs("hey alejandro"), [("wake", 0.0)])
+        self.assertEqual(costs("hey alehandro"), [("wake", 0.11)])
+        self.assertEqual(costs("hey alfredo"), [])
+        # Exact only controls stay exact:
+        self.assertEqual(costs("go bach"), [])
+
+    def test_modal_control_deactivates_with_matches(self):
+        """ModalControl trims the deactivate phrase using the reported match length."""
+        state = 0
+        results = []
+        for node in WordStream.process_text("start speaking hello world stop speaking"):
+            state, matches = self.matcher.advance(state, node)
+            mine = [m for m in matches if m.control is self.speak]
+            results.append(self.speak.validate_word(node, mine))
+        self.assertEqual(results[-1], ControlResult.USED)
+        self.assertEqual(self.speak.collected_words, "hello world")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from Alejandro.Core.Application import Application
+from Alejandro.Core.Control import Control
+from Alejandro.Core.RecordedWordStream import RecordingWordStream, ReplayWordStream, read_recording
+from Alejandro.Core.Screen import Screen
+from Alejandro.Core.WordStream import WordStream, QueuedWordStream
+
+
+class Session:
+    id = "test"
+
+
+class TestRecordedWordStream(unittest.TestCase):
+    """Tests for recording word streams and replaying them into an Application."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "words.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _record(self, text: str):
+        stream = QueuedWordStream()
+        recording = RecordingWordStream(stream, self.path, session_id="test", screen_provider=lambda: "WelcomeScreen")
+        stream.add_words_to_queue(WordStream.process_text(text))
+        stream.close()
+        words = [w.word for w in recording.words()]
+        recording.close().result(timeout=2)
+        return words
+
+    def test_round_trip(self):
+        words = self._record("hey alejandro go back")
+        header, recorded = read_recording(self.path)
+        self.assertEqual(header["session"], "test")
+        self.assertEqual([w.word for w in recorded], words)
+        self.assertEqual({w.screen for w in recorded}, {"WelcomeScreen"})
+        # The screen is only written when it changes:
+        with open(self.path) as f:
+            self.assertEqual(sum("WelcomeScreen" in line for line in f), 1)
+
+    def test_replays_into_application(self):
+        self._record("please go back now go back")
+        fired = []
+        control = Control(id="back", text="go back", keyphrases=[], action=lambda: fired.append(True))
+        screen = Screen(session=Session(), title="Test", controls=[control])
+
+        replay = ReplayWordStream(self.path, speed=None)
+        app = Application(replay, screen)
+        deadline = time.time() + 2
+        while len(fired) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(fired), 2)
+
+    def test_replay_speed(self):
+        stream = QueuedWordStream()
+        recording = RecordingWordStream(stream, self.path)
+        for i, word in enumerate(WordStream.process_text("one two three")):
+            word.start = word.end = 1000.0 + i
+            stream.add_words_to_queue([word])
+        stream.close()
+        list(recording.words())
+        recording.close().result(timeout=2)
+
+        start = time.time()
+        words = [w.word for w in ReplayWordStream(self.path, speed=10).words()]
+        self.assertEqual(words, ["one", "two", "three"])
+        self.assertAlmostEqual(time.time() - start, 0.2, delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
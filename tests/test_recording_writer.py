@@ -0,0 +1,138 @@
+import os
+import tempfile
+import time
+import unittest
+import wave
+
+import numpy as np
+
+from Alejandro.Core.RecordingWriter import RecordingWriter, buffer_depth, encode_pcm, recording_metrics
+from Alejandro.Core.Retranscriber import RecordingPCMAudio
+
+
+class SlowFile:
+    """A file on a disk that takes delay seconds per write."""
+    def __init__(self, file, delay):
+        self.file = file
+        self.delay = delay
+
+    def write(self, data):
+        time.sleep(self.delay)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class FullDisk:
+    """A file on a disk with no room left."""
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, data):
+        raise OSError(28, "No space left on device")
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class TestRecordingWriter(unittest.TestCase):
+    """Tests for writing recordings in the background."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "raw_recording.webm")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_written_and_renamed(self):
+        recording = RecordingWriter(self.path, flush_ms=10, fsync="close")
+        for i in range(100):
+            recording.write(bytes([i]) * 100)
+
+        # Readable while it's still recording:
+        for _ in range(100):
+            if len(self.read(self.path)) == 10000:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(self.read(self.path)), 10000)
+
+        renamed = os.path.join(self.directory.name, "recording.webm")
+        self.assertEqual(recording.close(renamed).result(timeout=2), renamed)
+        self.assertEqual(self.read(renamed), b"".join(bytes([i]) * 100 for i in range(100)))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertRaises(ValueError, recording.write, b"late")
+        self.assertIn("recording_flush", recording_metrics.summary())
+
+    def test_slow_disk(self):
+        recording = RecordingWriter(self.path, flush_ms=0, max_buffered=1000)
+        recording._file = SlowFile(recording._file, 0.02)
+        start = time.perf_counter()
+        for i in range(10):
+            recording.write(bytes([i]) * 50)
+        # (Buffered, rather than waiting for each write)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertGreater(buffer_depth()["buffered_bytes"], 0)
+
+        # With the buffer full every chunk is still kept, writing just waits for room:
+        for i in range(10, 60):
+            recording.write(bytes([i]) * 50)
+        self.assertLessEqual(recording.peak_buffered, 1050)
+        recording.close().result(timeout=5)
+        self.assertEqual(self.read(self.path), b"".join(bytes([i]) * 50 for i in range(60)))
+        self.assertEqual(recording.buffered, 0)
+
+    def test_failed_write(self):
+        recording = RecordingWriter(self.path, flush_ms=0, max_buffered=100)
+        recording._file = FullDisk(recording._file)
+        # A write waiting for room is woken when it fails, rather than waiting forever:
+        for _ in range(100):
+            try:
+                recording.write(b"x" * 60)
+            except OSError:
+                break
+        self.assertIsNotNone(recording.error)
+        self.assertRaises(OSError, recording.write, b"more")
+        closing = recording.close()
+        self.assertIsInstance(closing.exception(timeout=2), OSError)
+        self.assertIs(recording.close(), closing)
+
+    def test_closed_twice(self):
+        recording = RecordingWriter(self.path)
+        recording.write(b"audio")
+        closing = recording.close()
+        self.assertEqual(closing.result(timeout=2), self.path)
+        self.assertIs(recording.close(), closing)
+        time.sleep(0.05)
+        self.assertEqual(self.read(self.path), b"audio")
+
+    def test_durability_policy(self):
+        self.assertRaises(ValueError, RecordingWriter, self.path, fsync="sometimes")
+
+    def test_pcm_recording(self):
+        path = os.path.join(self.directory.name, "raw_recording.pcm")
+        samples = (np.arange(16000) % 100 * 300).astype("<i2")
+        recording = RecordingWriter(path)
+        recording.write(samples.tobytes())
+        recording.write(b"\x01") # (Half a sample)
+        recording.close().result(timeout=2)
+
+        audio = RecordingPCMAudio(path).read(0.5, 2.0)
+        self.assertEqual(len(audio), 8000)
+        np.testing.assert_allclose(audio, samples[8000:] / 32768.0)
+
+        # Without ffmpeg it's kept as a WAV, and the raw file's gone either way:
+        encoded = encode_pcm(path, ffmpeg="/nonexistent/ffmpeg").result(timeout=10)
+        self.assertEqual(encoded, os.path.join(self.directory.name, "raw_recording.wav"))
+        self.assertFalse(os.path.exists(path))
+        with wave.open(encoded) as wav:
+            self.assertEqual((wav.getframerate(), wav.getnframes()), (16000, 16000))
+
+
+if __name__ == "__main__":
+    unittest.main()
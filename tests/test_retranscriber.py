@@ -0,0 +1,133 @@
+import threading
+import unittest
+
+import numpy as np
+
+from Alejandro.Core.Application import AsyncApplication
+from Alejandro.Core.EventLoop import EventLoopThread
+from Alejandro.Core.ModalControl import ModalControl
+from Alejandro.Core.Retranscriber import AudioSource, Correction, Retranscriber, SAMPLE_RATE, UtteranceTranscriber
+from Alejandro.Core.Screen import Screen
+from Alejandro.Core.WordNode import WordNode
+from Alejandro.Core.WordStream import QueuedWordStream
+
+ORIGIN = 1000.0
+
+
+class Session:
+    def __init__(self, id):
+        self.id = id
+
+
+def spoken(text, start=0.0, seconds_per_word=0.5):
+    """Timed words as the live transcription would give them."""
+    words = []
+    for i, token in enumerate(text.split()):
+        word = WordNode(token, ORIGIN + start + i * seconds_per_word, ORIGIN + start + (i + 1) * seconds_per_word)
+        word.audio_start = start + i * seconds_per_word
+        word.audio_end = start + (i + 1) * seconds_per_word
+        if words:
+            words[-1].set_next(word)
+        words.append(word)
+    return words
+
+
+class SilentAudio(AudioSource):
+    def __init__(self):
+        self.reads = []
+
+    def read(self, start, end):
+        self.reads.append((start, end))
+        return np.zeros(int((end - start) * SAMPLE_RATE), dtype=np.float32)
+
+
+class ScriptedTranscriber(UtteranceTranscriber):
+    """A stand in for a large model, that 'hears' a script of (word, start, end) in recording time."""
+    def __init__(self, script, audio):
+        self.script = script
+        self.audio = audio
+
+    def transcribe(self, samples):
+        start, end = self.audio.reads[-1]
+        return [(word, s - start, e - start) for word, s, e in self.script if start <= s and e <= end]
+
+
+class TestRetranscriber(unittest.TestCase):
+    """Tests for correcting live words with a slower model."""
+
+    def setUp(self):
+        self.loop = EventLoopThread("test_retranscriber")
+        self.audio = SilentAudio()
+
+    def tearDown(self):
+        self.loop.stop()
+
+    def retranscriber(self, script, **kwargs):
+        retranscriber = Retranscriber(ScriptedTranscriber(script, self.audio), loop=self.loop, **kwargs)
+        retranscriber.start_recording(self.audio, ORIGIN)
+        return retranscriber
+
+    def test_flush_corrects_utterance(self):
+        retranscriber = self.retranscriber([("Buy", 1.0, 1.4), ("oat", 1.5, 1.8), ("milk.", 1.9, 2.2)], padding=0.5)
+        corrections = []
+        retranscriber.on_correction.append(corrections.append)
+        retranscriber.add_words(spoken("by milk", start=1.0))
+
+        correction = retranscriber.flush().result(timeout=1)
+        self.assertEqual(self.audio.reads, [(0.5, 2.5)])
+        self.assertEqual(corrections, [correction])
+        self.assertEqual(correction.text, "buy oat milk")
+        self.assertEqual(correction.words[1].audio_start, 1.5)
+        self.assertEqual(correction.words[1].start, ORIGIN + 1.5)
+
+        # Nothing new to correct, so a flush is just the last one:
+        self.assertIs(retranscriber.flush().result(timeout=1), correction)
+        self.assertEqual(len(self.audio.reads), 1)
+
+    def test_pause_ends_utterance_only_when_wanted(self):
+        retranscriber = self.retranscriber([], pause=0.05)
+        done = threading.Event()
+        retranscriber.on_correction.append(lambda correction: done.set())
+
+        retranscriber.wanted = lambda: False
+        retranscriber.add_words(spoken("go back"))
+        self.assertFalse(done.wait(0.3))
+
+        retranscriber.wanted = lambda: True
+        retranscriber.add_words(spoken("hello there", start=3.0))
+        self.assertTrue(done.wait(1))
+        self.assertEqual(self.audio.reads, [(2.7, 4.3)])
+
+    def test_modal_control_applies_correction(self):
+        speak = ModalControl(id="speak", text="speak", keyphrases=["start speaking"], deactivate_phrases=["stop speaking"], action=None)
+        for word in spoken("start speaking buy milk now"):
+            speak.validate_word(word)
+        correction = Correction(ORIGIN + 1.0, ORIGIN + 2.0, [word for word in spoken("buy oat milk", start=1.0, seconds_per_word=1 / 3)])
+        self.assertTrue(speak.apply_correction(correction))
+        self.assertEqual(speak.collected_words, "buy oat milk now")
+
+        untimed = ModalControl(id="speak", text="speak", keyphrases=["start speaking"], deactivate_phrases=["stop speaking"], action=None)
+        for word in QueuedWordStream.process_text("start speaking buy milk"):
+            untimed.validate_word(word)
+        self.assertFalse(untimed.apply_correction(correction))
+
+    def test_dictation_action_gets_corrected_words(self):
+        script = [("start", 0.0, 0.5), ("speaking", 0.5, 1.0), ("buy", 1.0, 1.5), ("oat", 1.5, 1.8), ("milk", 1.8, 2.0), ("stop", 2.0, 2.5), ("speaking", 2.5, 3.0)]
+        stream = QueuedWordStream()
+        stream.retranscriber = self.retranscriber(script)
+        dictated = []
+        speak = ModalControl(id="speak", text="speak", keyphrases=["start speaking"], deactivate_phrases=["stop speaking"], action=lambda control: dictated.append(control.collected_words))
+        screen = Screen(session=Session("dictation"), title="Test", controls=[speak])
+        app = AsyncApplication(stream, screen, event_loop=self.loop)
+
+        words = spoken("start speaking by milk stop speaking")
+        stream.retranscriber.add_words(words)
+        stream.add_words_to_queue(words)
+        stream.close()
+        app.task.result(timeout=2)
+        app.control_executor.submit(lambda: None, background=True).result(timeout=2)
+        self.assertEqual(dictated[-1], "buy oat milk")
+
+
+if __name__ == "__main__":
+    unittest.main()
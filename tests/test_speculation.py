@@ -0,0 +1,168 @@
+import asyncio
+import time
+import unittest
+
+from Alejandro.Core.Application import AsyncApplication
+from Alejandro.Core.Control import Control
+from Alejandro.Core.EventLoop import EventLoopThread
+from Alejandro.Core.ModalControl import ModalControl
+from Alejandro.Core.Screen import Screen
+from Alejandro.Core.WordStream import WordStream, QueuedWordStream
+
+
+class Session:
+    def __init__(self, id):
+        self.id = id
+
+
+class TestSpeculation(unittest.TestCase):
+    """Tests for triggering controls on words before they're final."""
+
+    def setUp(self):
+        self.loop = EventLoopThread("test_speculation")
+        self.stream = QueuedWordStream()
+        self.fired = []
+        self.undone = []
+        controls = [
+            Control(id="back", text="go back", keyphrases=["back"], action=lambda: self.fired.append("back"), speculative=True, undo=lambda: self.undone.append("back")),
+            Control(id="stop", text="stop", keyphrases=[], action=lambda: self.fired.append("stop")),
+            ModalControl(id="speak", text="speak", keyphrases=["start speaking"], deactivate_phrases=["stop speaking"], action=None),
+        ]
+        self.app = AsyncApplication(self.stream, Screen(session=Session("speculation"), title="Test", controls=controls), event_loop=self.loop)
+
+    def tearDown(self):
+        self.loop.stop()
+
+    def hypothesize(self, text):
+        self.stream.announce_hypothesis(WordStream.process_text(text))
+        # (Processed on the application's loop, after anything already on it)
+        self.loop.submit(asyncio.sleep(0)).result(timeout=2)
+
+    def finalize(self, text):
+        self.stream.add_words_to_queue(WordStream.process_text(text))
+        self.stream.close()
+        self.app.task.result(timeout=2)
+
+    def test_said_as_hypothesized(self):
+        self.hypothesize("stop go back")
+        self.assertEqual(self.fired, ["back"])
+        # (The same words again, or more of them, don't trigger it again)
+        self.hypothesize("stop go back please")
+
+        self.finalize("stop go back please")
+        self.assertEqual(self.fired, ["back", "stop"])
+        self.assertEqual(self.undone, [])
+        self.assertEqual(self.app.latency.summary()["speculation_lead"]["count"], 1)
+
+    def test_revised_hypothesis_undone(self):
+        self.stream.add_words_to_queue(WordStream.process_text("well"))
+        self.hypothesize("go back")
+        self.assertEqual(self.fired, ["back"])
+
+        self.finalize("go black top hat go back")
+        self.assertEqual(self.undone, ["back"])
+        # Said for real later, it's triggered as usual:
+        self.assertEqual(self.fired, ["back", "back"])
+
+    def test_single_words_wait(self):
+        self.hypothesize("back")
+        self.assertEqual(self.fired, [])
+        self.finalize("back")
+        self.assertEqual(self.fired, ["back"])
+
+    def test_off_the_transcription_thread(self):
+        """Hypotheses never wait on the session processing a word."""
+        with self.app._word_lock:
+            start = time.perf_counter()
+            self.stream.announce_hypothesis(WordStream.process_text("go"))
+            self.stream.announce_hypothesis(WordStream.process_text("go back"))
+            self.assertLess(time.perf_counter() - start, 0.1)
+            self.assertEqual(self.fired, [])
+        self.hypothesize("go back")
+        self.assertEqual(self.fired, ["back"])
+        self.finalize("go back")
+        self.assertEqual(self.fired, ["back"])
+
+    def test_not_while_modal(self):
+        self.stream.add_words_to_queue(WordStream.process_text("start speaking"))
+        for _ in range(200):
+            if self.app._modal_control:
+                break
+            time.sleep(0.01)
+        self.hypothesize("go back")
+        self.finalize("go back stop speaking")
+        self.assertEqual(self.fired, [])
+
+    def test_words_taken_by_modal_control(self):
+        self.hypothesize("start speaking go back")
+        self.assertEqual(self.fired, ["back"])
+        self.finalize("start speaking go back stop speaking")
+        self.assertEqual(self.undone, ["back"])
+
+
+class TestSpeculativeNavigation(unittest.TestCase):
+    """Tests for undoing speculative navigation only where it still applies."""
+
+    def setUp(self):
+        self.loop = EventLoopThread("test_speculative_navigation")
+        self.stream = QueuedWordStream()
+        self.undone = []
+        session = Session("navigation")
+        self.notes = Screen(session=session, title="Notes", controls=[])
+        self.other = Screen(session=session, title="Other", controls=[])
+        stack = lambda: self.app.screen_stack
+        controls = [
+            Control(id="back", text="go back", keyphrases=[], action=lambda: stack().pop(), speculative=True, undo=lambda popped: stack().undo_pop(popped)),
+            Control(id="notes", text="open notes", keyphrases=[], action=lambda: stack().push(self.notes) or self.notes, speculative=True, undo=lambda screen: stack().undo_push(screen)),
+            Control(id="broken", text="break it", keyphrases=[], action=lambda: 1 / 0, speculative=True, undo=lambda: self.undone.append("broken")),
+        ]
+        self.welcome = Screen(session=session, title="Welcome", controls=controls)
+        self.app = AsyncApplication(self.stream, self.welcome, event_loop=self.loop)
+
+    def tearDown(self):
+        self.loop.stop()
+
+    def hypothesize(self, text):
+        self.stream.announce_hypothesis(WordStream.process_text(text))
+        self.loop.submit(asyncio.sleep(0)).result(timeout=2)
+
+    def finalize(self, text):
+        """Other words than were hypothesized are final, undoing what was triggered."""
+        self.stream.add_words_to_queue(WordStream.process_text(text))
+        self.stream.close()
+        self.app.task.result(timeout=2)
+        # (Waiting on the undo, after anything already queued)
+        self.app.control_executor.submit(lambda: None).result(timeout=2)
+
+    def test_undone(self):
+        self.hypothesize("open notes")
+        self.assertIs(self.app.screen_stack.current, self.notes)
+        self.finalize("open nodes and more words")
+        self.assertIs(self.app.screen_stack.current, self.welcome)
+
+    def test_back_on_single_screen(self):
+        stack = self.app.screen_stack
+        stack.push(self.notes)
+        stack.pop()
+        # Nothing to go back to, so undoing it doesn't go forward to notes:
+        self.hypothesize("go back")
+        self.finalize("go bark at the moon")
+        self.assertEqual(stack._stack, [self.welcome])
+        self.assertEqual(stack._forward_stack, [self.notes])
+
+    def test_stack_changed_since(self):
+        stack = self.app.screen_stack
+        self.hypothesize("open notes")
+        self.assertIs(stack.current, self.notes)
+        self.app.control_executor.submit(lambda: stack.push(self.other)).result(timeout=2)
+        self.finalize("open nodes and more words")
+        # Not undone, notes isn't the current screen anymore:
+        self.assertEqual(stack._stack, [self.welcome, self.notes, self.other])
+
+    def test_failed_action_not_undone(self):
+        self.hypothesize("break it")
+        self.finalize("brake its pads please")
+        self.assertEqual(self.undone, [])
+
+if __name__ == "__main__":
+    unittest.main()
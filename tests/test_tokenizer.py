@@ -0,0 +1,72 @@
+import unittest
+
+from Alejandro.Core.Tokenizer import tokenize, regex_tokenize
+
+# Our transcripts, with the alphanumeric words nltk 3.10's word_tokenize
+# (punkt_tab) gives for them lower cased, so parity is checked without nltk:
+TRANSCRIPTS = [
+    ("Hey Alejandro, open terminal 1.", ["hey", "alejandro", "open", "terminal", "1"]),
+    ("Go back.", ["go", "back"]),
+    ("Next terminal please", ["next", "terminal", "please"]),
+    ("Start speaking. Remind me to call mom at 10:30, then stop speaking.",
+     ["start", "speaking", "remind", "me", "to", "call", "mom", "at", "then", "stop", "speaking"]),
+    ("Save note: buy milk, eggs & bread; done", ["save", "note", "buy", "milk", "eggs", "bread", "done"]),
+    ("I can't find the note I made yesterday, can you search notes?",
+     ["i", "ca", "find", "the", "note", "i", "made", "yesterday", "can", "you", "search", "notes"]),
+    ("Don't open that! It's not the right one.", ["do", "open", "that", "it", "not", "the", "right", "one"]),
+    ("We're gonna need 1,000 more of these, aren't we?", ["we", "gon", "na", "need", "more", "of", "these", "are", "we"]),
+    ("Load note \"shopping list\" and read it back", ["load", "note", "shopping", "list", "and", "read", "it", "back"]),
+    ("She said 'hello' and I'd said hi -- then we left...",
+     ["she", "said", "hello", "and", "i", "said", "hi", "then", "we", "left"]),
+    ("Open conversation number 21 (the 2nd one)", ["open", "conversation", "number", "21", "the", "2nd", "one"]),
+    ("They'll be there at $5 or 50% off, won't they?", ["they", "be", "there", "at", "5", "or", "50", "off", "wo", "they"]),
+    ("Let's see what's in terminal #2 @ home", ["let", "see", "what", "in", "terminal", "2", "home"]),
+    ("I've got to go, I'm late, you've seen it", ["i", "got", "to", "go", "i", "late", "you", "seen", "it"]),
+]
+
+
+def _is_alnum(tokens):
+    return [t for t in tokens if t.isalnum()]
+
+
+class TestTokenizer(unittest.TestCase):
+    """Tests for the built in regex tokenizer."""
+
+    def test_words_and_numbers(self):
+        self.assertEqual(tokenize("Open Terminal 2!"), ("open", "terminal", "2"))
+        # Like nltk, times and numbers with separators stay whole and aren't alphanumeric:
+        self.assertEqual(tokenize("it's 10:30, 1,000 times"), ("it", "times"))
+
+    def test_contractions(self):
+        self.assertEqual(tokenize("don't can't won't I'm you're we've"), ("do", "ca", "wo", "i", "you", "we"))
+        self.assertEqual(tokenize("gonna cannot"), ("gon", "na", "can", "not"))
+
+    def test_punctuation_dropped(self):
+        self.assertEqual(tokenize('"Hello," (she) said... $5 #1'), ("hello", "she", "said", "5", "1"))
+        self.assertEqual(tokenize("well-known e-mail 3.5"), ())
+
+    def test_cached(self):
+        tokenize.cache_clear()
+        tokenize("go back")
+        tokenize("go back")
+        self.assertEqual(tokenize.cache_info().hits, 1)
+
+    def test_parity(self):
+        """The regex tokenizer gives the same words as nltk on our transcripts."""
+        for text, words in TRANSCRIPTS:
+            self.assertEqual(_is_alnum(regex_tokenize(text.lower())), words, text)
+
+    def test_recorded_tokens_match_nltk(self):
+        """The words recorded in TRANSCRIPTS are still what nltk gives."""
+        try:
+            import nltk
+            nltk.data.find('tokenizers/punkt_tab/english')
+        except (ImportError, LookupError):
+            self.skipTest("nltk with punkt data is not installed, test_parity uses the recorded words")
+
+        for text, words in TRANSCRIPTS:
+            self.assertEqual(_is_alnum(nltk.word_tokenize(text.lower())), words, text)
+
+
+if __name__ == "__main__":
+    unittest.main()
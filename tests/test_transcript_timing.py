@@ -0,0 +1,93 @@
+import unittest
+from types import SimpleNamespace
+
+from Alejandro.Core.Latency import ChunkArrivals, LatencyTracker
+from Alejandro.Core.TranscriptTiming import audio_seconds, timed_words, transcript_spans
+from Alejandro.Core.WordNode import WordNode
+
+
+def line(text, start, end, words=None):
+    return SimpleNamespace(text=text, start=start, end=end, words=words)
+
+
+class TestTranscriptTiming(unittest.TestCase):
+    """Tests for timing transcribed words from WhisperLiveKit's lines."""
+
+    def test_audio_seconds(self):
+        self.assertEqual(audio_seconds(1.5), 1.5)
+        self.assertEqual(audio_seconds("0:01:02.50"), 62.5)
+        self.assertIsNone(audio_seconds(None))
+        self.assertIsNone(audio_seconds("soon"))
+
+    def test_interpolated_within_line(self):
+        text, spans = transcript_spans([line(" go back ", 2.0, 3.0), line("", 3.0, 3.0), line("open notes", 4.0, 6.0)])
+        self.assertEqual(text, "go back open notes")
+
+        words = timed_words(text, 0, spans, origin=100.0)
+        self.assertEqual([w.word for w in words], ["go", "back", "open", "notes"])
+        self.assertEqual(words[0].audio_start, 2.0)
+        self.assertEqual(words[1].audio_end, 3.0)
+        self.assertEqual(words[3].audio_end, 6.0)
+        self.assertEqual(words[3].end, 106.0)
+        for earlier, later in zip(words, words[1:]):
+            self.assertLessEqual(earlier.audio_end, later.audio_start)
+
+    def test_slice_of_transcript(self):
+        """Finalizing part of a line only spreads that part's share of it's time."""
+        text, spans = transcript_spans([line("one two three four", 0.0, 4.0)])
+        first = timed_words(text[:8], 0, spans, origin=0.0)
+        rest = timed_words(text[8:], 8, spans, origin=0.0)
+        self.assertEqual([w.word for w in first + rest], ["one", "two", "three", "four"])
+        self.assertAlmostEqual(first[-1].audio_end, rest[0].audio_start)
+        self.assertEqual(rest[-1].audio_end, 4.0)
+
+    def test_word_timing_used(self):
+        words = [SimpleNamespace(text="hello", start=1.0, end=1.2), SimpleNamespace(text="there", start=1.8, end=2.0)]
+        text, spans = transcript_spans([line("Hello, there.", 1.0, 2.0)])
+        self.assertEqual(len(spans), 1)
+        text, spans = transcript_spans([line("hello there", 1.0, 2.0, words)])
+        timed = timed_words(text, 0, spans, origin=0.0)
+        self.assertEqual([(w.audio_start, w.audio_end) for w in timed], [(1.0, 1.2), (1.8, 2.0)])
+
+    def test_untimed_without_origin(self):
+        text, spans = transcript_spans([line("go back", None, None)])
+        for origin in (None, 0.0):
+            words = timed_words(text, 0, spans, origin=origin)
+            self.assertEqual([w.word for w in words], ["go", "back"])
+            self.assertIsNone(words[0].audio_start)
+
+    def test_chunk_arrivals(self):
+        arrivals = ChunkArrivals(origin=100.0)
+        self.assertIsNone(arrivals.arrival_of(1.0))
+        arrivals.add(101.1)
+        arrivals.add(102.3, audio_end=2.0)
+        self.assertEqual(arrivals.arrival_of(0.5), 101.1)
+        self.assertEqual(arrivals.arrival_of(1.5), 102.3)
+        self.assertEqual(arrivals.arrival_of(9.0), 102.3)
+        arrivals.forget_before(1.5)
+        self.assertEqual(arrivals.arrival_of(0.5), 102.3)
+
+
+class TestLatencyTracker(unittest.TestCase):
+
+    def test_stages(self):
+        tracker = LatencyTracker()
+        word = WordNode("back", 9.0, 10.0)
+        word.arrived = 10.5
+        word.finalized = 11.0
+        latency = tracker.word_matched(word, 11.25, control_id="back")
+        tracker.action_done(latency, 11.5)
+        tracker.word_matched(WordNode("um", 12.0, 12.0), 12.5)
+        tracker.add("first_word", 800)
+
+        summary = tracker.summary()
+        self.assertEqual(summary["upload"]["p50_ms"], 500)
+        self.assertEqual(summary["transcribe"]["p50_ms"], 500)
+        self.assertEqual(summary["match"]["count"], 1)
+        self.assertEqual(summary["action"]["p50_ms"], 250)
+        self.assertEqual(summary["total"]["p99_ms"], 1500)
+        self.assertEqual(summary["first_word"], {"count": 1, "p50_ms": 800, "p99_ms": 800})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import threading
+import unittest
+from unittest import mock
+
+from Alejandro.Core.TranscriptionEngines import EngineLoader, TranscriptionSettings
+
+
+class TestTranscriptionEngines(unittest.TestCase):
+    """Tests for loading the transcription engine lazily in the background."""
+
+    def test_settings_from_env(self):
+        env = {"ALEJANDRO_WHISPER_MODEL": "large-v3", "ALEJANDRO_WHISPER_MIN_CHUNK_SIZE": "0.5", "ALEJANDRO_WHISPER_DIARIZATION": "true"}
+        with mock.patch.dict(os.environ, env):
+            settings = TranscriptionSettings.from_env()
+        self.assertEqual(settings.model_size, "large-v3")
+        self.assertEqual(settings.language, "en")
+        kwargs = settings.engine_kwargs()
+        self.assertEqual(kwargs["model_size"], "large-v3")
+        self.assertEqual(kwargs["min_chunk_size"], 0.5)
+        self.assertTrue(kwargs["diarization"])
+        self.assertNotIn("model_path", kwargs)
+
+    def test_loads_once_in_background(self):
+        release = threading.Event()
+        loads = []
+        def create(settings):
+            loads.append(settings)
+            release.wait(1)
+            return "engine"
+
+        loader = EngineLoader(TranscriptionSettings(), create)
+        self.assertEqual(loader.status()["state"], "not_loaded")
+        loader.warm_up()
+        loader.warm_up()
+        self.assertEqual(loader.status()["state"], "loading")
+        self.assertFalse(loader.ready)
+
+        release.set()
+        self.assertEqual(loader.get(timeout=1), "engine")
+        self.assertTrue(loader.ready)
+        self.assertEqual(loader.status()["state"], "ready")
+        self.assertEqual(len(loads), 1)
+
+    def test_failed_load(self):
+        def create(settings):
+            raise RuntimeError("out of memory")
+        loader = EngineLoader(TranscriptionSettings(), create)
+        with self.assertRaises(RuntimeError):
+            loader.get(timeout=1)
+        self.assertEqual(loader.status()["state"], "failed")
+        self.assertEqual(loader.status()["error"], "out of memory")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+
+from Alejandro.Core.TranscriptTiming import TimedSpan, timed_words
+from Alejandro.Core.VoiceActivity import VoiceGate, voice_activity
+
+
+def audio(*parts):
+    """PCM16 of (seconds, amplitude) parts, a 200Hz tone at amplitude (0 for silence)."""
+    rng = np.random.default_rng(0)
+    pieces = []
+    for seconds, amplitude in parts:
+        t = np.arange(int(seconds * 16000)) / 16000
+        pieces.append(amplitude * np.sin(2 * np.pi * 200 * t) + rng.normal(0, 3, len(t)))
+    return np.concatenate(pieces).astype("<i2").tobytes()
+
+
+def gate(vad, pcm, chunk=8000):
+    passed = b"".join(vad.process(pcm[i:i + chunk]) for i in range(0, len(pcm), chunk))
+    return passed + vad.flush()
+
+
+class TestVoiceGate(unittest.TestCase):
+    """Tests for keeping silence from the model."""
+
+    def test_silence_skipped(self):
+        vad = VoiceGate(threshold_db=-40, hangover_ms=200, padding_ms=100)
+        pcm = audio((2, 0), (1, 8000), (3, 0), (0.5, 8000), (1, 0))
+        passed = gate(vad, pcm)
+
+        # Speech with 100ms before and 200ms after it:
+        self.assertEqual(len(passed), int((1.3 + 0.8) * 16000) * 2)
+        self.assertAlmostEqual(vad.skipped_fraction, 1 - 2.1 / 7.5, places=2)
+        self.assertGreaterEqual(voice_activity()["recordings"], 1)
+
+        # Times in what the model heard are where they were in the recording:
+        self.assertAlmostEqual(vad.recording_seconds(0.1), 2.0)
+        self.assertAlmostEqual(vad.recording_seconds(1.1), 3.0)
+        self.assertAlmostEqual(vad.recording_seconds(1.3), 5.9)
+        self.assertAlmostEqual(vad.recording_seconds(1.4), 6.0)
+
+        words = timed_words("hello there", 0, [TimedSpan(0, 11, 1.4, 1.9)], 1000.0, timeline=vad.recording_seconds)
+        self.assertAlmostEqual(words[0].audio_start, 6.0)
+        self.assertAlmostEqual(words[-1].audio_end, 6.5)
+
+    def test_noisy_room(self):
+        vad = VoiceGate(threshold_db=-60, margin_db=10, hangover_ms=0, padding_ms=0)
+        # A fan louder than the threshold isn't speech for long:
+        gate(vad, audio((30, 500)))
+        self.assertGreater(vad.noise_db, -45)
+        before = vad.passed
+        self.assertEqual(len(gate(vad, audio((1, 500)))), 0)
+        self.assertEqual(vad.passed, before)
+
+    def test_withholding(self):
+        vad = VoiceGate(threshold_db=-40, hangover_ms=0, padding_ms=0)
+        vad.withholding = True
+        self.assertEqual(gate(vad, audio((1, 0), (1, 8000), (1, 0))), b"")
+        vad.withholding = False
+        vad.withholding = True
+        self.assertEqual(vad.process(audio((0.5, 0), (0.5, 8000))), b"")
+        # Only what was withheld since it last stopped withholding:
+        self.assertEqual(len(vad.release()), 8000 * 2)
+        self.assertFalse(vad.withholding)
+        self.assertAlmostEqual(vad.recording_seconds(0.1), 3.6)
+
+    def test_partial_frames(self):
+        vad = VoiceGate(threshold_db=-40, hangover_ms=0, padding_ms=0)
+        pcm = audio((1, 8000))
+        passed = gate(vad, pcm, chunk=333)
+        self.assertEqual(passed, pcm)
+
+
+if __name__ == "__main__":
+    unittest.main()
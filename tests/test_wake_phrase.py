@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from Alejandro.Core.WakePhrase import WakeSpotter, WakeTemplates
+
+SAMPLE_RATE = 16000
+
+
+def vowel(formants, seconds, pitch):
+    """A voiced sound with peaks at formants, like a vowel."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = sum(
+        np.sin(2 * np.pi * pitch * k * t) * sum(np.exp(-((pitch * k - f) / 120) ** 2) for f in formants)
+        for k in range(1, 40)
+    )
+    return signal / np.abs(signal).max() * 0.3
+
+
+def phrase(sounds, speed=1.0, pitch=120):
+    return np.concatenate([vowel(formants, seconds / speed, pitch) for formants, seconds in sounds])
+
+
+WAKE = [((700, 1200), 0.15), ((300, 2300), 0.15), ((500, 1500), 0.1), ((400, 2000), 0.2), ((600, 1000), 0.2)]
+OTHER = [((300, 900), 0.2), ((700, 1700), 0.2), ((350, 2500), 0.2), ((650, 1100), 0.2)]
+
+
+def pcm(*pieces):
+    rng = np.random.default_rng(0)
+    samples = np.concatenate(pieces)
+    samples = samples + rng.normal(0, 0.003, len(samples))
+    return (samples * 32767).astype("<i2").tobytes()
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE))
+
+
+def hear(spotter, audio, chunk=8000):
+    """Feeds audio to spotter in chunks, returning which chunks it heard the wake phrase in."""
+    return [i for i in range(0, len(audio), chunk) if spotter.hear(audio[i:i + chunk])]
+
+
+class TestWakeSpotter(unittest.TestCase):
+    """Tests for listening for the wake phrase without the transcription model."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.templates = WakeTemplates(self.directory.name, max_templates=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_templates(self):
+        self.assertIsNone(self.templates.add(silence(0.1)))
+        # Trimmed of the silence around it:
+        first = self.templates.add(np.concatenate([silence(1), phrase(WAKE), silence(1)]))
+        self.assertEqual(len(self.templates), 1)
+        self.assertLess(len(self.templates.templates[0]), 100)
+
+        self.templates.add(phrase(WAKE, speed=1.2))
+        self.templates.add(phrase(WAKE, speed=0.8))
+        self.assertEqual(len(self.templates), 2)
+        self.assertFalse(os.path.exists(first))
+        self.assertEqual(len(WakeTemplates(self.directory.name)), 2)
+
+    def test_hears_wake_phrase(self):
+        self.templates.add(phrase(WAKE))
+        spotter = WakeSpotter(self.templates, threshold=0.2)
+        spotter.handover_seconds = 60
+        self.assertFalse(spotter.active)
+        spotter.wanted = lambda: True
+        self.assertTrue(spotter.active)
+
+        self.assertEqual(hear(spotter, pcm(silence(1), phrase(OTHER), silence(1))), [])
+        # Said slower, and higher:
+        self.assertEqual(len(hear(spotter, pcm(phrase(WAKE, speed=0.8, pitch=140), silence(1)))), 1)
+        # Handed over to the model:
+        self.assertFalse(spotter.active)
+        self.assertEqual(hear(spotter, pcm(phrase(WAKE))), [])
+
+    def test_falls_back_to_the_model(self):
+        """Templates that never match can't keep the model from hearing the wake phrase."""
+        self.templates.add(phrase(WAKE))
+        spotter = WakeSpotter(self.templates, threshold=0.01)
+        spotter.fallback_seconds = 3
+        spotter.wanted = lambda: True
+        heard = hear(spotter, pcm(*[phrase(OTHER) for _ in range(5)]))
+        self.assertEqual(len(heard), 1)
+        self.assertAlmostEqual(heard[0] / 2 / SAMPLE_RATE, 2.5, delta=0.5)
+        self.assertFalse(spotter.active)
+
+    def test_enroll(self):
+        spotter = WakeSpotter(self.templates)
+        spotter.keep_seconds = 3
+        hear(spotter, pcm(silence(2), phrase(WAKE), silence(1)))
+        self.assertIsNone(spotter.enroll(0.5, 1.5))
+        self.assertIsNotNone(spotter.enroll(2.0, 2.8))
+        self.assertEqual(len(self.templates), 1)
+        # In the background:
+        self.assertIsNotNone(spotter.learn(2.0, 2.8).result(timeout=5))
+        self.assertEqual(len(self.templates), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
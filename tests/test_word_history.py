@@ -0,0 +1,76 @@
+import unittest
+
+from Alejandro.Core.Control import Control, ControlResult
+from Alejandro.Core.ModalControl import ModalControl
+from Alejandro.Core.PhraseMatcher import PhraseMatcher
+from Alejandro.Core.WordHistory import WordHistory
+from Alejandro.Core.WordNode import WordNode
+from Alejandro.Core.WordStream import WordStream
+
+
+def chain_length(node: WordNode) -> int:
+    length = 0
+    while node:
+        length += 1
+        node = node.prev
+    return length
+
+
+class TestWordHistory(unittest.TestCase):
+    """Tests for the bounded window of linked words."""
+
+    def test_bounded_by_word_count(self):
+        history = WordHistory(max_words=5)
+        nodes = WordStream.process_text("one two three four five six seven eight")
+        history.extend(nodes)
+        self.assertEqual(len(history), 5)
+        self.assertEqual(chain_length(history.last), 5)
+        self.assertIsNone(nodes[2].next)
+        self.assertIsNone(nodes[3].prev)
+
+    def test_bounded_by_seconds(self):
+        history = WordHistory(max_seconds=2.0)
+        for second in range(10):
+            history.append(WordNode(f"word{second}", second, second + 0.5))
+        self.assertEqual([str(n) for n in history._window], ["word7", "word8", "word9"])
+
+    def test_fit_keeps_longest_phrase(self):
+        """The window never drops below the longest phrase being matched."""
+        history = WordHistory(max_words=1)
+        history.fit(3)
+        control = Control(id="terminal", text="open terminal one", keyphrases=[], action=None)
+        matcher = PhraseMatcher([control])
+        state = 0
+        for node in WordStream.process_text("please open terminal one"):
+            history.append(node)
+            state, matches = matcher.advance(state, node)
+        self.assertEqual(chain_length(history.last), 3)
+        self.assertEqual(control.validate_word(history.last), ControlResult.USED)
+        self.assertEqual([m.control for m in matches], [control])
+
+        # Back down when the current matcher's phrases are shorter:
+        history.fit(2)
+        history.append(WordNode("please", 10, 10.5))
+        self.assertEqual(chain_length(history.last), 2)
+
+    def test_modal_collects_past_window(self):
+        """A ModalControl keeps every word it collected after they leave the window."""
+        history = WordHistory(max_words=2)
+        speak = ModalControl(id="speak", text="note", keyphrases=[], deactivate_phrases=["done"], action=None)
+        for node in WordStream.process_text("note buy milk eggs and bread done"):
+            history.append(node)
+            result = speak.validate_word(node)
+        self.assertEqual(result, ControlResult.USED)
+        self.assertEqual(speak.collected_words, "buy milk eggs and bread")
+
+    def test_word_node_times(self):
+        node = WordNode("hello", 10.0, 10.5)
+        self.assertEqual(node.end_time.timestamp(), 10.5)
+        node.start_time = node.end_time
+        self.assertEqual(node.start, 10.5)
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from Alejandro.Core.WordMapping import word_id, phrase_variants, parse_number, number_to_words
+
+
+class TestWordMapping(unittest.TestCase):
+    """Tests for word id interning and number normalization."""
+
+    def test_equivalent_words_share_ids(self):
+        """Single word equivalents and case differences compare equal."""
+        self.assertEqual(word_id("five"), word_id("5"))
+        self.assertEqual(word_id("Twenty"), word_id("20"))
+        self.assertEqual(word_id("first"), word_id("1st"))
+        self.assertEqual(word_id("Terminal"), word_id("terminal"))
+        self.assertNotEqual(word_id("oh"), word_id("zero"))
+        self.assertNotEqual(word_id("first"), word_id("one"))
+
+    def test_parse_number(self):
+        """Spoken numbers are parsed up to the first word that can't continue them."""
+        self.assertEqual(parse_number(["twenty", "five", "terminals"]), (25, False, 2))
+        self.assertEqual(parse_number(["one", "hundred", "and", "five"]), (105, False, 4))
+        self.assertEqual(parse_number(["twenty", "first", "note"]), (21, True, 2))
+        self.assertEqual(parse_number(["21st"]), (21, True, 1))
+        self.assertEqual(parse_number(["one", "two"]), (1, False, 1))
+        self.assertIsNone(parse_number(["hundred"]))
+        self.assertIsNone(parse_number(["terminal"]))
+
+    def test_number_to_words(self):
+        self.assertEqual(number_to_words(125), ["one", "hundred", "twenty", "five"])
+        self.assertEqual(number_to_words(21, ordinal=True), ["twenty", "first"])
+        self.assertEqual(number_to_words(2000, ordinal=True), ["two", "thousandth"])
+
+    def test_compound_numbers_match_digits(self):
+        """Phrases match whether numbers are spoken in words or written as digits."""
+        spoken = phrase_variants(["terminal", "twenty", "five"])
+        written = phrase_variants(["terminal", "25"])
+        self.assertIn((word_id("terminal"), word_id("25")), spoken)
+        self.assertIn((word_id("terminal"), word_id("twenty"), word_id("five")), written)
+
+    def test_oh_for_zero(self):
+        """Codes can be read digit by digit with 'oh' for zero."""
+        variants = phrase_variants(["room", "205"])
+        self.assertIn(tuple(word_id(w) for w in ["room", "two", "oh", "five"]), variants)
+
+    def test_oh_for_any_zero(self):
+        """Short codes, lone zeros and leading zeros can be read with 'oh' too."""
+        def spoken(*words):
+            return tuple(word_id(w) for w in words)
+        self.assertIn(spoken("room", "oh", "five"), phrase_variants(["room", "0", "5"]))
+        self.assertIn(spoken("room", "oh", "five"), phrase_variants(["room", "05"]))
+        self.assertIn(spoken("room", "five", "oh"), phrase_variants(["room", "50"]))
+        self.assertIn(spoken("gate", "one", "oh", "oh", "seven"), phrase_variants(["gate", "1007"]))
+
+    def test_plain_phrase_has_one_variant(self):
+        self.assertEqual(phrase_variants(["go", "back"]), [(word_id("go"), word_id("back"))])
+
+
+if __name__ == "__main__":
+    unittest.main()